@@ -1,25 +1,17 @@
+import boot  # First, so boot timings start with the worker's first run of this script
 import streamlit as st
-import time
-from config import APP_TITLE, APP_DESCRIPTION, UI_THEME_COLOR
-from llm_service import LLMService
-from data_handler import CandidateInfo
-import utils
+import secrets
+import threading
+from functools import lru_cache
+from config import (APP_TITLE, APP_DESCRIPTION, UI_THEME_COLOR, UI_STYLESHEET_PATH, UI_CHAT_WINDOW_MESSAGES,
+                    MESSAGE_COOLDOWN_SECONDS)
+from llm_scheduler import SchedulerBusyError
+from metrics import get_metrics
+from screening import ScreeningSession
+from session_store import get_session_store
+from state_backend import get_state_backend
 
-# Initialize session state variables if they don't exist
-if 'conversation_history' not in st.session_state:
-    st.session_state.conversation_history = []
-    
-if 'llm_service' not in st.session_state:
-    st.session_state.llm_service = LLMService()
-    
-if 'candidate_info' not in st.session_state:
-    st.session_state.candidate_info = CandidateInfo()
-    
-if 'conversation_started' not in st.session_state:
-    st.session_state.conversation_started = False
-
-if "last_message_time" not in st.session_state:
-    st.session_state.last_message_time = 0
+boot.record_step("imports")
 
 # Configure page
 st.set_page_config(
@@ -29,91 +21,146 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Import external CSS
-with open("assets/style.css") as f:
-    st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+@st.cache_resource
+def load_stylesheet(path: str = UI_STYLESHEET_PATH) -> str:
+    """Read the stylesheet once per process instead of on every rerun"""
+    with open(path) as f:
+        return f"<style>{f.read()}</style>"
 
-# App title and description
+# Render the page shell before any session or model work, so the first paint is not held up
+st.markdown(load_stylesheet(), unsafe_allow_html=True)
 st.title(APP_TITLE)
 st.markdown(APP_DESCRIPTION)
+boot.record_step("shell_rendered")
+
+# Serve /metrics when instrumentation is enabled (started once per process)
+metrics = get_metrics()
+metrics.start_exporter()
+
+# Sessions, cooldowns and quota live in the shared state backend, so any worker can serve any request
+state_backend = get_state_backend()
+session_store = get_session_store()
+
+# The session token lives in the URL, so a reload or a restarted server finds the same checkpoint
+session_token = st.query_params.get("session")
+if not session_token:
+    session_token = secrets.token_urlsafe(16)
+    st.query_params["session"] = session_token
+
+def load_screening(token):
+    """Resume the screening saved under this token, or start a new one"""
+    checkpoint = session_store.load(token)
+    if checkpoint:
+        try:
+            return ScreeningSession.from_checkpoint(checkpoint)
+        except (KeyError, ValueError) as e:
+            print(f"Could not resume session from checkpoint, starting over: {e}")
+    return ScreeningSession()
+
+def save_checkpoint(screening):
+    """Checkpoint the screening after a turn; a failed write must not interrupt the candidate"""
+    try:
+        session_store.save(session_token, screening.to_checkpoint())
+    except Exception as e:
+        print(f"Error saving session checkpoint: {e}")
+
+# Initialize session state variables if they don't exist
+if 'screening' not in st.session_state:
+    st.session_state.screening = load_screening(session_token)
 
-# Function to display chat messages
-def display_message(role, content):
-    """Display a chat message with appropriate styling"""
-    if role == "user":
-        st.markdown(f'<div class="chat-message user"><div class="message">{content}</div></div>', unsafe_allow_html=True)
-    else:
-        st.markdown(f'<div class="chat-message bot"><div class="message">{content}</div></div>', unsafe_allow_html=True)
+if "history_pages" not in st.session_state:
+    st.session_state.history_pages = 1  # Pages of UI_CHAT_WINDOW_MESSAGES currently rendered
+boot.record_step("session_ready")
 
-# Display chat history
-for message in st.session_state.conversation_history:
-    display_message(message["role"], message["content"])
+# Function to build a chat message; messages never change, so the HTML is built once per message
+@lru_cache(maxsize=1024)
+def message_html(role, content):
+    """Build the styled HTML for a chat message"""
+    css_class = "user" if role == "user" else "bot"
+    return f'<div class="chat-message {css_class}"><div class="message">{content}</div></div>'
+
+screening = st.session_state.screening
 
 # Start conversation if not already started
-if not st.session_state.conversation_started:
-    # Get greeting from LLM
-    greeting = st.session_state.llm_service.start_conversation()
-    
-    # Add to conversation history
-    st.session_state.conversation_history.append({
-        "role": "assistant",
-        "content": greeting
-    })
-    
-    st.session_state.conversation_started = True
-    
-    # Force a rerun to display the greeting
-    st.rerun() 
-
-# User input area
-with st.form(key="user_input_form", clear_on_submit=True):
-    user_input = st.text_input("Type your message:", key="user_input")
-    submit_button = st.form_submit_button("Send")
-    
-    if submit_button and user_input:
-        cooldown = 5  # Rate limit: 5 seconds between messages
-        if time.time() - st.session_state.last_message_time < cooldown:
-            st.warning(f"Please wait {cooldown} seconds before sending another message.")
-        else:
-            st.session_state.last_message_time = time.time()
-
-            # Add user message to conversation history
-            st.session_state.conversation_history.append({
-                "role": "user",
-                "content": user_input
-            })
-            
-            # Get response from LLM
-            with st.spinner("TalentScout Assistant is thinking..."):
-                response = st.session_state.llm_service.get_response(user_input)
-            
-            # Handle NoneType response
-            if not response or response == "Error: No response from API.":
-                response = "⚠️ API rate limit exceeded. Try again later."
-
-            # Add assistant message to conversation history
-            st.session_state.conversation_history.append({
-                "role": "assistant",
-                "content": response
-            })
-            
-            # Update candidate info from conversation
-            extracted_info = st.session_state.candidate_info.extract_info_from_conversation(
-                st.session_state.conversation_history
-            )
-            
-            for field, value in extracted_info.items():
-                st.session_state.candidate_info.update_field(field, value)
-            
-            # Rerun to update the display
-            st.rerun() 
+if not screening.conversation_started:
+    # The greeting usually comes from the response cache, without loading the model SDK;
+    # the chat panel below renders it in this same run
+    try:
+        with st.spinner("Connecting..."):
+            screening.start()
+    except SchedulerBusyError as e:
+        st.warning(str(e))
+        st.stop()
+    save_checkpoint(screening)
+    boot.record_step("greeting")
+
+@st.fragment
+def chat_panel():
+    """Transcript and input form; a new message reruns only this fragment, not the whole page"""
+    history = screening.conversation_history
+
+    # Only the most recent pages of the transcript are sent to the browser
+    shown = UI_CHAT_WINDOW_MESSAGES * st.session_state.history_pages
+    hidden = max(0, len(history) - shown)
+    if hidden:
+        if st.button(f"Show earlier messages ({hidden} hidden)"):
+            st.session_state.history_pages += 1
+            st.rerun(scope="fragment")
+
+    # Display chat history as a single block
+    with metrics.span("render_history"):
+        st.markdown(
+            "".join(message_html(message["role"], message["content"]) for message in history[hidden:]),
+            unsafe_allow_html=True
+        )
+
+    # User input area
+    with st.form(key="user_input_form", clear_on_submit=True):
+        user_input = st.text_input("Type your message:", key="user_input")
+        submit_button = st.form_submit_button("Send")
+        
+        if submit_button and user_input:
+            # Rate limit: one message per cooldown, enforced across workers
+            remaining = state_backend.claim_cooldown(f"cooldown:{session_token}", MESSAGE_COOLDOWN_SECONDS)
+            if remaining > 0:
+                st.warning(f"Please wait {remaining:.1f} seconds before sending another message.")
+                metrics.increment("cooldown_rejections_total")
+            else:
+                # Stream the reply into a placeholder as chunks arrive
+                response_placeholder = st.empty()
+                response = ""
+                try:
+                    for chunk in screening.respond_stream(user_input):
+                        response += chunk
+                        response_placeholder.markdown(
+                            f'<div class="chat-message bot"><div class="message">{response}▌</div></div>',
+                            unsafe_allow_html=True
+                        )
+                except SchedulerBusyError as e:
+                    # Backpressure: the message was not processed, so ask the candidate to resend it
+                    st.warning(str(e))
+                else:
+                    save_checkpoint(screening)
+                    
+                    # Rerun the fragment to show the new messages
+                    st.rerun(scope="fragment")
+
+chat_panel()
+boot.record_step("first_paint")
+
+@st.cache_resource
+def warm_up_backend(_backend):
+    """Load the model SDK in the background once per process, after the first page is on screen"""
+    thread = threading.Thread(target=_backend.warm_up, name="backend-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+warm_up_backend(screening.llm_service.backend)
 
 # Add a reset button in the sidebar
 with st.sidebar:
     st.title("Controls")
     if st.button("Reset Conversation"):
-        st.session_state.conversation_history = []
-        st.session_state.llm_service.reset_conversation()
-        st.session_state.candidate_info = CandidateInfo()
-        st.session_state.conversation_started = False
+        screening.reset()
+        st.session_state.history_pages = 1
         st.rerun()
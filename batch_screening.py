@@ -0,0 +1,238 @@
+# This file provides the offline batch screening command line tool
+# It re-runs extraction and validation over archived transcripts using a process pool
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+from candidate_store import get_candidate_store
+from data_handler import CandidateInfo
+import utils
+
+
+def _shape_error(transcript: Any) -> Optional[str]:
+    """Describe why a parsed line is not a transcript, or None if it is one"""
+    if not isinstance(transcript, dict):
+        return f"expected an object or a list of messages, got {type(transcript).__name__}"
+    conversation = transcript.get("conversation", [])
+    if not isinstance(conversation, list):
+        return f"\"conversation\" must be a list, got {type(conversation).__name__}"
+    for index, message in enumerate(conversation):
+        if not isinstance(message, dict):
+            return f"message {index} must be an object, got {type(message).__name__}"
+    return None
+
+
+def read_transcripts(path: str, counts: Optional[Dict[str, int]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream transcripts from a JSONL archive one line at a time
+
+    Each line is either an object with a "conversation" list of messages (and an
+    optional "id") or a bare list of messages. Lines that are not valid JSON or
+    do not have that shape are reported and skipped.
+
+    Args:
+        path: Path of the JSONL file, or "-" for standard input
+        counts: If given, its "skipped" entry is incremented for every skipped line
+
+    Returns:
+        Iterator[Dict[str, Any]]: Transcripts with "id" and "conversation" keys
+    """
+    f = sys.stdin if path == "-" else open(path, 'r', encoding='utf-8')
+    try:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                transcript = json.loads(line)
+            except ValueError as e:
+                error = str(e)
+            else:
+                if isinstance(transcript, list):
+                    transcript = {"conversation": transcript}
+                error = _shape_error(transcript)
+            if error:
+                print(f"Skipping line {line_number}: {error}", file=sys.stderr)
+                if counts is not None:
+                    counts["skipped"] = counts.get("skipped", 0) + 1
+                continue
+            transcript.setdefault("id", line_number)
+            yield transcript
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def process_transcript(transcript: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run extraction, stage analysis and validation over one transcript
+
+    Args:
+        transcript: A transcript with "id" and "conversation" keys
+
+    Returns:
+        Dict[str, Any]: The screening result for the transcript
+    """
+    conversation = transcript.get("conversation") or []
+    candidate = CandidateInfo()
+    candidate.update_from_conversation(conversation)
+    record = candidate.to_dict()
+
+    email = record.get("email")
+    phone = record.get("phone")
+    return {
+        "id": transcript["id"],
+        "candidate": record,
+        "stage": utils.analyze_conversation_state(conversation)["current_stage"],
+        "missing_fields": candidate.get_missing_fields(),
+        "email_valid": utils.is_valid_email(email) if email else False,
+        "phone_valid": utils.is_valid_phone(phone) if phone else False,
+    }
+
+
+def process_transcript_safely(transcript: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run process_transcript, turning a failure into an error result so one bad record cannot stop the pool
+
+    Args:
+        transcript: A transcript with "id" and "conversation" keys
+
+    Returns:
+        Dict[str, Any]: The screening result, or {"id", "error"} if processing failed
+    """
+    try:
+        return process_transcript(transcript)
+    except Exception as e:
+        return {"id": transcript.get("id"), "error": f"{type(e).__name__}: {e}"}
+
+
+class JsonlResultWriter:
+    """Writes screening results to a JSONL file as they arrive"""
+
+    def __init__(self, output: TextIO):
+        self.output = output
+
+    def write(self, results: List[Dict[str, Any]]) -> None:
+        for result in results:
+            self.output.write(json.dumps(result, ensure_ascii=False, separators=(',', ':')))
+            self.output.write("\n")
+        self.output.flush()
+
+    def close(self) -> None:
+        if self.output is not sys.stdout:
+            self.output.close()
+
+
+class StoreResultWriter:
+    """Writes screening results into the candidate store in batches"""
+
+    def __init__(self, store):
+        self.store = store
+        self.skipped = 0
+
+    def write(self, results: List[Dict[str, Any]]) -> None:
+        records = [result["candidate"] for result in results if result["candidate"].get("email")]
+        self.skipped += len(results) - len(records)
+        self.store.upsert_many(records)
+
+    def close(self) -> None:
+        if self.skipped:
+            print(f"{self.skipped} transcripts had no email address and were not stored", file=sys.stderr)
+
+
+def run_batch(input_path: str, writer, processes: Optional[int] = None, chunk_size: int = 64,
+              window: int = 16, progress_every: int = 10000) -> int:
+    """
+    Process every transcript in an archive across a process pool
+
+    Transcripts are read lazily and handed to the pool one window at a time,
+    so at most processes * chunk_size * window transcripts are held in memory.
+
+    Args:
+        input_path: JSONL archive to read, or "-" for standard input
+        writer: Result writer with write(results) and close() methods
+        processes: Number of worker processes, defaults to the number of cores
+        chunk_size: Transcripts sent to a worker per task
+        window: Chunks per worker read ahead from the archive
+        progress_every: Print progress after this many transcripts
+
+    Returns:
+        int: Number of transcripts processed successfully
+    """
+    processed = 0
+    failed = 0
+    counts = {"skipped": 0}
+    next_report = progress_every
+    start_time = time.time()
+
+    processes = processes or os.cpu_count() or 1
+    batch_size = processes * chunk_size * window
+
+    with Pool(processes=processes) as pool:
+        transcripts = read_transcripts(input_path, counts)
+        while True:
+            batch = list(itertools.islice(transcripts, batch_size))
+            if not batch:
+                break
+
+            pending = []
+            for result in pool.imap_unordered(process_transcript_safely, batch, chunksize=chunk_size):
+                if "error" in result:
+                    failed += 1
+                    print(f"Skipping transcript {result['id']}: {result['error']}", file=sys.stderr)
+                    continue
+                pending.append(result)
+                if len(pending) >= chunk_size:
+                    writer.write(pending)
+                    pending = []
+            if pending:
+                writer.write(pending)
+
+            processed += len(batch)
+            if processed >= next_report:
+                elapsed = time.time() - start_time
+                print(f"Processed {processed} transcripts ({processed / elapsed:.0f}/s)", file=sys.stderr)
+                next_report = processed + progress_every
+
+    writer.close()
+    elapsed = time.time() - start_time
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(f"Done: {processed} transcripts in {elapsed:.1f}s ({rate:.0f}/s)", file=sys.stderr)
+    if counts["skipped"] or failed:
+        print(f"Skipped {counts['skipped']} malformed lines; {failed} transcripts failed to process",
+              file=sys.stderr)
+    return processed - failed
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Re-run candidate extraction over archived screening transcripts")
+    parser.add_argument("input", help="JSONL transcript archive, or - for standard input")
+    parser.add_argument("--output", help="Write results to this JSONL file (- for standard output)")
+    parser.add_argument("--store", action="store_true", help="Write extracted candidates to the candidate store")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Transcripts per worker task")
+    parser.add_argument("--window", type=int, default=16, help="Chunks per worker read ahead from the archive")
+    parser.add_argument("--progress-every", type=int, default=10000, help="Report progress every N transcripts")
+    args = parser.parse_args(argv)
+
+    if args.store == bool(args.output):
+        parser.error("choose exactly one of --output or --store")
+
+    if args.store:
+        writer = StoreResultWriter(get_candidate_store())
+    else:
+        output = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8')
+        writer = JsonlResultWriter(output)
+
+    run_batch(args.input, writer, processes=args.processes, chunk_size=args.chunk_size,
+              window=args.window, progress_every=args.progress_every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+# This file benchmarks the extraction and validation code that runs on every message and every stored record
+# Results are compared with a stored baseline, and a run fails when throughput drops past the tolerance
+
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from config import BENCHMARK_BASELINE_PATH, BENCHMARK_TOLERANCE
+from data_handler import CandidateInfo
+import utils
+
+# Transcript sizes, in candidate turns (each turn is an assistant question and a candidate answer)
+TRANSCRIPT_SIZES = {"short": 8, "medium": 64, "long": 512}
+
+# Length of the repeated unit in pathological inputs; large enough that quadratic matching takes seconds
+PATHOLOGICAL_SIZE = 10000
+
+_FIRST_NAMES = ["Jane", "Arjun", "Wei", "Fatima", "Lucas", "Amara", "Diego", "Yuki"]
+_LAST_NAMES = ["Doe", "Sharma", "Chen", "Khan", "Silva", "Okafor", "Garcia", "Tanaka"]
+_CITIES = ["Berlin", "Bangalore", "Toronto", "Lagos", "Sao Paulo", "Tokyo", "Austin", "Warsaw"]
+_POSITIONS = ["Backend Engineer", "Data Scientist", "Frontend Developer", "DevOps Engineer"]
+_TECHNOLOGIES = ["python", "django", "react", "node", "postgresql", "docker", "kubernetes", "go",
+                 "java", "spring", "typescript", "aws"]
+
+_ASSISTANT_LINES = [
+    "Hello! I'm the TalentScout hiring assistant. Could you tell me your full name?",
+    "Thanks! What is your email address?",
+    "What phone number can we reach you on?",
+    "How many years of professional experience do you have?",
+    "Which position(s) are you interested in?",
+    "Where are you currently located?",
+    "Please list your tech stack: programming languages, frameworks, databases and tools.",
+    "Here are some technical questions for you: How does the Python GIL affect threading?",
+    "Thanks for your answer. Can you describe how you would index a large table?",
+]
+
+# Filler for candidate answers to technical questions
+_PROSE = ("I would start by profiling the slow path, then look at the query plan and add an index "
+          "on the columns used in the filter. Caching helps when reads dominate, but it needs a "
+          "clear invalidation story. ")
+
+
+class Case(NamedTuple):
+    """One benchmark: a name and a function called repeatedly with no arguments"""
+    name: str
+    func: Callable[[], Any]
+
+
+def candidate_answers(rng: random.Random) -> List[str]:
+    """
+    Generate one candidate's answers to the screening questions, in the order they are asked
+
+    Args:
+        rng: Random source, so generated candidates are reproducible
+
+    Returns:
+        List[str]: Candidate messages
+    """
+    first, last = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+    stack = rng.sample(_TECHNOLOGIES, rng.randint(2, 5))
+    return [
+        f"Hi, my name is {first} {last}",
+        f"Sure, it's {first.lower()}.{last.lower()}{rng.randint(1, 999)}@example.com",
+        f"You can call me on +1 {rng.randint(200, 999)} {rng.randint(200, 999)} {rng.randint(1000, 9999)}",
+        f"I have {rng.randint(1, 25)} years of experience",
+        rng.choice(_POSITIONS),
+        f"I live in {rng.choice(_CITIES)}",
+        f"I work with {', '.join(stack[:-1])} and {stack[-1]}",
+        _PROSE * rng.randint(1, 3),
+        _PROSE,
+    ]
+
+
+def generate_transcript(turns: int, seed: int = 0) -> List[Dict[str, str]]:
+    """
+    Generate a screening conversation of a given length
+
+    Past the screening script the candidate keeps answering technical questions,
+    restating details now and then as real candidates do.
+
+    Args:
+        turns: Number of candidate messages
+        seed: Random seed
+
+    Returns:
+        List[Dict[str, str]]: Conversation history with alternating assistant and user messages
+    """
+    rng = random.Random(seed)
+    answers = candidate_answers(rng)
+    history = []
+    for turn in range(turns):
+        history.append({"role": "assistant", "content": _ASSISTANT_LINES[min(turn, len(_ASSISTANT_LINES) - 1)]})
+        if turn < len(answers):
+            answer = answers[turn]
+        else:
+            answer = rng.choice(answers[3:]) if rng.random() < 0.2 else _PROSE
+        history.append({"role": "user", "content": answer})
+    return history
+
+
+def pathological_inputs(size: int = PATHOLOGICAL_SIZE) -> Dict[str, str]:
+    """
+    Generate adversarial messages aimed at regex backtracking
+
+    Each input repeats, many times, text a field pattern can start matching but never complete.
+
+    Args:
+        size: Number of repetitions of the adversarial unit
+
+    Returns:
+        Dict[str, str]: Input name -> message
+    """
+    return {
+        "spaces_after_number": "5" + " " * size + "x",
+        "spaces_after_plus": "5 +" + " " * size + "x",
+        "spaces_after_cue": "my tech stack" + " " * size + "!",
+        "spaces_in_stack": "python" + " " * size + "x",
+        "digit_run": "1" * size,
+        "digit_groups": "12 " * size,
+        "at_signs": "a@" * size,
+        "long_domain": "x@" + "a-" * size,
+        "long_local_part": "a." * size + "@",
+        "cue_repeats": "my name is " * size,
+        "competing_tech_cues": "tech stack: go, experience with java, " * (size // 10),
+    }
+
+
+def _typical_inputs() -> Dict[str, str]:
+    """Realistic messages: a short answer, a message with every field, and a long free-text answer"""
+    return {
+        "short": "I have 5 years of experience",
+        "all_fields": ("My name is Jane Doe, email jane.doe@example.com, phone +1 555 123 4567. "
+                       "I have 7 years of experience, I live in Berlin and I work with python, django and react"),
+        "prose": _PROSE * 50,
+    }
+
+
+def build_cases() -> List[Case]:
+    """
+    Build every benchmark case
+
+    Returns:
+        List[Case]: Cases in report order
+    """
+    cases = []
+    messages = {**_typical_inputs(), **{f"pathological_{name}": text for name, text in pathological_inputs().items()}}
+
+    # data_handler: per-message extraction and per-record accessors
+    for size, turns in TRANSCRIPT_SIZES.items():
+        history = generate_transcript(turns)
+        info = CandidateInfo()
+        cases.append(Case(f"extract_info_from_conversation[{size}]",
+                          lambda info=info, history=history: info.extract_info_from_conversation(history, full_rescan=True)))
+        cases.append(Case(f"update_from_conversation[{size}]",
+                          lambda history=history: CandidateInfo().update_from_conversation(history)))
+        cases.append(Case(f"analyze_conversation_state[{size}]",
+                          lambda history=history: utils.analyze_conversation_state(history)))
+    for name, text in messages.items():
+        history = [{"role": "user", "content": text}]
+        cases.append(Case(f"extract_info_from_conversation[{name}]",
+                          lambda history=history: CandidateInfo().extract_info_from_conversation(history)))
+
+    empty, complete = CandidateInfo(), CandidateInfo()
+    complete.update_from_conversation(generate_transcript(len(_ASSISTANT_LINES)))
+    complete.update_field("desired_positions", _POSITIONS[0])
+    for name, info in (("empty", empty), ("complete", complete)):
+        cases.append(Case(f"get_missing_fields[{name}]", info.get_missing_fields))
+        cases.append(Case(f"to_dict[{name}]", info.to_dict))
+
+    # utils: extraction helpers on realistic and adversarial messages
+    for name, text in messages.items():
+        for func in (utils.extract_email, utils.extract_phone, utils.extract_years_experience,
+                     utils.format_tech_stack, utils.normalize_tech_terms):
+            cases.append(Case(f"{func.__name__}[{name}]", lambda func=func, text=text: func(text)))
+
+    # utils: validators on real values and on the adversarial inputs
+    validator_inputs = {"valid_email": "jane.doe@example.com", "valid_phone": "+1 555 123 4567",
+                        **{f"pathological_{name}": text for name, text in pathological_inputs().items()}}
+    for name, value in validator_inputs.items():
+        for func in (utils.is_valid_email, utils.is_valid_phone):
+            cases.append(Case(f"{func.__name__}[{name}]", lambda func=func, value=value: func(value)))
+    return cases
+
+
+def _time_calls(func: Callable[[], Any], number: int) -> float:
+    # Like timeit, keep the cyclic garbage collector out of the timed loop; its pauses depend on
+    # everything else the process has allocated, not on the code being measured
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        return time.perf_counter() - started
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def measure_throughput(func: Callable[[], Any], min_time: float, repeat: int) -> float:
+    """
+    Measure calls per second, keeping the best of several timed runs
+
+    Args:
+        func: The function to call
+        min_time: Approximate total seconds to spend timing
+        repeat: Number of timed runs
+
+    Returns:
+        float: Calls per second in the fastest run
+    """
+    target = min_time / repeat
+    number = 1
+    elapsed = _time_calls(func, number)
+    # Grow the call count until one run takes long enough to time reliably
+    while elapsed < target:
+        number = max(number * 2, int(number * target / max(elapsed, 1e-9) * 1.1))
+        elapsed = _time_calls(func, number)
+    best = min([elapsed] + [_time_calls(func, number) for _ in range(repeat - 1)])
+    return number / best
+
+
+def measure_memory(func: Callable[[], Any]) -> int:
+    """
+    Measure the peak memory one call allocates
+
+    Args:
+        func: The function to call
+
+    Returns:
+        int: Peak bytes allocated during the call, above what was allocated before it
+    """
+    func()  # Warm up caches so they are not counted
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(peak - before, 0)
+
+
+def run(cases: List[Case], min_time: float = 0.1, repeat: int = 3,
+        rounds: int = 1) -> Dict[str, Dict[str, float]]:
+    """
+    Run benchmark cases
+
+    Args:
+        cases: The cases to run
+        min_time: Approximate seconds of timing per case
+        repeat: Timed runs per case
+        rounds: Independent measurements per case; the median is reported
+
+    Returns:
+        Dict[str, Dict[str, float]]: Case name -> ops_per_sec and peak_bytes per call
+    """
+    results = {}
+    for case in cases:
+        results[case.name] = {
+            "ops_per_sec": statistics.median(measure_throughput(case.func, min_time, repeat) for _ in range(rounds)),
+            "peak_bytes": measure_memory(case.func),
+        }
+    return results
+
+
+def confirm_regressions(cases: List[Case], results: Dict[str, Dict[str, float]],
+                        baseline: Dict[str, Dict[str, float]], tolerance: float = BENCHMARK_TOLERANCE,
+                        attempts: int = 2, min_time: float = 0.1, repeat: int = 3) -> List[str]:
+    """
+    Re-measure cases that look slower than the baseline, keeping their best throughput
+
+    Timings on shared machines jitter by tens of percent; a real regression is slow on every
+    attempt, while noise rarely is.
+
+    Args:
+        cases: The cases that were run
+        results: Results of this run, updated in place with the re-measured throughput
+        baseline: Stored results
+        tolerance: Allowed fractional drop in ops/sec
+        attempts: Extra measurements of each suspect case
+        min_time: Approximate seconds of timing per measurement
+        repeat: Timed runs per measurement
+
+    Returns:
+        List[str]: Names of cases still slower than the tolerance allows
+    """
+    by_name = {case.name: case for case in cases}
+    regressions = find_regressions(results, baseline, tolerance)
+    for _ in range(attempts):
+        if not regressions:
+            break
+        for name in regressions:
+            ops = measure_throughput(by_name[name].func, min_time, repeat)
+            results[name]["ops_per_sec"] = max(results[name]["ops_per_sec"], ops)
+        regressions = find_regressions({name: results[name] for name in regressions}, baseline, tolerance)
+    return regressions
+
+
+def find_regressions(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+                     tolerance: float = BENCHMARK_TOLERANCE) -> List[str]:
+    """
+    Compare results with a baseline
+
+    Args:
+        results: Results of this run
+        baseline: Stored results
+        tolerance: Allowed fractional drop in ops/sec
+
+    Returns:
+        List[str]: Names of cases whose throughput dropped more than the tolerance
+    """
+    return [
+        name for name, result in results.items()
+        if name in baseline and result["ops_per_sec"] < baseline[name]["ops_per_sec"] * (1 - tolerance)
+    ]
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    """Read a stored baseline, or None if there is none"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, float]]) -> None:
+    """Store results as the new baseline, with the interpreter they were measured on"""
+    baseline = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {name: {"ops_per_sec": round(result["ops_per_sec"], 1), "peak_bytes": result["peak_bytes"]}
+                    for name, result in results.items()},
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2)
+        f.write("\n")
+
+
+def format_report(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+                  regressions: List[str]) -> str:
+    """Format results as a table, with the change from the baseline where there is one"""
+    width = max(len(name) for name in results)
+    lines = [f"{'case':<{width}}  {'ops/sec':>12}  {'us/op':>10}  {'peak KiB':>9}  {'vs baseline':>11}"]
+    for name, result in results.items():
+        ops = result["ops_per_sec"]
+        change = ""
+        if name in baseline:
+            change = f"{(ops / baseline[name]['ops_per_sec'] - 1) * 100:+.0f}%"
+            if name in regressions:
+                change += " !"
+        lines.append(f"{name:<{width}}  {ops:>12,.0f}  {1e6 / ops:>10.2f}  "
+                     f"{result['peak_bytes'] / 1024:>9.1f}  {change:>11}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the extraction and validation hot paths")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=0.1, help="Approximate seconds of timing per case")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case; the best one counts")
+    parser.add_argument("--baseline", default=BENCHMARK_BASELINE_PATH, help="Baseline file")
+    parser.add_argument("--tolerance", type=float, default=BENCHMARK_TOLERANCE,
+                        help="Allowed fractional drop in ops/sec before the run fails")
+    parser.add_argument("--confirm", type=int, default=2,
+                        help="Re-measure a case this many times before reporting it as a regression")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    cases = [case for case in build_cases() if args.filter in case.name]
+    if not cases:
+        print(f"No benchmark matches {args.filter!r}")
+        return 2
+    # A baseline is the median of several rounds, so one lucky run does not make later checks fail
+    results = run(cases, args.min_time, args.repeat, rounds=3 if args.save_baseline else 1)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Saved baseline for {len(results)} cases to {args.baseline}")
+        return 0
+
+    stored = load_baseline(args.baseline)
+    baseline = stored["results"] if stored else {}
+    if stored and stored.get("python") != platform.python_version():
+        print(f"Note: baseline was recorded on Python {stored.get('python')}, this is {platform.python_version()}")
+    regressions = confirm_regressions(cases, results, baseline, args.tolerance, args.confirm,
+                                      args.min_time, args.repeat)
+
+    if args.json:
+        print(json.dumps({"results": results, "regressions": regressions}, indent=2))
+    else:
+        print(format_report(results, baseline, regressions))
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than the baseline by more than {args.tolerance:.0%}: "
+              f"{', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
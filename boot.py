@@ -0,0 +1,65 @@
+# This file records how long each worker takes to boot and to show its first page
+# Timings are kept per process and shown on the diagnostics page
+
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+# Reference point for every timing: the moment this module was first imported
+BOOT_STARTED = time.perf_counter()
+
+# Modules that are slow to import; the diagnostics page shows whether each has been loaded yet
+HEAVY_MODULES = ("google.generativeai", "grpc", "google.protobuf", "numpy", "dotenv")
+
+_lock = threading.Lock()
+_steps: Dict[str, float] = {}
+_imports: List[Tuple[str, float]] = []
+
+
+def record_step(name: str) -> None:
+    """
+    Record the first time the process reaches a boot step; later calls are ignored
+
+    Args:
+        name: The step, e.g. "first_paint"
+    """
+    elapsed = time.perf_counter() - BOOT_STARTED
+    with _lock:
+        _steps.setdefault(name, elapsed)
+
+
+@contextmanager
+def timed_import(name: str) -> Iterator[None]:
+    """
+    Time a deferred import of a heavy module
+
+    Args:
+        name: The module being imported
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _imports.append((name, time.perf_counter() - started))
+
+
+def boot_report() -> Dict[str, object]:
+    """
+    Get this process's boot timings
+
+    Returns:
+        Dict[str, object]: Seconds since boot for each step, time spent in deferred imports,
+            and which heavy modules are loaded
+    """
+    with _lock:
+        steps = sorted(_steps.items(), key=lambda item: item[1])
+        imports = list(_imports)
+    return {
+        "uptime_seconds": time.perf_counter() - BOOT_STARTED,
+        "steps": steps,
+        "deferred_imports": imports,
+        "loaded_modules": {module: module in sys.modules for module in HEAVY_MODULES},
+    }
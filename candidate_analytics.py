@@ -0,0 +1,341 @@
+# This file answers recruiter queries and aggregates over stored candidates
+# Candidates are held as NumPy columns with an inverted index from tech terms to sorted candidate rows
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from config import CANDIDATE_INDEX_PATH
+from question_bank import canonical_tech_stack
+
+# Stored in the years column when a candidate's experience is unknown
+MISSING_YEARS = -1
+
+
+def _location_key(location: Optional[str]) -> str:
+    """Normalize a location the same way the candidate store indexes it"""
+    return location.strip().lower() if location else ""
+
+
+class CandidateIndex:
+    """Columnar candidate data with an inverted tech index
+
+    Every candidate is a row number. Numeric and categorical fields are NumPy
+    columns indexed by row. Each canonical tech name maps to a sorted int32
+    array of the rows that list it (its posting list). A boolean query
+    intersects posting lists, smallest first, then applies column filters to
+    the surviving rows only. Aggregates are computed with bincount over those
+    rows rather than by looping over records in Python. Stacks and queries are
+    both canonicalized, so "k8s" finds candidates who wrote "kubernetes".
+    """
+
+    def __init__(self, emails: np.ndarray, years: np.ndarray, locations: List[str],
+                 location_codes: np.ndarray, terms: List[str], term_offsets: np.ndarray,
+                 term_rows: np.ndarray):
+        """
+        Args:
+            emails: Candidate email per row
+            years: Years of experience per row (MISSING_YEARS if unknown)
+            locations: Location vocabulary; code 0 is the empty (unknown) location
+            location_codes: Index into locations per row
+            terms: Tech term vocabulary, sorted
+            term_offsets: Start of each term's posting list in term_rows (len(terms) + 1 entries)
+            term_rows: All posting lists concatenated, each sorted by row
+        """
+        self.emails = emails
+        self.years = years
+        self.locations = locations
+        self.location_codes = location_codes
+        self.terms = terms
+        self.term_offsets = term_offsets
+        self.term_rows = term_rows
+        self._term_ids = {term: number for number, term in enumerate(terms)}
+        self._location_ids = {location: number for number, location in enumerate(locations)}
+        # Term code of every posting, aligned with term_rows, for vectorized frequency counts
+        self._posting_terms = np.repeat(np.arange(len(terms), dtype=np.int32), np.diff(term_offsets))
+
+    @classmethod
+    def build(cls, records: Iterable[Dict[str, Any]]) -> "CandidateIndex":
+        """
+        Build the index from candidate records
+
+        Records without an email are skipped; for duplicate emails the last record wins.
+
+        Args:
+            records: Candidate dictionaries as returned by CandidateInfo.to_dict
+
+        Returns:
+            CandidateIndex: The index
+        """
+        by_email: Dict[str, Dict[str, Any]] = {}
+        for record in records:
+            email = (record.get("email") or "").strip().lower()
+            if email:
+                by_email[email] = record
+
+        emails = sorted(by_email)
+        years = np.full(len(emails), MISSING_YEARS, dtype=np.int16)
+        locations = [""]
+        location_ids = {"": 0}
+        location_codes = np.zeros(len(emails), dtype=np.int32)
+        postings: Dict[str, List[int]] = {}
+
+        for row, email in enumerate(emails):
+            record = by_email[email]
+            if record.get("years_experience") is not None:
+                years[row] = int(record["years_experience"])
+            location = _location_key(record.get("current_location"))
+            code = location_ids.get(location)
+            if code is None:
+                code = location_ids[location] = len(locations)
+                locations.append(location)
+            location_codes[row] = code
+            for term in canonical_tech_stack(record.get("tech_stack")):
+                postings.setdefault(term, []).append(row)
+
+        # Rows are visited in order, so every posting list is already sorted and unique
+        terms = sorted(postings)
+        lengths = np.array([len(postings[term]) for term in terms], dtype=np.int64)
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=term_offsets[1:])
+        term_rows = np.fromiter((row for term in terms for row in postings[term]),
+                                dtype=np.int32, count=int(term_offsets[-1]))
+        return cls(np.array(emails, dtype=object), years, locations, location_codes,
+                   terms, term_offsets, term_rows)
+
+    def __len__(self) -> int:
+        return len(self.emails)
+
+    def postings(self, term: str) -> np.ndarray:
+        """
+        Get the sorted rows of candidates listing a tech term
+
+        Args:
+            term: A canonical tech name, e.g. "kubernetes" rather than "k8s"
+
+        Returns:
+            np.ndarray: Row numbers, empty if no candidate lists the term
+        """
+        number = self._term_ids.get(term)
+        if number is None:
+            return np.empty(0, dtype=np.int32)
+        return self.term_rows[self.term_offsets[number]:self.term_offsets[number + 1]]
+
+    def query(self, tech: Union[str, List[str], None] = None, any_tech: Union[str, List[str], None] = None,
+              location: Optional[str] = None, min_years: Optional[int] = None,
+              max_years: Optional[int] = None) -> np.ndarray:
+        """
+        Find the rows of candidates matching all of the given filters
+
+        Args:
+            tech: Technologies the candidate must all have
+            any_tech: Technologies of which the candidate must have at least one
+            location: Current location (case-insensitive exact match)
+            min_years: Minimum years of experience
+            max_years: Maximum years of experience
+
+        Returns:
+            np.ndarray: Sorted row numbers of matching candidates
+        """
+        rows: Optional[np.ndarray] = None
+
+        required = [self.postings(term) for term in canonical_tech_stack(tech)]
+        for posting in sorted(required, key=len):
+            rows = posting if rows is None else np.intersect1d(rows, posting, assume_unique=True)
+            if not len(rows):
+                return rows
+
+        alternatives = [self.postings(term) for term in canonical_tech_stack(any_tech)]
+        if alternatives:
+            union = np.unique(np.concatenate(alternatives))
+            rows = union if rows is None else np.intersect1d(rows, union, assume_unique=True)
+
+        if rows is None:
+            rows = np.arange(len(self), dtype=np.int32)
+
+        mask = np.ones(len(rows), dtype=bool)
+        if location:
+            code = self._location_ids.get(_location_key(location))
+            if code is None:
+                return rows[:0]
+            mask &= self.location_codes[rows] == code
+        if min_years is not None or max_years is not None:
+            years = self.years[rows]
+            mask &= years != MISSING_YEARS
+            if min_years is not None:
+                mask &= years >= min_years
+            if max_years is not None:
+                mask &= years <= max_years
+        return rows[mask]
+
+    def emails_for(self, rows: np.ndarray) -> List[str]:
+        """Get the emails of the given rows"""
+        return self.emails[rows].tolist()
+
+    def tech_frequency(self, rows: Optional[np.ndarray] = None, top: int = 20) -> List[Tuple[str, int]]:
+        """
+        Count how many candidates list each tech term
+
+        Args:
+            rows: Restrict the count to these rows (default: all candidates)
+            top: Number of most common terms to return
+
+        Returns:
+            List[Tuple[str, int]]: (term, candidates) pairs, most common first
+        """
+        codes = self._posting_terms
+        if rows is not None:
+            selected = np.zeros(len(self), dtype=bool)
+            selected[rows] = True
+            codes = codes[selected[self.term_rows]]
+        counts = np.bincount(codes, minlength=len(self.terms))
+        order = np.argsort(-counts, kind="stable")[:top]
+        return [(self.terms[number], int(counts[number])) for number in order if counts[number]]
+
+    def experience_by_location(self, rows: Optional[np.ndarray] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Summarize years of experience per location
+
+        Candidates with unknown experience are left out.
+
+        Args:
+            rows: Restrict the summary to these rows (default: all candidates)
+
+        Returns:
+            Dict[str, Dict[str, float]]: Per location, the candidate count and mean, median, min and max years
+        """
+        codes = self.location_codes if rows is None else self.location_codes[rows]
+        years = self.years if rows is None else self.years[rows]
+        known = years != MISSING_YEARS
+        codes, years = codes[known], years[known].astype(np.int64)
+        if not len(codes):
+            return {}
+
+        # Sort by location then years, so each location is one contiguous, ordered run
+        order = np.lexsort((years, codes))
+        codes, years = codes[order], years[order]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        ends = np.r_[starts[1:], len(codes)]
+        counts = ends - starts
+        sums = np.add.reduceat(years, starts)
+        medians = (years[starts + (counts - 1) // 2] + years[starts + counts // 2]) / 2
+
+        summary = {}
+        for number, start in enumerate(starts):
+            summary[self.locations[codes[start]] or "unknown"] = {
+                "count": int(counts[number]),
+                "mean": round(float(sums[number]) / int(counts[number]), 2),
+                "median": float(medians[number]),
+                "min": int(years[start]),
+                "max": int(years[ends[number] - 1]),
+            }
+        return summary
+
+    def experience_histogram(self, rows: Optional[np.ndarray] = None,
+                             bins: Tuple[int, ...] = (0, 2, 5, 10, 20, 61)) -> Dict[str, int]:
+        """
+        Count candidates per experience band
+
+        Args:
+            rows: Restrict the count to these rows (default: all candidates)
+            bins: Band edges in years; each band includes its lower edge
+
+        Returns:
+            Dict[str, int]: Candidates per band, keyed like "2-4"
+        """
+        years = self.years if rows is None else self.years[rows]
+        counts, _ = np.histogram(years[years != MISSING_YEARS], bins=bins)
+        return {f"{low}-{high - 1}": int(count) for low, high, count in zip(bins, bins[1:], counts)}
+
+    def save(self, path: str = CANDIDATE_INDEX_PATH) -> None:
+        """
+        Write the index as a compressed NumPy archive, one array per column
+
+        Args:
+            path: Destination .npz file
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            temp_path,
+            emails=self.emails.astype(str),
+            years=self.years,
+            locations=np.array(self.locations, dtype=str),
+            location_codes=self.location_codes,
+            terms=np.array(self.terms, dtype=str),
+            term_offsets=self.term_offsets,
+            term_rows=self.term_rows,
+        )
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str = CANDIDATE_INDEX_PATH) -> "CandidateIndex":
+        """
+        Read an index written by save
+
+        Args:
+            path: The .npz file
+
+        Returns:
+            CandidateIndex: The index
+        """
+        with np.load(path) as archive:
+            return cls(
+                archive["emails"].astype(object),
+                archive["years"],
+                archive["locations"].tolist(),
+                archive["location_codes"],
+                archive["terms"].tolist(),
+                archive["term_offsets"],
+                archive["term_rows"],
+            )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Query and summarize stored candidates")
+    parser.add_argument("--index", default=CANDIDATE_INDEX_PATH, help="Index file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("build", help="Build the index from the candidate store")
+
+    query_parser = subparsers.add_parser("query", help="Find candidates and summarize the matches")
+    query_parser.add_argument("--tech", nargs="*", help="Technologies the candidate must all have")
+    query_parser.add_argument("--any-tech", nargs="*", help="Technologies of which the candidate needs one")
+    query_parser.add_argument("--location", help="Current location")
+    query_parser.add_argument("--min-years", type=int, help="Minimum years of experience")
+    query_parser.add_argument("--max-years", type=int, help="Maximum years of experience")
+    query_parser.add_argument("--limit", type=int, default=20, help="Number of emails to list")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        from candidate_store import get_candidate_store
+        start_time = time.perf_counter()
+        index = CandidateIndex.build(get_candidate_store().iter_all(batch_size=5000))
+        index.save(args.index)
+        print(f"Indexed {len(index)} candidates and {len(index.terms)} technologies into {args.index} "
+              f"in {time.perf_counter() - start_time:.2f}s")
+        return
+
+    index = CandidateIndex.load(args.index)
+    start_time = time.perf_counter()
+    rows = index.query(tech=args.tech, any_tech=args.any_tech, location=args.location,
+                       min_years=args.min_years, max_years=args.max_years)
+    report = {
+        "matches": len(rows),
+        "emails": index.emails_for(rows[:args.limit]),
+        "tech_frequency": index.tech_frequency(rows),
+        "experience": index.experience_histogram(rows),
+        "experience_by_location": index.experience_by_location(rows),
+    }
+    report["seconds"] = round(time.perf_counter() - start_time, 4)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
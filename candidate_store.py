@@ -0,0 +1,325 @@
+# This file provides indexed storage for candidate records
+# The default backend is a local SQLite database with secondary indexes for recruiter lookups
+
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from config import CANDIDATE_STORE_BACKEND, CANDIDATE_STORE_PATH
+from utils import normalize_tech_terms
+
+
+class CandidateStore:
+    """Interface for candidate storage backends
+
+    Records are the dictionaries produced by CandidateInfo.to_dict and are keyed by email.
+    """
+
+    write_queue = None  # Write-behind queue feeding this store, set by persistence.get_store_queue
+
+    def upsert(self, record: Dict[str, Any]) -> None:
+        """
+        Insert a candidate record or replace the existing record with the same email
+
+        Args:
+            record: Candidate data as returned by CandidateInfo.to_dict
+        """
+        raise NotImplementedError
+
+    def upsert_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert or replace several candidate records
+
+        Args:
+            records: Candidate records to store
+
+        Returns:
+            int: Number of records stored
+        """
+        count = 0
+        for record in records:
+            self.upsert(record)
+            count += 1
+        return count
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a candidate by email address
+
+        Args:
+            email: The candidate's email address
+
+        Returns:
+            Optional[Dict[str, Any]]: The candidate record, or None if not found
+        """
+        raise NotImplementedError
+
+    def find(self, tech: Union[str, List[str], None] = None, location: Optional[str] = None,
+             min_years: Optional[int] = None, max_years: Optional[int] = None,
+             limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Find candidates matching all of the given filters, ordered by email
+
+        Args:
+            tech: Technology or list of technologies the candidate must all have
+            location: Current location (case-insensitive exact match)
+            min_years: Minimum years of experience
+            max_years: Maximum years of experience
+            limit: Page size
+            offset: Number of matching records to skip
+
+        Returns:
+            List[Dict[str, Any]]: One page of matching candidate records
+        """
+        raise NotImplementedError
+
+    def count(self, tech: Union[str, List[str], None] = None, location: Optional[str] = None,
+              min_years: Optional[int] = None, max_years: Optional[int] = None) -> int:
+        """
+        Count candidates matching all of the given filters
+
+        Returns:
+            int: Number of matching candidates
+        """
+        raise NotImplementedError
+
+    def iter_all(self, batch_size: int = 1000) -> Iterable[Dict[str, Any]]:
+        """
+        Iterate over every stored candidate record
+
+        Args:
+            batch_size: Number of records fetched per query
+
+        Returns:
+            Iterable[Dict[str, Any]]: Candidate records in email order
+        """
+        offset = 0
+        while True:
+            page = self.find(limit=batch_size, offset=offset)
+            if not page:
+                return
+            yield from page
+            offset += len(page)
+
+    def import_json_files(self, pattern: str = "data/candidate_*.json") -> int:
+        """
+        One-time import of candidate files written by CandidateInfo.save_to_file
+
+        Files without an email address are skipped since records are keyed by email.
+
+        Args:
+            pattern: Glob pattern of the JSON files to import
+
+        Returns:
+            int: Number of records imported
+        """
+        def records():
+            for filename in sorted(glob.glob(pattern)):
+                try:
+                    with open(filename, 'r', encoding='utf-8') as f:
+                        record = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"Skipping {filename}: {e}")
+                    continue
+                if record.get("email"):
+                    yield record
+                else:
+                    print(f"Skipping {filename}: missing email address")
+
+        return self.upsert_many(records())
+
+    def close(self) -> None:
+        """Release any resources held by the store, first writing everything still queued for it"""
+        if self.write_queue is not None:
+            self.write_queue.close()
+
+
+class SQLiteCandidateStore(CandidateStore):
+    """Candidate store backed by a local SQLite database
+
+    Tech stack items, location and years of experience are indexed so that
+    lookups do not need to read every record.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS candidates (
+            email TEXT PRIMARY KEY,
+            full_name TEXT,
+            phone TEXT,
+            years_experience INTEGER,
+            location_key TEXT,
+            data TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS candidate_tech (
+            tech TEXT NOT NULL,
+            email TEXT NOT NULL,
+            PRIMARY KEY (tech, email)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_candidate_tech_email ON candidate_tech (email);
+        CREATE INDEX IF NOT EXISTS idx_candidates_location ON candidates (location_key);
+        CREATE INDEX IF NOT EXISTS idx_candidates_years ON candidates (years_experience);
+    """
+
+    def __init__(self, path: str = CANDIDATE_STORE_PATH):
+        """
+        Open (and create if needed) the database
+
+        Args:
+            path: Path of the SQLite database file
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def _upsert_locked(self, record: Dict[str, Any]) -> None:
+        """Write one record (lock and transaction must be held by the caller)"""
+        email = (record.get("email") or "").strip().lower()
+        if not email:
+            raise ValueError("Cannot store candidate without an email address")
+
+        location = record.get("current_location")
+        years = record.get("years_experience")
+        self._conn.execute(
+            "INSERT INTO candidates (email, full_name, phone, years_experience, location_key, data, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(email) DO UPDATE SET full_name = excluded.full_name, phone = excluded.phone, "
+            "years_experience = excluded.years_experience, location_key = excluded.location_key, "
+            "data = excluded.data, updated_at = excluded.updated_at",
+            (
+                email,
+                record.get("full_name"),
+                record.get("phone"),
+                int(years) if years is not None else None,
+                location.strip().lower() if location else None,
+                json.dumps(record, ensure_ascii=False, separators=(',', ':')),
+                datetime.now().isoformat(),
+            )
+        )
+        self._conn.execute("DELETE FROM candidate_tech WHERE email = ?", (email,))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO candidate_tech (tech, email) VALUES (?, ?)",
+            [(tech, email) for tech in normalize_tech_terms(record.get("tech_stack"))]
+        )
+
+    def upsert(self, record: Dict[str, Any]) -> None:
+        with self._lock, self._conn:
+            self._upsert_locked(record)
+
+    def upsert_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        with self._lock, self._conn:
+            for record in records:
+                self._upsert_locked(record)
+                count += 1
+        return count
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM candidates WHERE email = ?", (email.strip().lower(),)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _where(self, tech, location, min_years, max_years):
+        """Build the WHERE clause and parameters shared by find and count"""
+        clauses = []
+        params: List[Any] = []
+        for term in normalize_tech_terms(tech):
+            clauses.append("email IN (SELECT email FROM candidate_tech WHERE tech = ?)")
+            params.append(term)
+        if location:
+            clauses.append("location_key = ?")
+            params.append(location.strip().lower())
+        if min_years is not None:
+            clauses.append("years_experience >= ?")
+            params.append(min_years)
+        if max_years is not None:
+            clauses.append("years_experience <= ?")
+            params.append(max_years)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def find(self, tech: Union[str, List[str], None] = None, location: Optional[str] = None,
+             min_years: Optional[int] = None, max_years: Optional[int] = None,
+             limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        where, params = self._where(tech, location, min_years, max_years)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT data FROM candidates{where} ORDER BY email LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def count(self, tech: Union[str, List[str], None] = None, location: Optional[str] = None,
+              min_years: Optional[int] = None, max_years: Optional[int] = None) -> int:
+        where, params = self._where(tech, location, min_years, max_years)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM candidates{where}", params).fetchone()[0]
+
+    def iter_all(self, batch_size: int = 1000) -> Iterable[Dict[str, Any]]:
+        # Keyset pagination on the primary key: each page is an index seek from the last email seen,
+        # where OFFSET would re-scan every earlier row and make a full pass quadratic
+        last_email = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT email, data FROM candidates WHERE email > ? ORDER BY email LIMIT ?",
+                    (last_email, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_email = rows[-1][0]
+            for _, data in rows:
+                yield json.loads(data)
+
+    def close(self) -> None:
+        super().close()
+        with self._lock:
+            self._conn.close()
+
+
+# Available storage backends, selected with CANDIDATE_STORE_BACKEND
+STORE_BACKENDS = {
+    "sqlite": SQLiteCandidateStore,
+}
+
+_store: Optional[CandidateStore] = None
+_store_lock = threading.Lock()
+
+
+def get_candidate_store() -> CandidateStore:
+    """
+    Get the process-wide candidate store configured in config.py
+
+    Returns:
+        CandidateStore: The shared store instance
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = STORE_BACKENDS[CANDIDATE_STORE_BACKEND](CANDIDATE_STORE_PATH)
+        return _store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the TalentScout candidate store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="Import legacy data/candidate_*.json files")
+    import_parser.add_argument("--pattern", default="data/candidate_*.json", help="Glob of JSON files to import")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        imported = get_candidate_store().import_json_files(args.pattern)
+        print(f"Imported {imported} candidate records into {CANDIDATE_STORE_PATH}")
@@ -2,14 +2,47 @@
 # Contains constants and configuration values used throughout the application
 
 import os
-from dotenv import load_dotenv
+
+
+def _load_env_file():
+    """Load a .env file if there is one; python-dotenv is only imported when a file exists"""
+    for directory in (os.getcwd(), os.path.dirname(os.path.abspath(__file__))):
+        path = os.path.join(directory, ".env")
+        if os.path.exists(path):
+            from dotenv import load_dotenv
+            load_dotenv(path)
+            return
+
 
 # Load environment variables
-load_dotenv()
+_load_env_file()
 
 # Gemini API configuration
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 MODEL_NAME = "gemini-1.5-pro"  # Gemini model
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")  # "gemini"; "fake" for offline load tests; "record" or "replay" for fixtures
+LLM_FIXTURE_PATH = os.getenv("LLM_FIXTURE_PATH", "data/llm_fixture.json.gz")  # Exchanges captured in record mode
+GEMINI_TRANSPORT = os.getenv("GEMINI_TRANSPORT") or None  # "grpc" or "rest"; None uses the SDK default
+
+# Rate limiting (shared by every session using the same API key and model)
+RATE_LIMIT_REQUESTS_PER_MINUTE = int(os.getenv("RATE_LIMIT_REQUESTS_PER_MINUTE", "10"))
+RATE_LIMIT_TOKENS_PER_MINUTE = int(os.getenv("RATE_LIMIT_TOKENS_PER_MINUTE", "32000"))
+
+# Central LLM request scheduler
+LLM_SCHEDULER_WORKERS = int(os.getenv("LLM_SCHEDULER_WORKERS", "8"))  # Requests in flight per process
+LLM_SCHEDULER_MAX_QUEUE = int(os.getenv("LLM_SCHEDULER_MAX_QUEUE", "64"))  # Waiting requests before new ones are refused
+LLM_SCHEDULER_MAX_PER_SESSION = 2  # Waiting requests per session
+LLM_SCHEDULER_GREETING_SHARE = 0.5  # Share of the queue new conversations may fill, keeping room for candidates mid-screening
+
+# Retries and circuit breaking for failed API calls
+RETRY_MAX_ATTEMPTS = 4  # Attempts per request, including the first
+RETRY_BASE_DELAY_SECONDS = 1.0  # Backoff ceiling doubles from here on each attempt
+RETRY_MAX_DELAY_SECONDS = 30.0
+RETRY_BUDGET_RATIO = 0.2  # Retries allowed as a share of recent requests
+RETRY_BUDGET_MIN_RETRIES = 5  # Retries always allowed per window, so quiet periods can still retry
+RETRY_BUDGET_WINDOW_SECONDS = 10.0
+CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive retryable failures before the circuit opens
+CIRCUIT_RESET_SECONDS = 30.0  # Time the circuit stays open before a trial request
 
 # Application settings
 APP_TITLE = "TalentScout Hiring Assistant"
@@ -18,6 +51,56 @@ APP_DESCRIPTION = "AI-powered assistant for initial candidate screening"
 # Conversation settings
 MAX_TECHNICAL_QUESTIONS = 5
 MIN_TECHNICAL_QUESTIONS = 3
+QUESTION_BANK_PATH = os.getenv("QUESTION_BANK_PATH", "data/question_bank.json")
+
+# Speculative question prefetch, started as soon as a tech stack is extracted
+QUESTION_PREFETCH_ENABLED = os.getenv("QUESTION_PREFETCH_ENABLED", "1").lower() in ("1", "true", "yes")
+QUESTION_PREFETCH_WORKERS = 2  # Background threads preparing question sets
+QUESTION_PREFETCH_MIN_HEADROOM = 2  # Requests left in the rate limiter before prefetch calls are skipped
+QUESTION_PREFETCH_WAIT_SECONDS = 20.0  # How long the question turn waits for a running prefetch
+
+# Chat context compaction
+CONTEXT_WINDOW_TURNS = 6  # Recent user/model exchanges resent verbatim
+CONTEXT_SUMMARY_MAX_CHARS = 2000  # Budget for notes on older, folded turns
+CONTEXT_TURN_SNIPPET_CHARS = 200  # Characters kept from each folded message
+
+# Candidate storage
+CANDIDATE_STORE_BACKEND = os.getenv("CANDIDATE_STORE_BACKEND", "sqlite")
+CANDIDATE_STORE_PATH = os.getenv("CANDIDATE_STORE_PATH", "data/candidates.db")
+CANDIDATE_INDEX_PATH = os.getenv("CANDIDATE_INDEX_PATH", "data/candidate_index.npz")  # Columnar export for analytics
+
+# Write-behind persistence of candidate records
+PERSISTENCE_FLUSH_INTERVAL_SECONDS = 0.5  # Longest a queued write waits before it is flushed
+PERSISTENCE_BATCH_SIZE = 64  # Writes flushed together
+PERSISTENCE_MAX_PENDING = 10000  # Queued writes before callers block
+PERSISTENCE_FSYNC = os.getenv("PERSISTENCE_FSYNC", "batch")  # "always", "batch" or "never"
+
+# Shared state for cooldowns and the API quota ledger
+# "memory" keeps state in one process; multi-worker deployments set "sqlite", shared by every
+# worker opening the same file (at the cost of a write transaction per quota reservation)
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")
+STATE_BACKEND_PATH = os.getenv("STATE_BACKEND_PATH", "data/state.db")
+# Session checkpoints stay on durable local SQLite by default, whatever STATE_BACKEND the ledger uses,
+# so a restart or rolling deploy resumes in-flight screenings
+SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "sqlite")
+SESSION_TTL_SECONDS = 24 * 3600  # Checkpoints untouched for longer than this are purged
+MESSAGE_COOLDOWN_SECONDS = 5  # Minimum time between a candidate's messages
+
+# Response cache for deterministic prompts (system prompt, greeting)
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "data/response_cache.db")
+RESPONSE_CACHE_MEMORY_ENTRIES = 256
+RESPONSE_CACHE_TTL_SECONDS = 7 * 24 * 3600
+RESPONSE_CACHE_VARIANTS = 3  # Distinct responses kept per prompt for variety
+RESPONSE_CACHE_EVICT_INTERVAL_SECONDS = 3600  # How often put() purges expired rows from disk
+
+# Instrumentation (off by default; spans and counters are no-ops when disabled)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0").lower() in ("1", "true", "yes")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # Prometheus text endpoint; 0 disables it
+METRICS_LOG_PATH = os.getenv("METRICS_LOG_PATH") or None  # JSON-lines sink for individual spans
+
+# Microbenchmarks for the extraction and validation hot paths (benchmarks.py)
+BENCHMARK_BASELINE_PATH = os.getenv("BENCHMARK_BASELINE_PATH", "benchmarks_baseline.json")
+BENCHMARK_TOLERANCE = float(os.getenv("BENCHMARK_TOLERANCE", "0.5"))  # Allowed drop in ops/sec before a run fails (timings jitter by tens of percent)
 
 # Candidate information fields to collect
 CANDIDATE_INFO_FIELDS = [
@@ -30,8 +113,9 @@ CANDIDATE_INFO_FIELDS = [
     "Tech Stack"
 ]
 
-# Exit keywords
-EXIT_KEYWORDS = ["exit", "quit", "bye", "goodbye", "end"]
+# Exit keywords; a candidate message is an exit only when it is one of these on its own
+EXIT_KEYWORDS = ["exit", "quit", "bye", "goodbye"]
+EXIT_TARGETS = ["chat", "interview", "screening", "conversation"]  # "end the <target>" also exits
 
 # Error messages
 ERROR_API_KEY = "Gemini API key not found. Please set the GEMINI_API_KEY environment variable."
@@ -41,4 +125,6 @@ ERROR_GENERIC = "I'm having trouble processing your request. Please try again."
 UI_THEME_COLOR = "#0e76a8"  # LinkedIn blue
 UI_SECONDARY_COLOR = "#f5f5f5"
 UI_CHAT_USER_COLOR = "#E8F0FE"
-UI_CHAT_BOT_COLOR = "#FFFFFF"
\ No newline at end of file
+UI_CHAT_BOT_COLOR = "#FFFFFF"
+UI_STYLESHEET_PATH = "assets/style.css"
+UI_CHAT_WINDOW_MESSAGES = 12  # Messages rendered per page of the transcript; older pages load on request
\ No newline at end of file
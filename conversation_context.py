@@ -0,0 +1,133 @@
+# This file keeps the chat history sent to the model bounded
+# Recent turns are kept verbatim and older turns are folded into a compact summary
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import CONTEXT_SUMMARY_MAX_CHARS, CONTEXT_TURN_SNIPPET_CHARS, CONTEXT_WINDOW_TURNS
+
+# Labels used when listing collected candidate fields in the summary
+FIELD_LABELS = {
+    "full_name": "Full name",
+    "email": "Email",
+    "phone": "Phone",
+    "years_experience": "Years of experience",
+    "desired_positions": "Desired position(s)",
+    "current_location": "Current location",
+    "tech_stack": "Tech stack",
+}
+
+SUMMARY_HEADER = "Summary of the earlier part of this screening (older messages have been condensed):"
+SUMMARY_ACKNOWLEDGEMENT = "Understood. I will continue the screening from where we left off."
+
+
+class ConversationContext:
+    """Sliding window over the chat history with a running summary of older turns"""
+
+    def __init__(self, window_turns: int = CONTEXT_WINDOW_TURNS,
+                 summary_max_chars: int = CONTEXT_SUMMARY_MAX_CHARS,
+                 snippet_chars: int = CONTEXT_TURN_SNIPPET_CHARS):
+        """
+        Initialize an empty context
+
+        Args:
+            window_turns: Number of recent user/model exchanges kept verbatim
+            summary_max_chars: Maximum length of the folded-turn notes in the summary
+            snippet_chars: Maximum length kept from each folded message
+        """
+        self.window_turns = window_turns
+        self.summary_max_chars = summary_max_chars
+        self.snippet_chars = snippet_chars
+        self.candidate_fields: Dict[str, Any] = {}
+        self.folded_notes: List[str] = []
+        self.summary_in_history = False  # Whether history starts with our summary exchange
+
+    def reset(self) -> None:
+        """Forget the summary and candidate fields"""
+        self.candidate_fields = {}
+        self.folded_notes = []
+        self.summary_in_history = False
+
+    def to_checkpoint(self) -> Dict[str, Any]:
+        """Capture the summary state for a session checkpoint"""
+        return {
+            "candidate_fields": self.candidate_fields,
+            "folded_notes": self.folded_notes,
+            "summary_in_history": self.summary_in_history,
+        }
+
+    def restore_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        """Restore state captured by to_checkpoint"""
+        self.candidate_fields = dict(checkpoint["candidate_fields"])
+        self.folded_notes = list(checkpoint["folded_notes"])
+        self.summary_in_history = checkpoint["summary_in_history"]
+
+    def update_candidate_fields(self, fields: Dict[str, Any]) -> None:
+        """
+        Record the structured fields already captured for the candidate
+
+        Args:
+            fields: Candidate data as returned by CandidateInfo.to_dict
+        """
+        self.candidate_fields = {
+            field: fields[field] for field in FIELD_LABELS if fields.get(field) is not None
+        }
+
+    def _snippet(self, text: str) -> str:
+        """Shorten a message to a single line for the summary"""
+        text = " ".join(text.split())
+        if len(text) > self.snippet_chars:
+            text = text[:self.snippet_chars - 3].rstrip() + "..."
+        return text
+
+    def summary_text(self) -> str:
+        """
+        Build the summary message that replaces folded turns
+
+        Returns:
+            str: The summary text
+        """
+        lines = [SUMMARY_HEADER]
+        if self.candidate_fields:
+            lines.append("Candidate details already collected:")
+            for field, value in self.candidate_fields.items():
+                if isinstance(value, list):
+                    value = ", ".join(str(item) for item in value)
+                lines.append(f"- {FIELD_LABELS[field]}: {value}")
+        if self.folded_notes:
+            lines.append("Earlier messages:")
+            lines.extend(self.folded_notes)
+        return "\n".join(lines)
+
+    def compact(self, history: List[Tuple[str, str]]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Fold turns outside the window into the summary
+
+        Args:
+            history: The current chat history as (role, text) pairs
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: The compacted history in the SDK's content format,
+            or None if the history already fits the window
+        """
+        turns = history[2:] if self.summary_in_history else history
+        keep = self.window_turns * 2
+        if len(turns) <= keep:
+            return None
+
+        # Cut on a user message so the kept window starts with a complete exchange
+        cut = len(turns) - keep
+        if turns[cut][0] != "user":
+            cut += 1
+        for role, text in turns[:cut]:
+            speaker = "Candidate" if role == "user" else "Assistant"
+            self.folded_notes.append(f"- {speaker}: {self._snippet(text)}")
+
+        # Drop the oldest notes once the summary grows past its budget
+        while self.folded_notes and sum(len(note) + 1 for note in self.folded_notes) > self.summary_max_chars:
+            self.folded_notes.pop(0)
+
+        self.summary_in_history = True
+        return [
+            {"role": "user", "parts": [self.summary_text()]},
+            {"role": "model", "parts": [SUMMARY_ACKNOWLEDGEMENT]},
+        ] + [{"role": role, "parts": [text]} for role, text in turns[cut:]]
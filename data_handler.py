@@ -1,48 +1,265 @@
 # This file handles data processing and storage for candidate information
 # It manages the collection and organization of candidate details
 
+import hashlib
 import json
-import os
 import re
+import sys
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, Iterator, List, Any, Optional, TextIO, Tuple
+
+from candidate_store import get_candidate_store
+from extraction import CANDIDATE_PHONE_RE, extract_fields
+from metrics import get_metrics
+from persistence import get_file_queue, get_store_queue
+import utils
+
+# Fields collected from the candidate, in screening order
+REQUIRED_FIELDS = (
+    "full_name", "email", "phone", "years_experience",
+    "desired_positions", "current_location", "tech_stack"
+)
+
+MAX_YEARS_EXPERIENCE = 60
+
+def _require(value: Any, types: Tuple[type, ...], field: str) -> None:
+    """Reject a value of the wrong type instead of coercing it"""
+    if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+        raise TypeError(f"{field} must be {' or '.join(t.__name__ for t in types)}, got {type(value).__name__}")
+
+def _text(value: Any) -> Optional[str]:
+    """Normalize a free-text field: strip whitespace, join lists of strings, empty becomes None"""
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            _require(item, (str,), "text list item")
+        value = ", ".join(value)
+    _require(value, (str,), "text")
+    value = value.strip()
+    return value or None
+
+def _email(value: Any) -> Optional[str]:
+    value = _text(value)
+    if value is None:
+        return None
+    value = value.lower()
+    if not utils.is_valid_email(value):
+        raise ValueError(f"Invalid email address: {value}")
+    return value
+
+def _phone(value: Any) -> Optional[str]:
+    value = _text(value)
+    if value is None:
+        return None
+    if not CANDIDATE_PHONE_RE.fullmatch(value):
+        raise ValueError(f"Invalid phone number: {value}")
+    return value
+
+def _years(value: Any) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    _require(value, (int,), "years_experience")
+    years = value
+    if not 0 <= years <= MAX_YEARS_EXPERIENCE:
+        raise ValueError(f"Years of experience out of range: {years}")
+    return years
+
+def _tech_stack(value: Any) -> Optional[List[str]]:
+    if value is not None:
+        _require(value, (str, list, tuple), "tech_stack")
+        for item in value if isinstance(value, (list, tuple)) else ():
+            _require(item, (str,), "tech_stack item")
+    terms = utils.normalize_tech_terms(list(value) if isinstance(value, tuple) else value)
+    return terms or None
+
+def _responses(value: Any) -> List[Dict[str, str]]:
+    _require(value, (list, tuple), "technical_responses")
+    for item in value:
+        _require(item, (dict,), "technical response")
+    return list(value)
+
+def _timestamp(value: Any) -> str:
+    _require(value, (str,), "conversation_timestamp")
+    datetime.fromisoformat(value)  # Raises ValueError if it is not an ISO timestamp
+    return value
+
+def _flag(value: Any) -> bool:
+    _require(value, (bool,), "conversation_complete")
+    return value
+
+# Normalizer for each record field; they raise ValueError for values that fail validation
+_NORMALIZERS = {
+    "full_name": _text,
+    "email": _email,
+    "phone": _phone,
+    "years_experience": _years,
+    "desired_positions": _text,
+    "current_location": _text,
+    "tech_stack": _tech_stack,
+    "technical_responses": _responses,
+    "conversation_timestamp": _timestamp,
+    "conversation_complete": _flag,
+}
+
+class CandidateRecord:
+    """Typed, validated candidate data with a compact positional serialization
+
+    Fields are stored in __slots__ rather than a per-instance dict, and every
+    assignment (attribute or set()) is normalized and validated, so a record
+    never holds a malformed email, a tech stack in mixed shapes or a value of
+    the wrong type.
+    """
+    
+    FIELDS = REQUIRED_FIELDS + ("technical_responses", "conversation_timestamp", "conversation_complete")
+    __slots__ = FIELDS
+    
+    def __init__(self, **values: Any):
+        """
+        Create a record, validating any initial values
+        
+        Args:
+            **values: Initial field values
+        """
+        for field in REQUIRED_FIELDS:
+            self.set(field, None)
+        self.technical_responses: List[Dict[str, str]] = []
+        self.conversation_timestamp = datetime.now().isoformat()
+        self.conversation_complete = False
+        for field, value in values.items():
+            self.set(field, value)
+    
+    def set(self, field: str, value: Any) -> None:
+        """
+        Normalize, validate and assign a field
+        
+        Args:
+            field: The field name
+            value: The new value
+            
+        Raises:
+            KeyError: If the field does not exist
+            TypeError: If the value has the wrong type
+            ValueError: If the value fails validation
+        """
+        object.__setattr__(self, field, _NORMALIZERS[field](value))
+    
+    def __setattr__(self, field: str, value: Any) -> None:
+        """Validate attribute assignments the same way as set()"""
+        if field not in _NORMALIZERS:
+            raise AttributeError(f"{type(self).__name__} has no field {field!r}")
+        self.set(field, value)
+    
+    def get(self, field: str, default: Any = None) -> Any:
+        """Get a field value, or default for unknown fields"""
+        return getattr(self, field, default) if field in _NORMALIZERS else default
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Build a dictionary of all fields (lists are copied, so the dictionary is a snapshot)"""
+        values = {}
+        for field in self.FIELDS:
+            value = getattr(self, field)
+            values[field] = list(value) if isinstance(value, list) else value
+        return values
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CandidateRecord":
+        """Build a record from a dictionary, ignoring unknown keys"""
+        return cls(**{field: data[field] for field in cls.FIELDS if field in data})
+    
+    def to_tuple(self) -> Tuple[Any, ...]:
+        """Get the field values in FIELDS order"""
+        return tuple(getattr(self, field) for field in self.FIELDS)
+    
+    @classmethod
+    def from_tuple(cls, values: Iterable[Any]) -> "CandidateRecord":
+        """
+        Rebuild a record from to_tuple output without re-validating
+        
+        Only use this for data this class serialized itself.
+        """
+        record = cls.__new__(cls)
+        for field, value in zip(cls.FIELDS, values):
+            object.__setattr__(record, field, value)
+        return record
+    
+    def to_json_line(self) -> str:
+        """Serialize to a compact JSON array in FIELDS order, one line"""
+        return json.dumps(self.to_tuple(), ensure_ascii=False, separators=(',', ':'))
+    
+    @classmethod
+    def from_json_line(cls, line: str) -> "CandidateRecord":
+        """Deserialize a line written by to_json_line"""
+        return cls.from_tuple(json.loads(line))
+
+def write_records_jsonl(records: Iterable[CandidateRecord], output: TextIO) -> int:
+    """
+    Write records as JSON lines (one compact array per line, columns in CandidateRecord.FIELDS order)
+    
+    Args:
+        records: Records to write
+        output: Text file to write to
+        
+    Returns:
+        int: Number of records written
+    """
+    count = 0
+    for record in records:
+        output.write(record.to_json_line())
+        output.write("\n")
+        count += 1
+    return count
+
+def read_records_jsonl(source: TextIO) -> Iterator[CandidateRecord]:
+    """
+    Read records written by write_records_jsonl
+    
+    Args:
+        source: Text file to read from
+        
+    Returns:
+        Iterator[CandidateRecord]: The records
+    """
+    for line in source:
+        if line.strip():
+            yield CandidateRecord.from_json_line(line)
 
 class CandidateInfo:
     """Class to represent and manage candidate information"""
     
     def __init__(self):
         """Initialize with empty candidate information"""
-        self.data = {
-            "full_name": None,
-            "email": None,
-            "phone": None,
-            "years_experience": None,
-            "desired_positions": None,
-            "current_location": None,
-            "tech_stack": None,
-            "technical_responses": [],
-            "conversation_timestamp": datetime.now().isoformat(),
-            "conversation_complete": False
-        }
+        self.record = CandidateRecord()
         
-        # Create data directory if it doesn't exist
-        os.makedirs("data", exist_ok=True)
+        # Incremental extraction state: messages already scanned and their merged results
+        self._extraction_cursor = 0
+        self._extracted_info: Dict[str, Any] = {}
     
     def update_field(self, field: str, value: Any) -> bool:
         """
         Update a specific field in the candidate data
         
+        The value is normalized and validated; invalid values are rejected
+        and the previous value is kept.
+        
         Args:
             field: The field name to update
             value: The new value
             
         Returns:
-            bool: True if field was updated, False if field doesn't exist
+            bool: True if field was updated, False if field doesn't exist or the value is invalid
         """
-        if field in self.data:
-            self.data[field] = value
+        try:
+            self.record.set(field, value)
             return True
-        return False
+        except KeyError:
+            return False
+        except (TypeError, ValueError) as e:
+            # stderr, so batch runs writing JSONL to stdout keep their output clean
+            print(f"Rejected value for {field}: {e}", file=sys.stderr)
+            return False
     
     def get_field(self, field: str) -> Any:
         """
@@ -54,7 +271,7 @@ class CandidateInfo:
         Returns:
             Any: The field value, or None if field doesn't exist
         """
-        return self.data.get(field)
+        return self.record.get(field)
     
     def add_technical_response(self, question: str, answer: str) -> None:
         """
@@ -64,7 +281,7 @@ class CandidateInfo:
             question: The technical question asked
             answer: The candidate's response
         """
-        self.data["technical_responses"].append({
+        self.record.technical_responses.append({
             "question": question,
             "answer": answer,
             "timestamp": datetime.now().isoformat()
@@ -77,103 +294,117 @@ class CandidateInfo:
         Returns:
             bool: True if all required fields have values, False otherwise
         """
-        required_fields = [
-            "full_name", "email", "phone", "years_experience", 
-            "desired_positions", "current_location", "tech_stack"
-        ]
-        return all(self.data.get(field) is not None for field in required_fields)
+        return all(getattr(self.record, field) is not None for field in REQUIRED_FIELDS)
     
     def mark_complete(self) -> None:
         """Mark the conversation as complete"""
-        self.data["conversation_complete"] = True
+        self.record.conversation_complete = True
+    
+    def file_path(self) -> Optional[str]:
+        """
+        Get the JSON file this candidate is saved to
+        
+        The name is stable for a candidate (name plus a digest of the email), so
+        repeated saves replace one file instead of adding a new one each time.
+        
+        Returns:
+            Optional[str]: The path, or None without a candidate name
+        """
+        if not self.record.full_name:
+            return None
+        safe_name = re.sub(r'[^\w\s]', '', self.record.full_name)  # Remove special chars
+        safe_name = safe_name.replace(' ', '_').lower()
+        if self.record.email:
+            safe_name += "_" + hashlib.sha1(self.record.email.encode("utf-8")).hexdigest()[:8]
+        return f"data/candidate_{safe_name}.json"
     
-    def save_to_file(self) -> str:
+    def save_to_file(self, wait: bool = False) -> str:
         """
         Save candidate data to a JSON file
         
+        The write is queued for the background writer, which replaces the file atomically.
+        
+        Args:
+            wait: Block until the file has been written
+            
         Returns:
             str: Success message or error message
         """
-        if not self.data["full_name"]:
+        filename = self.file_path()
+        if not filename:
             return "Cannot save data: Missing candidate name"
+        
+        queue = get_file_queue()
+        sequence = queue.put(filename, self.record.to_dict())
+        if wait and not queue.flush(since=sequence):
+            return f"Error saving data to {filename}"
+        return f"Data queued for {filename}"
+    
+    def save_to_store(self, store=None, wait: bool = False) -> str:
+        """
+        Insert or update the candidate in the indexed candidate store
+        
+        The write is queued and stored in a batch by the store's background writer.
+        
+        Args:
+            store: Store to write to, defaults to the configured candidate store
+            wait: Block until the record has been stored
             
-        # Create a sanitized filename using the candidate's name and timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_name = re.sub(r'[^\w\s]', '', self.data['full_name'])  # Remove special chars
-        filename = f"data/candidate_{safe_name.replace(' ', '_').lower()}_{timestamp}.json"
+        Returns:
+            str: Success message or error message
+        """
+        if not self.record.email:
+            return "Cannot save data: Missing candidate email"
         
-        try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=2, ensure_ascii=False)
-            return f"Data saved to {filename}"
-        except Exception as e:
-            return f"Error saving data: {str(e)}"
+        if store is None:
+            store = get_candidate_store()
+        
+        queue = get_store_queue(store)
+        sequence = queue.put(self.record.email, self.record.to_dict())
+        if wait and not queue.flush(since=sequence):
+            return f"Error saving data for {self.record.email}"
+        return f"Data queued for {self.record.email}"
     
-    def extract_info_from_conversation(self, conversation_history: List[Dict[str, str]]) -> Dict[str, Any]:
+    def extract_info_from_conversation(self, conversation_history: List[Dict[str, str]],
+                                       full_rescan: bool = False) -> Dict[str, Any]:
         """
         Extract candidate information from conversation history
         
+        Only messages added since the previous call are scanned; their results are
+        merged into what was already extracted, with later matches winning.
+        
         Args:
             conversation_history: List of conversation messages
+            full_rescan: Discard previous results and scan the whole history again
             
         Returns:
             Dict[str, Any]: Extracted candidate information
         """
-        extracted_info = {}
+        # A shorter history means it was reset or replaced, so the cursor is stale
+        if full_rescan or len(conversation_history) < self._extraction_cursor:
+            self._extraction_cursor = 0
+            self._extracted_info = {}
         
-        for message in conversation_history:
-            if message.get("role") != "user" or not message.get("content"):
-                continue
-                
-            content = message["content"].lower()
-            
-            # Name extraction
-            name_match = re.search(r'my name is\s+([a-zA-Z\s]+)', content)
-            if name_match:
-                # Properly capitalize names
-                name_parts = name_match.group(1).strip().split()
-                extracted_info["full_name"] = ' '.join(part.capitalize() for part in name_parts)
-            
-            # Email extraction
-            email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', content)
-            if email_match:
-                extracted_info["email"] = email_match.group(0)
-            
-            # Phone extraction
-            phone_match = re.search(r'(\+\d{1,3}|\d{1,3})[\s.-]?\d{3}[\s.-]?\d{3,4}[\s.-]?\d{3,4}', content)
-            if phone_match:
-                extracted_info["phone"] = phone_match.group(0)
-            
-            # Years of experience extraction
-            exp_match = re.search(r'(\d+)\s+years?\s+(of\s+)?experience', content)
-            if exp_match:
-                extracted_info["years_experience"] = int(exp_match.group(1))
-            
-            # Location extraction
-            location_match = re.search(r'(live|based|located)\s+in\s+([a-zA-Z\s,]+)', content)
-            if location_match:
-                extracted_info["current_location"] = location_match.group(2).strip().title()
-            
-            # Tech stack extraction - look for common patterns
-            tech_patterns = [
-                r'work with\s+([a-zA-Z0-9\s,\.+#]+)',
-                r'experience (?:with|in)\s+([a-zA-Z0-9\s,\.+#]+)',
-                r'tech stack\s*(?:includes|is|:)?\s*([a-zA-Z0-9\s,\.+#]+)'
-            ]
+        with get_metrics().span("extraction"):
+            for message in conversation_history[self._extraction_cursor:]:
+                if message.get("role") != "user" or not message.get("content"):
+                    continue
+                self._extracted_info.update(self._extract_info_from_message(message["content"]))
+        
+        self._extraction_cursor = len(conversation_history)
+        return dict(self._extracted_info)
+    
+    def _extract_info_from_message(self, content: str) -> Dict[str, Any]:
+        """
+        Extract candidate information from a single user message
+        
+        Args:
+            content: The message text
             
-            for pattern in tech_patterns:
-                tech_match = re.search(pattern, content)
-                if tech_match:
-                    tech_stack = tech_match.group(1).strip()
-                    # Convert to list if comma-separated
-                    if ',' in tech_stack:
-                        tech_list = [tech.strip() for tech in tech_stack.split(',')]
-                        extracted_info["tech_stack"] = tech_list
-                    else:
-                        extracted_info["tech_stack"] = tech_stack
-                    break
-        
-        return extracted_info
+        Returns:
+            Dict[str, Any]: Fields found in the message
+        """
+        return extract_fields(content)
     
     def update_from_conversation(self, conversation_history: List[Dict[str, str]]) -> Dict[str, Any]:
         """
@@ -201,11 +432,36 @@ class CandidateInfo:
         Returns:
             List[str]: List of missing field names
         """
-        required_fields = [
-            "full_name", "email", "phone", "years_experience", 
-            "desired_positions", "current_location", "tech_stack"
-        ]
-        return [field for field in required_fields if self.data.get(field) is None]
+        return [field for field in REQUIRED_FIELDS if getattr(self.record, field) is None]
+    
+    def to_checkpoint(self) -> Dict[str, Any]:
+        """
+        Capture the candidate data and extraction progress for a session checkpoint
+        
+        Returns:
+            Dict[str, Any]: JSON-serializable state
+        """
+        return {
+            "data": self.record.to_dict(),
+            "extraction_cursor": self._extraction_cursor,
+            "extracted_info": dict(self._extracted_info),  # A copy, so later extraction cannot change it
+        }
+    
+    def restore_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        """
+        Restore state captured by to_checkpoint
+        
+        Args:
+            checkpoint: The saved state
+        """
+        self.record = CandidateRecord.from_dict(checkpoint["data"])
+        self._extraction_cursor = checkpoint["extraction_cursor"]
+        self._extracted_info = dict(checkpoint["extracted_info"])
+    
+    @property
+    def data(self) -> Dict[str, Any]:
+        """Candidate data as a dictionary (a snapshot; use update_field to change values)"""
+        return self.record.to_dict()
     
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -214,4 +470,4 @@ class CandidateInfo:
         Returns:
             Dict[str, Any]: Dictionary representation of candidate data
         """
-        return self.data.copy()
\ No newline at end of file
+        return self.record.to_dict()
\ No newline at end of file
@@ -0,0 +1,156 @@
+# This file contains the shared extraction engine for candidate fields
+# All field patterns are precompiled and every message is walked by a single combined scanner
+
+import re
+from typing import Any, Dict, NamedTuple, Tuple
+
+# Field patterns, shared by extraction and validation. Whitespace runs are never matched by two
+# adjacent quantifiers, so a long run of spaces cannot make a pattern backtrack quadratically.
+EMAIL_PATTERN = r'[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}'
+PHONE_PATTERN = r'(?:\+\d{1,3}[-.\s]?)?(?:\d{3}[-.\s]?)?\d{3}[-.\s]?\d{4}'
+# Loose years pattern for the utils helpers; it does not need an "experience" context
+YEARS_PATTERN = r'(?<!\d)(?P<years_value>\d{1,2})\s*(?:\+\s*)?(?:years?|yrs?)\b'
+TECH_VALUE_PATTERN = r'[a-z0-9][a-z0-9\s,.+#]*'
+
+EMAIL_RE = re.compile(EMAIL_PATTERN)
+PHONE_RE = re.compile(PHONE_PATTERN)
+# Search versions for the utils helpers; the leading lookahead rejects positions where no number starts cheaply
+PHONE_SEARCH_RE = re.compile(r'(?=[+\d])' + PHONE_PATTERN)
+YEARS_RE = re.compile(r'(?=\d)' + YEARS_PATTERN + r'(?!\s+old)', re.IGNORECASE)
+
+# The combined scanner runs once over the lowercased message and stops only where a
+# field could start. Those positions are confirmed with the anchored patterns below.
+_TRIGGER_RE = re.compile(r'[+\d]|@|my name is|live|based|located|work with|experience|tech stack')
+
+# Candidate fields are stricter than the utils helpers: years count only with an "experience"
+# context ("10 years ago" is not experience), and phone numbers may start with a short prefix
+CANDIDATE_PHONE_PATTERN = r'(?:\+\d{1,3}|\d{1,3})[\s.-]?\d{3}[\s.-]?\d{3,4}[\s.-]?\d{3,4}'
+_PHONE_AT_RE = re.compile(CANDIDATE_PHONE_PATTERN)
+# Phone numbers a candidate record accepts: anything the scanner extracts or PHONE_PATTERN validates
+CANDIDATE_PHONE_RE = re.compile(rf'{CANDIDATE_PHONE_PATTERN}|{PHONE_PATTERN}')
+_YEARS_AT_RE = re.compile(r'(?<!\d)(?P<years_value>\d{1,2})\s+years?\s+(?:of\s+)?experience')
+
+# Cue phrase -> (field, tech stack priority, anchored pattern). Free-text values run
+# to the end of the phrase, but the scanner only consumes the cue itself, so cues
+# that appear inside a value are still found.
+_CUES = {
+    "my name is": ("full_name", None, re.compile(r'\bmy name is\s+(?P<value>[a-z][a-z\s]*)')),
+    "live": ("current_location", None, re.compile(r'\blive\s+in\s+(?P<value>[a-z][a-z\s,]*)')),
+    "based": ("current_location", None, re.compile(r'\bbased\s+in\s+(?P<value>[a-z][a-z\s,]*)')),
+    "located": ("current_location", None, re.compile(r'\blocated\s+in\s+(?P<value>[a-z][a-z\s,]*)')),
+    # When several tech stack cues appear in one message, the lowest priority number wins
+    "work with": ("tech_stack", 0, re.compile(r'\bwork with\s+(?P<value>' + TECH_VALUE_PATTERN + r')')),
+    "experience": ("tech_stack", 1, re.compile(r'\bexperience\s+(?:with|in)\s+(?P<value>' + TECH_VALUE_PATTERN + r')')),
+    "tech stack": ("tech_stack", 2, re.compile(r'\btech stack\s*(?:(?:includes|is|:)\s*)?(?P<value>' + TECH_VALUE_PATTERN + r')')),
+}
+
+# Characters allowed in the local part of an email, used to walk back from the "@"
+_EMAIL_LOCAL_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789._%+-")
+_EMAIL_LOCAL_MAX = 64
+
+
+class FieldMatch(NamedTuple):
+    """A field value found in a message, with its position in the text"""
+    field: str
+    text: str
+    span: Tuple[int, int]
+
+
+def scan(text: str) -> Dict[str, FieldMatch]:
+    """
+    Find every candidate field in a message with a single pass of the combined scanner
+
+    For each field the first occurrence in the text is kept. Tech stack cues are
+    ranked by cue type rather than position.
+
+    Args:
+        text: The message text
+
+    Returns:
+        Dict[str, FieldMatch]: Matches keyed by field name
+    """
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # Lowercasing changed the length, so spans would not line up with the original
+        text = lowered
+
+    found: Dict[str, FieldMatch] = {}
+    tech_priority = len(_CUES)
+
+    for trigger in _TRIGGER_RE.finditer(lowered):
+        pos = trigger.start()
+        cue = trigger.group(0)
+
+        if cue == "@":
+            if "email" in found:
+                continue
+            start = pos
+            while start > 0 and pos - start < _EMAIL_LOCAL_MAX and lowered[start - 1] in _EMAIL_LOCAL_CHARS:
+                start -= 1
+            if start > 0 and lowered[start - 1].isalnum():
+                continue
+            match = EMAIL_RE.match(text, start)
+            if match:
+                found["email"] = FieldMatch("email", match.group(0), match.span())
+
+        elif cue in _CUES:
+            field, priority, pattern = _CUES[cue]
+            if field in found and (priority is None or priority >= tech_priority):
+                continue
+            match = pattern.match(lowered, pos)
+            if match:
+                start, end = match.span("value")
+                found[field] = FieldMatch(field, text[start:end], (start, end))
+                if priority is not None:
+                    tech_priority = priority
+
+        else:
+            # Digits and "+" can start either a phone number or a years-of-experience figure;
+            # each is the leftmost match of its own pattern, as if searched separately
+            if "phone" not in found:
+                match = _PHONE_AT_RE.match(lowered, pos)
+                if match:
+                    found["phone"] = FieldMatch("phone", text[pos:match.end()], match.span())
+            if "years_experience" not in found:
+                match = _YEARS_AT_RE.match(lowered, pos)
+                if match:
+                    start, end = match.span("years_value")
+                    found["years_experience"] = FieldMatch("years_experience", text[start:end], (start, end))
+
+    return found
+
+
+def extract_fields(text: str) -> Dict[str, Any]:
+    """
+    Extract candidate fields from a message, normalized the way CandidateInfo stores them
+
+    Args:
+        text: The message text
+
+    Returns:
+        Dict[str, Any]: Normalized field values keyed by field name
+    """
+    extracted_info = {}
+
+    for field, match in scan(text).items():
+        value = match.text
+        if field == "full_name":
+            # Properly capitalize names
+            extracted_info[field] = ' '.join(part.capitalize() for part in value.split())
+        elif field == "email":
+            extracted_info[field] = value.lower()
+        elif field == "years_experience":
+            extracted_info[field] = int(value)
+        elif field == "current_location":
+            extracted_info[field] = value.strip().title()
+        elif field == "tech_stack":
+            tech_stack = value.strip().lower()
+            # Convert to list if comma-separated
+            if ',' in tech_stack:
+                extracted_info[field] = [tech.strip() for tech in tech_stack.split(',')]
+            else:
+                extracted_info[field] = tech_stack
+        else:
+            extracted_info[field] = value
+
+    return extracted_info
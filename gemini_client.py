@@ -0,0 +1,94 @@
+# This file holds the process-wide Gemini client shared by every session
+# The SDK is configured once and model handles are pooled, so sessions only own chat state
+
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from boot import timed_import
+from config import GEMINI_API_KEY, GEMINI_TRANSPORT, MODEL_NAME
+from llm_backends import LLMBackend
+
+
+class SharedGeminiClient(LLMBackend):
+    """Configures the SDK once per process and hands out shared model handles
+
+    genai.configure rebuilds the SDK's transport clients, so calling it per session
+    throws away the open gRPC/HTTP connections. Configuring once keeps a single
+    transport (which multiplexes concurrent requests) alive for every session.
+    Model handles hold no conversation state and are shared the same way.
+
+    The SDK and its gRPC/protobuf stack take seconds to import, so they are
+    loaded on the first model request (or by warm_up), not when a worker starts.
+    """
+
+    def __init__(self, api_key: Optional[str] = GEMINI_API_KEY, transport: Optional[str] = GEMINI_TRANSPORT):
+        """
+        Args:
+            api_key: Gemini API key
+            transport: SDK transport ("grpc", "rest"), or None for the SDK default
+        """
+        self._api_key = api_key
+        self._transport = transport
+        self._lock = threading.Lock()
+        self._genai = None
+        self._models: Dict[Tuple[str, Optional[str]], Any] = {}
+
+    def _sdk(self):
+        """Import and configure the SDK on first use and open the transport (lock must be held)"""
+        if self._genai is None:
+            with timed_import("google.generativeai"):
+                import google.generativeai as genai
+                from google.generativeai import client as genai_client
+            genai.configure(api_key=self._api_key, transport=self._transport)
+            # Create the transport client now so the first candidate request does not pay for it
+            try:
+                genai_client.get_default_generative_client()
+            except Exception as e:
+                print(f"Could not open the Gemini transport yet, it will be retried on first use: {e}")
+            self._genai = genai
+        return self._genai
+
+    def warm_up(self) -> None:
+        with self._lock:
+            self._sdk()
+
+    name = "gemini"
+
+    @property
+    def quota_key(self) -> str:
+        return self._api_key or ""
+
+    def get_model(self, system_instruction: Optional[str] = None, model_name: str = MODEL_NAME):
+        """
+        Get the shared model handle for a model and system instruction
+
+        Args:
+            system_instruction: System instruction for the model, if any
+            model_name: Name of the Gemini model
+
+        Returns:
+            genai.GenerativeModel: The pooled model handle
+        """
+        key = (model_name, system_instruction)
+        with self._lock:
+            if key not in self._models:
+                self._models[key] = self._sdk().GenerativeModel(model_name, system_instruction=system_instruction)
+            return self._models[key]
+
+
+_client: Optional[SharedGeminiClient] = None
+_client_lock = threading.Lock()
+
+
+def get_shared_client() -> SharedGeminiClient:
+    """
+    Get the process-wide Gemini client, creating it on first use
+
+    Returns:
+        SharedGeminiClient: The shared client
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SharedGeminiClient()
+        return _client
@@ -0,0 +1,311 @@
+# This file defines the model backends LLMService can run against
+# The Gemini backend is used in production; the fake backend runs fully offline for load tests
+
+import math
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from config import LLM_BACKEND
+
+
+class LLMBackend:
+    """Interface for a model provider behind LLMService
+
+    Backends hand out model handles that follow the google.generativeai surface
+    LLMService relies on: start_chat(history) returning a chat with send_message,
+    history and rewind, and generate_content for one-shot prompts.
+    """
+
+    name = "base"
+    rate_limited = True  # False for backends that never reach the real API, so no quota applies
+
+    @property
+    def quota_key(self) -> str:
+        """Identifier for the quota the backend's requests are billed to"""
+        return self.name
+
+    def get_model(self, system_instruction: Optional[str] = None):
+        """
+        Get a model handle
+
+        Args:
+            system_instruction: System instruction for the model, if any
+
+        Returns:
+            A model handle with start_chat and generate_content
+        """
+        raise NotImplementedError
+
+    def warm_up(self) -> None:
+        """Load anything the first request would otherwise wait for (called off the request path)"""
+
+
+class FakeQuotaError(Exception):
+    """Quota error raised by the fake backend, shaped like the API's 429 response"""
+
+    code = 429
+
+    def __init__(self, retry_after: Optional[float] = None):
+        self.retry_after = retry_after
+        message = "429 Resource has been exhausted (e.g. check quota)."
+        if retry_after is not None:
+            message += f" Please retry in {retry_after:.1f}s."
+        super().__init__(message)
+
+
+def make_latency_sampler(spec: str) -> Callable[[], float]:
+    """
+    Build a latency sampler from a spec string
+
+    Supported specs: "constant:SECONDS", "uniform:LOW,HIGH" and
+    "lognormal:MEDIAN,SIGMA" (a long-tailed distribution like real API latency).
+
+    Args:
+        spec: The distribution spec
+
+    Returns:
+        Callable[[], float]: Function returning one latency sample in seconds
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",") if value]
+    if kind == "constant":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "lognormal":
+        mu = math.log(values[0])
+        return lambda: random.lognormvariate(mu, values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class FakePart:
+    """Text part of a fake message"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeContent:
+    """Message in a fake chat history, shaped like the SDK's Content"""
+
+    def __init__(self, role: str, text: str):
+        self.role = role
+        self.parts = [FakePart(text)]
+
+
+def _to_fake_content(content) -> FakeContent:
+    """Convert an SDK-style dict ({"role", "parts"}) or FakeContent to FakeContent"""
+    if isinstance(content, FakeContent):
+        return content
+    parts = content.get("parts", [])
+    text = "".join(part if isinstance(part, str) else part.get("text", "") for part in parts)
+    return FakeContent(content.get("role", "user"), text)
+
+
+class FakeResponse:
+    """Response from the fake backend, iterable in chunks when streamed"""
+
+    def __init__(self, text: str, chunks: Optional[List[str]] = None, chunk_delays: Optional[List[float]] = None,
+                 on_complete: Optional[Callable[[], None]] = None):
+        self.text = text
+        self._chunks = chunks or [text]
+        self._chunk_delays = chunk_delays or [0.0] * len(self._chunks)
+        self._on_complete = on_complete
+        self._consumed = chunks is None
+
+    def __iter__(self) -> Iterator["FakeResponse"]:
+        for chunk, delay in zip(self._chunks, self._chunk_delays):
+            if self._consumed:
+                break
+            if delay:
+                time.sleep(delay)
+            yield FakeResponse(chunk)
+        self.resolve()
+
+    def resolve(self) -> None:
+        """Finish the stream, recording the exchange in the chat history"""
+        self._consumed = True
+        if self._on_complete:
+            on_complete, self._on_complete = self._on_complete, None
+            on_complete()
+
+
+class FakeChat:
+    """In-process stand-in for the SDK's ChatSession"""
+
+    def __init__(self, model: "FakeModel", history=None):
+        self.model = model
+        self._history = [_to_fake_content(content) for content in history or []]
+
+    @property
+    def history(self) -> List[FakeContent]:
+        return self._history
+
+    @history.setter
+    def history(self, history) -> None:
+        self._history = [_to_fake_content(content) for content in history]
+
+    def rewind(self):
+        """Remove the last exchange from the history"""
+        sent, received = self._history[-2], self._history[-1]
+        self._history = self._history[:-2]
+        return sent, received
+
+    def send_message(self, content: str, stream: bool = False) -> FakeResponse:
+        text = self.model.backend.complete(content, self._history, self.model.system_instruction)
+
+        def record():
+            self._history.extend([FakeContent("user", content), FakeContent("model", text)])
+
+        return self.model.backend.respond(text, stream, record)
+
+
+class FakeModel:
+    """In-process stand-in for the SDK's GenerativeModel"""
+
+    def __init__(self, backend: "FakeBackend", system_instruction: Optional[str] = None):
+        self.backend = backend
+        self.system_instruction = system_instruction
+
+    def start_chat(self, history=None) -> FakeChat:
+        return FakeChat(self, history)
+
+    def generate_content(self, content: str, stream: bool = False) -> FakeResponse:
+        text = self.backend.complete(content, [], self.system_instruction)
+        return self.backend.respond(text, stream)
+
+
+# Replies the fake model walks through, keyed by how many candidate turns came before
+FAKE_SCREENING_REPLIES = [
+    "Hello! I'm TalentScout Assistant. I'll ask a few questions for the recruitment process. What's your full name?",
+    "Nice to meet you! What's your email address?",
+    "Thanks. What's the best phone number to reach you?",
+    "How many years of professional experience do you have?",
+    "Which position or positions are you interested in?",
+    "Where are you currently located?",
+    "Great. Could you tell me about your tech stack: the programming languages, frameworks and tools you use?",
+    "Thanks for your answer. Is there anything else you would like to add?",
+]
+FAKE_CLOSING_REPLY = ("Thank you for your time! Your details have been recorded and a TalentScout recruiter "
+                      "will be in touch soon. Good luck with your job search!")
+
+
+class FakeBackend(LLMBackend):
+    """Offline backend with configurable latency, 429 injection and streaming"""
+
+    name = "fake"
+
+    def __init__(self, latency: str = "lognormal:0.8,0.4", error_rate: float = 0.0,
+                 retry_after: Optional[float] = None, chunk_words: int = 3, first_chunk_fraction: float = 0.3):
+        """
+        Configure the fake model
+
+        Args:
+            latency: Latency distribution spec for a full response (see make_latency_sampler)
+            error_rate: Probability that a request fails with a 429 quota error
+            retry_after: Retry hint attached to injected 429 errors, in seconds
+            chunk_words: Words per streamed chunk
+            first_chunk_fraction: Share of the latency spent before the first streamed chunk
+        """
+        self.sample_latency = make_latency_sampler(latency)
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.chunk_words = chunk_words
+        self.first_chunk_fraction = first_chunk_fraction
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors_injected = 0
+
+    def get_model(self, system_instruction: Optional[str] = None) -> FakeModel:
+        return FakeModel(self, system_instruction)
+
+    def _reply_for(self, content: str, history: List[FakeContent]) -> str:
+        """Pick a canned reply that follows the screening flow"""
+        if "difficulty: question" in content:
+            # Question bank generation prompt
+            tech = content.split("proficiency in ", 1)[-1].split(".", 1)[0]
+            return "\n".join(f"{level}: Fake {level} question {i} about {tech}?"
+                             for level in ("basic", "intermediate", "advanced") for i in range(1, 4))
+        if "coming to an end" in content:
+            return FAKE_CLOSING_REPLY
+        turns = sum(1 for message in history if message.role == "user")
+        return FAKE_SCREENING_REPLIES[min(turns, len(FAKE_SCREENING_REPLIES) - 1)]
+
+    def complete(self, content: str, history: List[FakeContent], system_instruction: Optional[str] = None) -> str:
+        """
+        Produce the full reply text, failing with a 429 at the configured rate
+
+        Args:
+            content: The prompt or candidate message
+            history: The chat history before this message
+            system_instruction: The model's system instruction, if any
+
+        Returns:
+            str: The reply text
+        """
+        with self._lock:
+            self.requests += 1
+            inject_error = random.random() < self.error_rate
+            if inject_error:
+                self.errors_injected += 1
+        if inject_error:
+            time.sleep(self.sample_latency() * 0.1)  # Quota errors come back quickly
+            raise FakeQuotaError(self.retry_after)
+        return self._reply_for(content, history)
+
+    def respond(self, text: str, stream: bool, on_complete: Optional[Callable[[], None]] = None) -> FakeResponse:
+        """
+        Wrap a reply as a response, spending the sampled latency up front or spread over streamed chunks
+
+        Args:
+            text: The reply text
+            stream: Whether to stream the reply in chunks
+            on_complete: Called once the response has been fully delivered
+
+        Returns:
+            FakeResponse: The response
+        """
+        if not stream:
+            time.sleep(self.sample_latency())
+            if on_complete:
+                on_complete()
+            return FakeResponse(text)
+
+        words = text.split(" ")
+        chunks = [" ".join(words[i:i + self.chunk_words]) + " " for i in range(0, len(words), self.chunk_words)]
+        chunks[-1] = chunks[-1].rstrip()
+        latency = self.sample_latency()
+        first = latency * self.first_chunk_fraction
+        rest = (latency - first) / max(1, len(chunks) - 1)
+        delays = [first] + [rest] * (len(chunks) - 1)
+        return FakeResponse(text, chunks, delays, on_complete)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get request and injected error counts"""
+        with self._lock:
+            return {"requests": self.requests, "errors_injected": self.errors_injected}
+
+
+def get_backend(name: str = LLM_BACKEND) -> LLMBackend:
+    """
+    Get the backend configured for this process
+
+    Args:
+        name: Backend name: "gemini", "fake", or "record"/"replay" (see llm_replay)
+
+    Returns:
+        LLMBackend: The backend
+    """
+    if name == "gemini":
+        # Imported here so the fake backend works without the Gemini SDK installed
+        from gemini_client import get_shared_client
+        return get_shared_client()
+    if name == "fake":
+        return FakeBackend()
+    if name in ("record", "replay"):
+        # llm_replay builds on this module, so it is imported on demand
+        from llm_replay import get_recording_backend, get_replay_backend
+        return get_recording_backend() if name == "record" else get_replay_backend()
+    raise ValueError(f"Unknown LLM backend: {name}")
@@ -0,0 +1,432 @@
+# This file records model exchanges to a fixture and replays them offline
+# Replayed screenings skip the network and the rate limiter, so transcript regressions run in seconds
+
+import argparse
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import LLM_FIXTURE_PATH, MODEL_NAME
+from llm_backends import FakeBackend, LLMBackend, get_backend
+
+# Bumped whenever the fixture layout or the key derivation changes
+FIXTURE_VERSION = 1
+
+# Candidate fields compared by the regression runner (timestamps differ on every run)
+COMPARED_FIELDS = (
+    "full_name", "email", "phone", "years_experience",
+    "desired_positions", "current_location", "tech_stack", "conversation_complete",
+)
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace, so chunking and trailing newlines do not change a key"""
+    return " ".join((text or "").split())
+
+
+def _content_pair(content) -> Tuple[str, str]:
+    """Get (role, text) from an SDK Content, a fake content or an SDK-style dict"""
+    if isinstance(content, dict):
+        parts = content.get("parts", [])
+        return content.get("role", "user"), "".join(
+            part if isinstance(part, str) else part.get("text", "") for part in parts
+        )
+    return content.role, "".join(getattr(part, "text", "") for part in content.parts)
+
+
+def exchange_key(system_instruction: Optional[str], history, content: str) -> str:
+    """
+    Key a request by everything the model sees
+
+    Args:
+        system_instruction: The model's system instruction, if any
+        history: Chat history before the message (empty for one-shot prompts)
+        content: The message or prompt
+
+    Returns:
+        str: Hex digest of the normalized request
+    """
+    pairs = [[role, normalize_text(text)] for role, text in (_content_pair(item) for item in history)]
+    payload = json.dumps([normalize_text(system_instruction or ""), pairs, normalize_text(content)],
+                         ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class ReplayFixture:
+    """Recorded responses keyed by exchange_key, plus the conversations they came from
+
+    Stored as gzip-compressed JSON.
+    """
+
+    def __init__(self, path: Optional[str] = LLM_FIXTURE_PATH):
+        """
+        Load the fixture if the file exists
+
+        Args:
+            path: Fixture file, or None to keep it in memory only
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.responses: Dict[str, str] = {}
+        self.conversations: List[Dict[str, Any]] = []
+        if path and os.path.exists(path):
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != FIXTURE_VERSION:
+                raise ValueError(f"Unsupported fixture version: {data.get('version')}")
+            self.responses = data["responses"]
+            self.conversations = data.get("conversations", [])
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self.responses.get(key)
+
+    def put(self, key: str, text: str) -> None:
+        with self._lock:
+            self.responses[key] = text
+
+    def save(self) -> None:
+        """Write the fixture, replacing the previous file atomically"""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = {
+                "version": FIXTURE_VERSION,
+                "model": MODEL_NAME,
+                "responses": dict(sorted(self.responses.items())),
+                "conversations": self.conversations,
+            }
+            temp_path = f"{self.path}.tmp"
+            with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_path, self.path)
+
+
+class ReplayMissError(LookupError):
+    """Raised in replay mode for a request the fixture has no response for"""
+
+
+class _RecordedResponse:
+    """Wraps a streamed response and records its full text once it has been delivered"""
+
+    def __init__(self, response, on_text: Callable[[str], None]):
+        self._response = response
+        self._on_text = on_text
+        self._chunks: List[str] = []
+        self._recorded = False
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def __iter__(self):
+        for chunk in self._response:
+            self._chunks.append(chunk.text or "")
+            yield chunk
+        self._record()
+
+    def resolve(self) -> None:
+        self._response.resolve()
+        self._record()
+
+    def _record(self) -> None:
+        if not self._recorded:
+            self._recorded = True
+            self._on_text("".join(self._chunks) or self._response.text)
+
+
+class _RecordingChat:
+    """Chat session proxy that records each exchange"""
+
+    def __init__(self, model: "_RecordingModel", chat):
+        self._model = model
+        self._chat = chat
+
+    def __getattr__(self, name):
+        return getattr(self._chat, name)
+
+    @property
+    def history(self):
+        return self._chat.history
+
+    @history.setter
+    def history(self, history) -> None:
+        self._chat.history = history
+
+    def send_message(self, content: str, stream: bool = False):
+        key = exchange_key(self._model.system_instruction, self._chat.history, content)
+        return self._model.backend.capture(key, self._chat.send_message(content, stream=stream), stream)
+
+
+class _RecordingModel:
+    """Model handle proxy that records chats and one-shot prompts"""
+
+    def __init__(self, backend: "RecordingBackend", model, system_instruction: Optional[str]):
+        self.backend = backend
+        self._model = model
+        self.system_instruction = system_instruction
+
+    def start_chat(self, history=None) -> _RecordingChat:
+        return _RecordingChat(self, self._model.start_chat(history=history or []))
+
+    def generate_content(self, content: str, stream: bool = False):
+        key = exchange_key(self.system_instruction, [], content)
+        return self.backend.capture(key, self._model.generate_content(content, stream=stream), stream)
+
+
+class RecordingBackend(LLMBackend):
+    """Passes requests to another backend and records every response in a fixture"""
+
+    def __init__(self, inner: LLMBackend, fixture: ReplayFixture):
+        """
+        Args:
+            inner: The backend that really answers (normally Gemini)
+            fixture: Where the exchanges are recorded
+        """
+        self.inner = inner
+        self.fixture = fixture
+        self.name = inner.name  # Same response cache namespace and quota as the wrapped backend
+        self.rate_limited = inner.rate_limited
+        self.recorded = 0
+
+    @property
+    def quota_key(self) -> str:
+        return self.inner.quota_key
+
+    def warm_up(self) -> None:
+        self.inner.warm_up()
+
+    def get_model(self, system_instruction: Optional[str] = None) -> _RecordingModel:
+        return _RecordingModel(self, self.inner.get_model(system_instruction=system_instruction), system_instruction)
+
+    def capture(self, key: str, response, stream: bool):
+        """Record a response's text, after the stream completes for streamed responses"""
+        def record(text: str) -> None:
+            self.fixture.put(key, text)
+            self.recorded += 1
+
+        if stream:
+            return _RecordedResponse(response, record)
+        record(response.text)
+        return response
+
+
+class ReplayBackend(FakeBackend):
+    """Serves recorded responses instantly; a request missing from the fixture fails with ReplayMissError
+
+    Replay never reaches the API, so LLMService skips the rate limiter for it.
+    """
+
+    name = "replay"
+    rate_limited = False
+
+    def __init__(self, fixture: ReplayFixture):
+        """
+        Args:
+            fixture: The recorded responses
+        """
+        super().__init__(latency="constant:0")
+        self.fixture = fixture
+        self.hits = 0
+        self.misses = 0
+
+    def complete(self, content: str, history, system_instruction: Optional[str] = None) -> str:
+        text = self.fixture.get(exchange_key(system_instruction, history, content))
+        with self._lock:
+            self.requests += 1
+            if text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if text is None:
+            raise ReplayMissError("No recorded response for this request; re-record the fixture")
+        return text
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"requests": self.requests, "hits": self.hits, "misses": self.misses}
+
+
+_recording_backend: Optional[RecordingBackend] = None
+_replay_backend: Optional[ReplayBackend] = None
+_backends_lock = threading.Lock()
+
+
+def get_recording_backend() -> RecordingBackend:
+    """
+    Get the process-wide recording backend (Gemini, recorded to LLM_FIXTURE_PATH on exit)
+
+    Returns:
+        RecordingBackend: The shared backend
+    """
+    global _recording_backend
+    with _backends_lock:
+        if _recording_backend is None:
+            _recording_backend = RecordingBackend(get_backend("gemini"), ReplayFixture(LLM_FIXTURE_PATH))
+            atexit.register(_recording_backend.fixture.save)
+        return _recording_backend
+
+
+def get_replay_backend() -> ReplayBackend:
+    """
+    Get the process-wide replay backend serving LLM_FIXTURE_PATH
+
+    Returns:
+        ReplayBackend: The shared backend
+    """
+    global _replay_backend
+    with _backends_lock:
+        if _replay_backend is None:
+            _replay_backend = ReplayBackend(ReplayFixture(LLM_FIXTURE_PATH))
+        return _replay_backend
+
+
+def run_conversation(backend: LLMBackend, messages: List[str], store) -> Dict[str, Any]:
+    """
+    Run one scripted screening through the same ScreeningSession path app.py uses
+
+    Each conversation gets its own response cache and question bank, and runs
+    without prefetching and with a seeded question bank, so the same script sends
+    the same requests every time.
+
+    Args:
+        backend: The backend to run against
+        messages: Candidate messages, in order
+        store: Candidate store the finished screening is saved to
+
+    Returns:
+        Dict[str, Any]: The assistant replies and the extracted candidate fields
+    """
+    # Imported here so importing this module (e.g. from get_backend) stays light
+    from llm_service import LLMService
+    from question_bank import QuestionBank
+    from response_cache import ResponseCache
+    from screening import ScreeningSession
+
+    service = LLMService(backend=backend, response_cache=ResponseCache(path=None),
+                         question_bank=QuestionBank(path=None, rng=random.Random(0)))
+    session = ScreeningSession(service, store=store)
+    session.prefetcher = None  # Background timing would make the request sequence vary
+
+    replies = [session.start()]
+    for message in messages:
+        replies.append(session.respond(message))
+    candidate = session.candidate_info.to_dict()
+    return {"replies": replies, "candidate": {field: candidate[field] for field in COMPARED_FIELDS}}
+
+
+def record(transcripts: List[Dict[str, Any]], backend: LLMBackend, fixture: ReplayFixture) -> None:
+    """
+    Run transcripts against a live backend and save the fixture with the expected results
+
+    Args:
+        transcripts: Conversations with a name and a list of candidate messages
+        backend: The backend to record from
+        fixture: The fixture to fill
+    """
+    from candidate_store import SQLiteCandidateStore
+
+    recorder = RecordingBackend(backend, fixture)
+    store = SQLiteCandidateStore(":memory:")
+    fixture.responses = {}  # A full re-record drops responses no transcript asks for any more
+    fixture.conversations = []
+    for transcript in transcripts:
+        result = run_conversation(recorder, transcript["messages"], store)
+        fixture.conversations.append({"name": transcript["name"], "messages": transcript["messages"], **result})
+        print(f"Recorded {transcript['name']}: {len(result['replies'])} replies", file=sys.stderr)
+    fixture.save()
+    print(f"Saved {recorder.recorded} exchanges to {fixture.path}", file=sys.stderr)
+
+
+def replay(fixture: ReplayFixture) -> Dict[str, Any]:
+    """
+    Replay every recorded conversation and compare the results with the recording
+
+    Args:
+        fixture: The fixture to replay
+
+    Returns:
+        Dict[str, Any]: Per-conversation failures, request hit and miss counts, and timing
+    """
+    from candidate_store import SQLiteCandidateStore
+
+    backend = ReplayBackend(fixture)
+    store = SQLiteCandidateStore(":memory:")
+    failures = []
+    start_time = time.perf_counter()
+    for conversation in fixture.conversations:
+        result = run_conversation(backend, conversation["messages"], store)
+        problems = []
+        for turn, (expected, actual) in enumerate(zip(conversation["replies"], result["replies"])):
+            if normalize_text(expected) != normalize_text(actual):
+                problems.append({"turn": turn, "expected": expected, "actual": actual})
+                break  # Later turns depend on this one, so the first difference is the useful one
+        if len(conversation["replies"]) != len(result["replies"]):
+            problems.append({"replies": [len(conversation["replies"]), len(result["replies"])]})
+        for field in COMPARED_FIELDS:
+            if conversation["candidate"].get(field) != result["candidate"][field]:
+                problems.append({"field": field, "expected": conversation["candidate"].get(field),
+                                 "actual": result["candidate"][field]})
+        if problems:
+            failures.append({"name": conversation["name"], "problems": problems})
+
+    return {
+        "conversations": len(fixture.conversations),
+        "failed": len(failures),
+        "failures": failures,
+        "requests": backend.stats(),
+        "seconds": round(time.perf_counter() - start_time, 3),
+    }
+
+
+def load_transcripts(path: str) -> List[Dict[str, Any]]:
+    """
+    Read transcripts: a JSON list whose items are message lists or {"name", "messages"} objects
+
+    Args:
+        path: The JSON file
+
+    Returns:
+        List[Dict[str, Any]]: Transcripts with a name and messages
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+    return [
+        item if isinstance(item, dict) else {"name": f"conversation-{number}", "messages": item}
+        for number, item in enumerate(items, start=1)
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Record screening transcripts and replay them as a regression suite")
+    parser.add_argument("--fixture", default=LLM_FIXTURE_PATH, help="Fixture file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    record_parser = subparsers.add_parser("record", help="Run transcripts against a live backend and record them")
+    record_parser.add_argument("transcripts", help="JSON file of transcripts")
+    record_parser.add_argument("--backend", default="gemini", help="Backend to record from (gemini or fake)")
+    subparsers.add_parser("replay", help="Replay the recorded transcripts offline and compare")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        record(load_transcripts(args.transcripts), get_backend(args.backend), ReplayFixture(args.fixture))
+        return
+
+    if not os.path.exists(args.fixture):
+        parser.error(f"fixture not found: {args.fixture}")
+    report = replay(ReplayFixture(args.fixture))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if report["failed"] or report["requests"]["misses"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+# This file schedules every LLM request made in the process
+# A bounded worker pool serves per-session queues fairly, with closings ahead of new greetings
+
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import (
+    LLM_SCHEDULER_GREETING_SHARE, LLM_SCHEDULER_MAX_PER_SESSION,
+    LLM_SCHEDULER_MAX_QUEUE, LLM_SCHEDULER_WORKERS,
+)
+from metrics import get_metrics
+
+# Priority classes, most urgent first: finishing a screening beats starting a new one
+PRIORITY_CLOSING = 0
+PRIORITY_QUESTIONS = 1
+PRIORITY_INFO = 2
+PRIORITY_GREETING = 3
+PRIORITY_PREFETCH = 4  # Speculative work, only admitted while workers are idle
+
+PRIORITY_NAMES = {
+    PRIORITY_CLOSING: "closing",
+    PRIORITY_QUESTIONS: "questions",
+    PRIORITY_INFO: "info",
+    PRIORITY_GREETING: "greeting",
+    PRIORITY_PREFETCH: "prefetch",
+}
+
+
+class SchedulerBusyError(Exception):
+    """Raised when a request is refused because the scheduler is at capacity"""
+
+    def __init__(self, message: str, retry_after: float = 5.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _raiser(error: BaseException) -> Callable[[], Any]:
+    """Job function that re-raises an error from the job's reserve callback"""
+    def fn():
+        raise error
+    return fn
+
+
+class _Job:
+    __slots__ = ("session_id", "priority", "fn", "reserve", "future", "enqueued_at")
+
+    def __init__(self, session_id: str, priority: int, fn: Callable[[], Any],
+                 reserve: Optional[Callable[[], float]] = None):
+        self.session_id = session_id
+        self.priority = priority
+        self.fn = fn
+        self.reserve = reserve  # Reserves a rate-limit slot when the job is dispatched; cleared once used
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class LLMScheduler:
+    """Bounded worker pool with strict priority classes and round-robin fairness between sessions
+
+    Within a priority class each session has its own FIFO queue and sessions
+    take turns, so one chatty session cannot starve the others. Admission is
+    checked on submit: requests beyond the queue limits are refused straight
+    away with SchedulerBusyError rather than waiting indefinitely.
+
+    A job may carry a reserve callback that books its rate-limit slot when the
+    job is dispatched, so queue order decides who gets the next slot. If the
+    slot starts later, the job is parked on a timer heap until then and the
+    worker moves on, so no worker sleeps through a rate-limit wait.
+    """
+
+    def __init__(self, workers: int = LLM_SCHEDULER_WORKERS, max_queue: int = LLM_SCHEDULER_MAX_QUEUE,
+                 max_per_session: int = LLM_SCHEDULER_MAX_PER_SESSION,
+                 greeting_share: float = LLM_SCHEDULER_GREETING_SHARE):
+        """
+        Start the worker threads
+
+        Args:
+            workers: Number of requests that may run at once
+            max_queue: Maximum number of waiting requests
+            max_per_session: Maximum number of waiting requests per session
+            greeting_share: Share of max_queue that greetings (new conversations) may occupy
+        """
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_per_session = max_per_session
+        self.greeting_limit = max(1, int(max_queue * greeting_share))
+        self.metrics = get_metrics()
+
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        # priority -> session_id -> that session's waiting jobs; dict order is the round-robin order
+        self._queues: Dict[int, "OrderedDict[str, deque[_Job]]"] = {
+            priority: OrderedDict() for priority in PRIORITY_NAMES
+        }
+        self._queued_by_priority: Dict[int, int] = {priority: 0 for priority in PRIORITY_NAMES}
+        self._queued_by_session: Dict[str, int] = {}
+        # (ready_at, tie-breaker, job) for jobs holding a reservation that starts later
+        self._delayed: List[Tuple[float, int, _Job]] = []
+        self._delay_order = itertools.count()
+        self._queued = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+
+        self._threads: List[threading.Thread] = []
+        for number in range(workers):
+            thread = threading.Thread(target=self._work, name=f"llm-worker-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, session_id: str, priority: int, fn: Callable[[], Any],
+               reserve: Optional[Callable[[], float]] = None) -> Future:
+        """
+        Queue a request
+
+        Args:
+            session_id: The session making the request
+            priority: One of the PRIORITY_* classes
+            fn: The work to run on a worker thread
+            reserve: Called when the job is dispatched; returns the seconds until fn may run
+
+        Returns:
+            Future: Resolves to fn's result
+
+        Raises:
+            SchedulerBusyError: If the request cannot be admitted
+        """
+        job = _Job(session_id, priority, fn, reserve)
+        with self._lock:
+            reason = self._admission_error(session_id, priority)
+            if reason:
+                self._rejected += 1
+                self.metrics.increment("llm_scheduler_rejections_total", priority=PRIORITY_NAMES[priority])
+                raise SchedulerBusyError(reason)
+            self._queues[priority].setdefault(session_id, deque()).append(job)
+            self._queued += 1
+            self._queued_by_priority[priority] += 1
+            self._queued_by_session[session_id] = self._queued_by_session.get(session_id, 0) + 1
+            self._update_gauges()
+            self._not_empty.notify()
+        return job.future
+
+    def run(self, session_id: str, priority: int, fn: Callable[[], Any],
+            reserve: Optional[Callable[[], float]] = None) -> Any:
+        """
+        Queue a request and wait for its result
+
+        Args:
+            session_id: The session making the request
+            priority: One of the PRIORITY_* classes
+            fn: The work to run on a worker thread
+            reserve: Called when the job is dispatched; returns the seconds until fn may run
+
+        Returns:
+            Any: fn's result (exceptions raised by fn and reserve are re-raised here)
+        """
+        return self.submit(session_id, priority, fn, reserve).result()
+
+    def _admission_error(self, session_id: str, priority: int) -> Optional[str]:
+        """Check whether a new request may be queued (lock must be held)"""
+        if self._queued + len(self._delayed) >= self.max_queue:
+            return "The assistant is very busy right now. Please try again in a few seconds."
+        if priority == PRIORITY_PREFETCH and self._queued + self._in_flight >= self.workers:
+            return "Prefetch skipped: no idle worker."
+        if priority == PRIORITY_GREETING and self._queued_by_priority[priority] >= self.greeting_limit:
+            return "We're helping a lot of candidates right now. Please try again in a few seconds."
+        if self._queued_by_session.get(session_id, 0) >= self.max_per_session:
+            return "Your previous message is still being processed. Please wait a moment."
+        return None
+
+    def _next_job(self) -> Optional[_Job]:
+        """Take the next job: delayed jobs whose slot has started, then highest priority class first,
+        sessions in turn within it (lock must be held)"""
+        if self._delayed and self._delayed[0][0] <= time.monotonic():
+            return heapq.heappop(self._delayed)[2]
+        for priority, sessions in self._queues.items():
+            if not sessions:
+                continue
+            session_id, jobs = next(iter(sessions.items()))
+            job = jobs.popleft()
+            if jobs:
+                sessions.move_to_end(session_id)
+            else:
+                del sessions[session_id]
+            self._queued -= 1
+            self._queued_by_priority[priority] -= 1
+            remaining = self._queued_by_session[session_id] - 1
+            if remaining:
+                self._queued_by_session[session_id] = remaining
+            else:
+                del self._queued_by_session[session_id]
+            return job
+        return None
+
+    def _delay(self, job: _Job, wait: float) -> None:
+        """Park a job until its reserved slot starts, freeing the worker (lock must be held)"""
+        heapq.heappush(self._delayed, (time.monotonic() + wait, next(self._delay_order), job))
+        self._in_flight -= 1
+        self._update_gauges()
+        # A sleeping worker may need to wake earlier for this job than it planned to
+        self._not_empty.notify()
+
+    def _work(self) -> None:
+        while True:
+            with self._lock:
+                job = self._next_job()
+                while job is None:
+                    timeout = max(0.0, self._delayed[0][0] - time.monotonic()) if self._delayed else None
+                    self._not_empty.wait(timeout)
+                    job = self._next_job()
+                self._in_flight += 1
+                self._update_gauges()
+
+            if job.reserve is not None:
+                reserve, job.reserve = job.reserve, None
+                try:
+                    wait = reserve()
+                except BaseException as e:
+                    wait = 0.0
+                    job.fn = _raiser(e)
+                if wait > 0:
+                    with self._lock:
+                        self._delay(job, wait)
+                    continue
+
+            priority_name = PRIORITY_NAMES[job.priority]
+            self.metrics.observe("llm_queue_wait_seconds", time.perf_counter() - job.enqueued_at,
+                                 priority=priority_name)
+            if job.future.set_running_or_notify_cancel():
+                try:
+                    job.future.set_result(job.fn())
+                except BaseException as e:
+                    job.future.set_exception(e)
+
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+                self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        """Publish queue depth and in-flight gauges (lock must be held)"""
+        for priority, name in PRIORITY_NAMES.items():
+            self.metrics.set_gauge("llm_queue_depth", self._queued_by_priority[priority], priority=name)
+        self.metrics.set_gauge("llm_in_flight", self._in_flight)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get queue statistics
+
+        Returns:
+            Dict[str, Any]: Queue depth per priority, requests waiting for their rate-limit slot,
+                requests in flight, completed and rejected counts
+        """
+        with self._lock:
+            return {
+                "queued": {PRIORITY_NAMES[p]: count for p, count in self._queued_by_priority.items()},
+                "delayed": len(self._delayed),
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """
+    Get the process-wide scheduler, starting its workers on first use
+
+    Returns:
+        LLMScheduler: The shared scheduler
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler()
+        return _scheduler
@@ -1,92 +1,366 @@
-import google.generativeai as genai
 import time
-from config import GEMINI_API_KEY, MODEL_NAME, EXIT_KEYWORDS
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from config import MODEL_NAME, MAX_TECHNICAL_QUESTIONS
+from conversation_context import ConversationContext
+from llm_backends import LLMBackend, get_backend
+from llm_scheduler import (
+    PRIORITY_CLOSING, PRIORITY_GREETING, PRIORITY_INFO, PRIORITY_QUESTIONS,
+    LLMScheduler, SchedulerBusyError, get_scheduler,
+)
+from metrics import get_metrics
+from question_bank import QuestionBank, generate_questions, get_question_bank
+from rate_limiter import TokenBucketLimiter, UnlimitedRateLimiter, get_rate_limiter, estimate_tokens
+from resilience import (
+    PERMANENT, RATE_LIMITED, CircuitBreaker, RetryBudget, RetryPolicy, classify_error, get_circuit_guards,
+)
+from response_cache import ResponseCache, get_response_cache
+from screening_state import is_exit_intent
 import prompts
 
 class LLMService:
     """Service for handling interactions with the Language Model"""
 
-    def __init__(self):
-        """Initialize the LLM service with API key and rate limit handling"""
-        genai.configure(api_key=GEMINI_API_KEY)
-        self.model = genai.GenerativeModel(MODEL_NAME)
-        self.conversation = self.model.start_chat(history=[])
-        self.system_prompt_sent = False  # Ensure system prompt is sent only once
-        self.last_request_time = 0  # Track last API request time
+    def __init__(self, backend: Optional[LLMBackend] = None, response_cache: Optional[ResponseCache] = None,
+                 question_bank: Optional[QuestionBank] = None, scheduler: Optional[LLMScheduler] = None,
+                 rate_limiter: Optional[TokenBucketLimiter] = None,
+                 circuit_guards: Optional[Tuple[CircuitBreaker, RetryBudget]] = None):
+        """Initialize the LLM service with API key and rate limit handling
+
+        The backend, response cache, question bank, scheduler, rate limiter and circuit guards
+        default to the process-wide instances; load tests pass their own so they never touch
+        production state such as the shared quota ledger.
+        Calls raise SchedulerBusyError when the scheduler refuses a request, for the UI to show.
+        """
+        # Model handles and connections are shared process-wide; this object only owns chat state
+        self.backend = backend or get_backend()
+        # Model handles and the chat are created on first use, so a new session does no SDK work
+        self._model = None
+        self._generation_model = None
+        self._conversation = None
+        self._pending_history: List[Dict[str, Any]] = []  # Chat history kept locally until the chat exists
+        self.context = ConversationContext()  # Keeps the resent history bounded
+        # Shared across sessions; backends that never reach the API (replay) are not limited
+        if rate_limiter is None:
+            rate_limiter = (get_rate_limiter(self.backend.quota_key, MODEL_NAME) if self.backend.rate_limited
+                            else UnlimitedRateLimiter())
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker, self.retry_budget = (circuit_guards
+                                                   or get_circuit_guards(self.backend.quota_key, MODEL_NAME))
+        self.retry_policy = RetryPolicy()
+        self.response_cache = response_cache or get_response_cache()  # Shared cache for deterministic prompts
+        self.question_bank = question_bank or get_question_bank()
+        self.scheduler = scheduler or get_scheduler()  # Every request goes through the shared worker pool
+        self.session_id = uuid.uuid4().hex  # Fair-queuing key for this conversation
+        self.metrics = get_metrics()
         self.conversation_ended = False  # Track if the conversation has ended
 
+    @property
+    def model(self):
+        """Chat model handle; the system prompt goes in its system instruction slot, not the chat history"""
+        if self._model is None:
+            self._model = self.backend.get_model(system_instruction=prompts.SYSTEM_PROMPT)
+        return self._model
+
+    @property
+    def generation_model(self):
+        """Model handle for one-shot prompts outside the chat"""
+        if self._generation_model is None:
+            self._generation_model = self.backend.get_model()
+        return self._generation_model
+
+    @property
+    def conversation(self):
+        """The chat session, started from the locally kept history when it is first needed"""
+        if self._conversation is None:
+            self._conversation = self.model.start_chat(history=self._pending_history)
+            self._pending_history = []
+        return self._conversation
+
+    def _set_history(self, history: List[Dict[str, Any]]):
+        """Replace the chat history (SDK content dicts) without starting the chat"""
+        if self._conversation is None:
+            self._pending_history = list(history)
+        else:
+            self._conversation.history = history
+
+    def _append_exchange(self, user_text: str, model_text: str):
+        """Record an exchange that was answered locally, so the chat context matches a real round trip"""
+        exchange = [{"role": "user", "parts": [user_text]}, {"role": "model", "parts": [model_text]}]
+        if self._conversation is None:
+            self._pending_history = self._pending_history + exchange
+        else:
+            self._conversation.history = list(self._conversation.history) + exchange
+
     def initialize_conversation(self):
         """Reset the conversation"""
-        self.conversation = self.model.start_chat(history=[])
-        self.system_prompt_sent = False
+        self._conversation = None
+        self._pending_history = []
+        self.context.reset()
         self.conversation_ended = False  # Reset end flag
 
+    def update_candidate_context(self, candidate_fields: Dict[str, Any]):
+        """Share the candidate fields captured so far, used when older turns are summarized"""
+        self.context.update_candidate_fields(candidate_fields)
+
     def get_response(self, user_input: str) -> str:
         """Process user input and get a response from the model while handling rate limits"""
         if self.conversation_ended:
             return "The conversation has already ended. Please start a new session."
 
-        if any(keyword in user_input.lower() for keyword in EXIT_KEYWORDS):
+        if is_exit_intent(user_input):
             return self._handle_exit()
 
-        self._enforce_rate_limit()
-
         try:
-            if not self.system_prompt_sent:
-                self._send_system_prompt()
-
             response = self._send_with_retry(user_input)
-            self.last_request_time = time.time()
             return response.text if response else "I'm having trouble processing your request. Please try again later."
 
+        except SchedulerBusyError:
+            raise
         except Exception as e:
             print(f"Error in getting LLM response: {e}")
             return "I'm having trouble processing your request. Please try again later."
 
-    def _send_system_prompt(self):
-        """Send the system prompt once at the start of the conversation"""
-        if self.system_prompt_sent:
-            return  # Prevent duplicate system prompts
+    def get_response_stream(self, user_input: str) -> Iterator[str]:
+        """Process user input and yield the model's response text chunk by chunk as it arrives"""
+        if self.conversation_ended:
+            yield "The conversation has already ended. Please start a new session."
+            return
+
+        if is_exit_intent(user_input):
+            yield self._handle_exit()
+            return
+
+        fallback = "I'm having trouble processing your request. Please try again later."
+        response = None
+        received_text = False
+        try:
+            response = self._send_with_retry(user_input, stream=True)
+            if not response:
+                yield fallback
+                return
+
+            for chunk in response:
+                if chunk.text:
+                    received_text = True
+                    yield chunk.text
+
+        except SchedulerBusyError:
+            raise
+        except Exception as e:
+            print(f"Error in streaming LLM response: {e}")
+            if response is not None:
+                # Drop the broken exchange so the chat history stays usable
+                try:
+                    self.conversation.rewind()
+                except Exception:
+                    pass
+                response = None
+            if not received_text:
+                yield fallback
+        finally:
+            # The chat history is only updated once the stream is fully consumed
+            if response is not None:
+                try:
+                    response.resolve()
+                except Exception:
+                    pass
+
+    def get_technical_questions(self, user_input: str, tech_stack, questions: Optional[List[str]] = None) -> str:
+        """Answer the candidate's tech stack with technical questions assembled from the question bank
+
+        questions is a set already prepared in the background for this stack, if any.
+        """
+        if self.conversation_ended:
+            return "The conversation has already ended. Please start a new session."
+
+        if is_exit_intent(user_input):
+            return self._handle_exit()
+
+        if questions is None:
+            questions, _ = self.prepare_question_set(tech_stack)
+
+        if not questions:
+            # Nothing usable from the bank, fall back to letting the model write the questions
+            return self.get_response(user_input)
+
+        message = prompts.QUESTION_SET_MESSAGE.format(
+            questions="\n".join(f"{number}. {question}" for number, question in enumerate(questions, start=1))
+        )
+
+        # Record the exchange so the model knows which questions were asked
+        self._append_exchange(user_input, message)
+        return message
+
+    def prepare_question_set(self, tech_stack, priority: int = PRIORITY_QUESTIONS,
+                             should_stop: Optional[Callable[[], bool]] = None) -> Tuple[List[str], List[str]]:
+        """Assemble a question set from the bank, generating questions for technologies it does not cover
+
+        Only known technologies the bank does not cover yet cost an LLM call; the results are kept for next time.
+        should_stop is checked before each generation call, so background callers can give up early.
+        Returns the questions and the technologies still uncovered.
+        """
+        bank = self.question_bank
+        questions, uncovered = bank.build_question_set(tech_stack, MAX_TECHNICAL_QUESTIONS)
+        self.metrics.increment("question_bank_lookups_total", result="generated" if uncovered else "hit")
+
+        if uncovered:
+            with self.metrics.span("question_generation"):
+                for tech in uncovered:
+                    if should_stop and should_stop():
+                        break
+                    generated = generate_questions(tech, lambda prompt: self.generate_text(prompt, priority))
+                    if any(generated.values()):
+                        bank.add(tech, generated)
+                bank.save()
+            questions, uncovered = bank.build_question_set(tech_stack, MAX_TECHNICAL_QUESTIONS)
+        return questions, uncovered
+
+    def generate_text(self, prompt: str, priority: int = PRIORITY_QUESTIONS) -> Optional[str]:
+        """Send a one-shot prompt outside the conversation and return the response text"""
+        response = self._send_with_retry(prompt, one_shot=True, priority=priority)
         try:
-            self.conversation.send_message(prompts.SYSTEM_PROMPT)
-            self.system_prompt_sent = True
+            return response.text if response else None
         except Exception as e:
-            print(f"Error sending system prompt: {e}")
+            print(f"Error reading generated text: {e}")
+            return None
+
+    def _send_cached(self, message: str, variants: Optional[int] = None,
+                     priority: int = PRIORITY_INFO) -> Optional[str]:
+        """Send a deterministic prompt, serving the reply from the response cache when possible"""
+        key = ResponseCache.make_key(f"{self.backend.name}:{MODEL_NAME}", message, self._history_pairs(),
+                                     system_instruction=prompts.SYSTEM_PROMPT)
+        cached = self.response_cache.get(key, variants)
+        self.metrics.increment("response_cache_requests_total", result="miss" if cached is None else "hit")
+        if cached is not None:
+            self._append_exchange(message, cached)
+            return cached
+
+        response = self._send_with_retry(message, priority=priority)
+        if not response:
+            return None
+        self.response_cache.put(key, response.text, variants)
+        return response.text
+
+    def _compact_history(self):
+        """Fold turns outside the context window into the summary before the next send"""
+        with self.metrics.span("context_compaction"):
+            compacted = self.context.compact(self._history_pairs())
+        if compacted is not None:
+            self._set_history(compacted)
+
+    def _history_pairs(self) -> List[Tuple[str, str]]:
+        """Get the chat history as (role, text) pairs"""
+        if self._conversation is None:
+            return [(content["role"], "".join(content["parts"])) for content in self._pending_history]
+        return [
+            (content.role, "".join(part.text for part in content.parts))
+            for content in self.conversation.history
+        ]
+
+    def _send_with_retry(self, message: str, max_retries: Optional[int] = None, stream: bool = False,
+                         one_shot: bool = False, priority: int = PRIORITY_INFO):
+        """Send a message, retrying rate-limited and transient failures with jittered backoff
+
+        Permanent errors are not retried. While the circuit for this API key is open
+        the call fails fast, and retries stop once the shared retry budget is spent.
+        Returns None if no attempt succeeded.
+
+        Each attempt runs on the scheduler's worker pool at the given priority. The
+        rate-limit slot is reserved when the scheduler dispatches the attempt, so the
+        queue order decides who gets the next slot; if the slot starts later, the
+        scheduler parks the attempt until then instead of a worker sleeping through
+        the wait. Backoff sleeps happen outside it and do not hold a worker either.
+        """
+        if not one_shot:
+            self._compact_history()
+
+        mode = "one_shot" if one_shot else "stream" if stream else "chat"
+        max_attempts = max_retries or self.retry_policy.max_attempts
+        if not self.circuit_breaker.allow():
+            self.metrics.increment("llm_circuit_rejections_total", mode=mode)
+            print("Gemini API is unavailable (circuit open). Failing fast without calling it.")
+            return None
+        self.retry_budget.record_request()
+
+        for attempt in range(max_attempts):
+            if attempt:
+                self.metrics.increment("llm_retries_total", mode=mode)
+
+            def reserve_slot():
+                return self._reserve_rate_limit(message, include_history=not one_shot)
+
+            def attempt_request():
+                # For streams this covers opening the stream; chunk delivery is timed per turn
+                with self.metrics.span("llm_request", mode=mode):
+                    if one_shot:
+                        return self.generation_model.generate_content(message, stream=stream)
+                    return self.conversation.send_message(message, stream=stream)
 
-    def _send_with_retry(self, message: str, max_retries: int = 3, delay: int = 6):
-        """Retry sending messages in case of quota errors (429), ensuring only the final response is stored."""
-        last_response = None
-        for attempt in range(max_retries):
             try:
-                last_response = self.conversation.send_message(message)
-                return last_response  # Return immediately if successful
+                response = self.scheduler.run(self.session_id, priority, attempt_request, reserve=reserve_slot)
+                self.circuit_breaker.record_success()
+                return response
+            except SchedulerBusyError:
+                # Refused before reaching the API: no outcome to record, but a half-open trial must be freed
+                self.circuit_breaker.release_trial()
+                raise
             except Exception as e:
-                if "429" in str(e):
-                    print(f"Rate limit hit. Waiting {delay} seconds before retrying (Attempt {attempt + 1})...")
-                    time.sleep(delay)
-                else:
+                failure = classify_error(e)
+                self.metrics.increment("llm_errors_total", mode=mode, kind=failure.kind)
+                if failure.kind == PERMANENT:
+                    # The service answered, so it is up; the request itself was bad
+                    self.circuit_breaker.record_success()
                     print(f"Unexpected error: {e}")
                     return None
-        return last_response  # Return the last successful response or None
 
-    def _enforce_rate_limit(self, min_delay: int = 6):
-        """Ensure a delay between consecutive API requests to prevent rate limit errors"""
-        time_since_last = time.time() - self.last_request_time
-        if time_since_last < min_delay:
-            wait_time = min_delay - time_since_last
-            print(f"Waiting {wait_time:.2f} seconds to comply with API rate limits...")
-            time.sleep(wait_time)
+                self.circuit_breaker.record_failure(open_for=failure.retry_after)
+                if failure.kind == RATE_LIMITED and failure.retry_after:
+                    # The quota is shared, so push back the bucket for every session, not just this one
+                    self.rate_limiter.defer(failure.retry_after)
+
+                if attempt + 1 >= max_attempts:
+                    print(f"Giving up after {max_attempts} attempts: {e}")
+                    return None
+                if failure.retry_after and failure.retry_after > self.retry_policy.max_delay:
+                    print(f"Giving up: the API asked to wait {failure.retry_after:.0f}s, longer than a candidate should")
+                    return None
+                if not self.circuit_breaker.allow():
+                    print(f"Giving up: the circuit opened after repeated failures ({e})")
+                    return None
+                if not self.retry_budget.try_spend():
+                    self.metrics.increment("llm_retry_budget_exhausted_total", mode=mode)
+                    print(f"Giving up: retry budget exhausted ({e})")
+                    return None
+
+                # The jitter keeps sessions from retrying in step; the server's hint is never undercut
+                delay = self.retry_policy.backoff(attempt, failure.retry_after)
+                print(f"{failure.kind.replace('_', ' ').capitalize()} error, retrying in {delay:.1f}s "
+                      f"(attempt {attempt + 1} of {max_attempts}): {e}")
+                time.sleep(delay)
+        return None
+
+    def _reserve_rate_limit(self, message: str = "", include_history: bool = True) -> float:
+        """Reserve a slot from the shared rate limiter for a message and return the seconds until it starts"""
+        history_text = "".join(text for _, text in self._history_pairs()) if include_history else ""
+        wait_time = self.rate_limiter.reserve(estimate_tokens(history_text + message))
+        self.metrics.observe("rate_limit_wait_seconds", wait_time)
+        if wait_time > 0:
+            print(f"Scheduled {wait_time:.2f} seconds out to comply with API rate limits")
+        return wait_time
 
     def _handle_exit(self) -> str:
         """Handle conversation exit, ensuring the message is not repeated."""
         if self.conversation_ended:
             return "The conversation has already ended. Please start a new session."
 
-        self._enforce_rate_limit()
         try:
-            response = self._send_with_retry(prompts.END_CONVERSATION_PROMPT)
+            response = self._send_with_retry(prompts.END_CONVERSATION_PROMPT, priority=PRIORITY_CLOSING)
             self.conversation_ended = True  # Mark conversation as ended
             return response.text if response else "Thank you for your time. Goodbye!"
+        except SchedulerBusyError:
+            raise
         except Exception as e:
             print(f"Error in exit handling: {e}")
             return "Thank you for your time. Goodbye!"
@@ -96,17 +370,30 @@ class LLMService:
         if self.conversation_ended:
             return "The conversation has ended. Please start a new session."
 
-        self._enforce_rate_limit()
         try:
-            if not self.system_prompt_sent:
-                self._send_system_prompt()
-
-            response = self._send_with_retry(prompts.GREETING_PROMPT)
-            return response.text if response else "Hello! I'm TalentScout Assistant. What's your name?"
+            response = self._send_cached(prompts.GREETING_PROMPT, priority=PRIORITY_GREETING)
+            return response if response else "Hello! I'm TalentScout Assistant. What's your name?"
+        except SchedulerBusyError:
+            raise
         except Exception as e:
             print(f"Error in starting conversation: {e}")
             return "Hello! I'm TalentScout Assistant. What's your name?"
 
+    def to_checkpoint(self) -> Dict[str, Any]:
+        """Capture the chat history (in the SDK's content format) and context state for a session checkpoint"""
+        return {
+            "chat_history": [{"role": role, "parts": [text]} for role, text in self._history_pairs()],
+            "context": self.context.to_checkpoint(),
+            "conversation_ended": self.conversation_ended,
+        }
+
+    def restore_checkpoint(self, checkpoint: Dict[str, Any]):
+        """Rebuild the chat from a checkpoint locally, without any API call"""
+        self._conversation = None
+        self._pending_history = list(checkpoint["chat_history"])
+        self.context.restore_checkpoint(checkpoint["context"])
+        self.conversation_ended = checkpoint["conversation_ended"]
+
     def reset_conversation(self):
         """Reset the conversation history"""
         self.initialize_conversation()
@@ -0,0 +1,209 @@
+# This file is the end-to-end load-test harness for the screening flow
+# It runs N concurrent scripted candidate sessions through ScreeningSession against a fake backend
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from candidate_store import SQLiteCandidateStore
+from config import (
+    LLM_SCHEDULER_MAX_QUEUE, LLM_SCHEDULER_WORKERS,
+    RATE_LIMIT_REQUESTS_PER_MINUTE, RATE_LIMIT_TOKENS_PER_MINUTE,
+)
+from llm_backends import FakeBackend, LLMBackend
+from llm_scheduler import LLMScheduler, SchedulerBusyError
+from llm_service import LLMService
+from metrics import get_metrics
+from question_bank import QuestionBank
+from rate_limiter import TokenBucketLimiter
+from resilience import CircuitBreaker, RetryBudget
+from response_cache import ResponseCache
+from screening import ScreeningSession
+
+# Candidate messages used when no script file is given; {n} is replaced by the session number
+DEFAULT_SCRIPT = [
+    "My name is Test Candidate {n}",
+    "candidate{n}@example.com",
+    "+1 555 123 4567",
+    "I have 5 years of experience",
+    "Backend engineer",
+    "I live in Berlin",
+    "I work with Python, Django, PostgreSQL and Docker",
+    "A Python decorator wraps a function to add behaviour without changing it.",
+    "Thanks, bye",
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Get the pct-th percentile of values using linear interpolation"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class LoadTest:
+    """Runs concurrent scripted sessions and collects latency statistics"""
+
+    def __init__(self, backend: LLMBackend, sessions: int, script: List[str],
+                 requests_per_minute: int = RATE_LIMIT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: Optional[int] = RATE_LIMIT_TOKENS_PER_MINUTE,
+                 think_time: float = 0.0, workers: int = LLM_SCHEDULER_WORKERS,
+                 max_queue: int = LLM_SCHEDULER_MAX_QUEUE):
+        """
+        Set up the harness with its own limiter, cache, question bank and store
+
+        Args:
+            backend: Model backend every session talks to
+            sessions: Number of concurrent candidate sessions
+            script: Candidate messages each session sends in order
+            requests_per_minute: Quota shared by all sessions
+            tokens_per_minute: Token quota shared by all sessions
+            think_time: Seconds a simulated candidate waits between messages
+            workers: LLM scheduler worker threads
+            max_queue: LLM scheduler queue limit
+        """
+        self.backend = backend
+        self.sessions = sessions
+        self.script = script
+        self.think_time = think_time
+        # Isolated shared state, so a load test never touches production caches or data
+        self.rate_limiter = TokenBucketLimiter(requests_per_minute, tokens_per_minute)
+        self.circuit_breaker = CircuitBreaker()
+        self.retry_budget = RetryBudget()
+        self.scheduler = LLMScheduler(workers=workers, max_queue=max_queue)
+        self.response_cache = ResponseCache(path=None)
+        self.question_bank = QuestionBank(path=None)
+        self.store = SQLiteCandidateStore(":memory:")
+
+        self._lock = threading.Lock()
+        self.turn_latencies: List[float] = []
+        self.first_chunk_latencies: List[float] = []
+        self.errors = 0
+        self.busy_rejections = 0
+
+    def _record(self, latency: float, first_chunk: float) -> None:
+        with self._lock:
+            self.turn_latencies.append(latency)
+            self.first_chunk_latencies.append(first_chunk)
+
+    def _run_session(self, number: int) -> None:
+        """Run one scripted conversation through the same ScreeningSession path app.py uses"""
+        try:
+            # Everything is passed in, so constructing the service never reaches the shared quota ledger
+            service = LLMService(backend=self.backend, response_cache=self.response_cache,
+                                 question_bank=self.question_bank, scheduler=self.scheduler,
+                                 rate_limiter=self.rate_limiter,
+                                 circuit_guards=(self.circuit_breaker, self.retry_budget))
+            session = ScreeningSession(service, store=self.store)
+
+            start = time.perf_counter()
+            self._until_admitted(session.start)
+            elapsed = time.perf_counter() - start
+            self._record(elapsed, elapsed)
+
+            for message in self.script:
+                if self.think_time:
+                    time.sleep(self.think_time)
+                start = time.perf_counter()
+                first_chunk = None
+
+                def send():
+                    nonlocal first_chunk
+                    for _ in session.respond_stream(message.format(n=number)):
+                        if first_chunk is None:
+                            first_chunk = time.perf_counter() - start
+
+                self._until_admitted(send)
+                elapsed = time.perf_counter() - start
+                self._record(elapsed, first_chunk if first_chunk is not None else elapsed)
+        except Exception as e:
+            print(f"Session {number} failed: {e}")
+            with self._lock:
+                self.errors += 1
+
+    def _until_admitted(self, action) -> None:
+        """Run an action, resending like a candidate would while the scheduler refuses it"""
+        while True:
+            try:
+                action()
+                return
+            except SchedulerBusyError as e:
+                with self._lock:
+                    self.busy_rejections += 1
+                time.sleep(min(e.retry_after, 1.0))
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run every session concurrently and summarize the results
+
+        Returns:
+            Dict[str, Any]: Latency percentiles, throughput and rate limiter statistics
+        """
+        threads = [threading.Thread(target=self._run_session, args=(n,), daemon=True)
+                   for n in range(1, self.sessions + 1)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - start
+
+        limiter_stats = self.rate_limiter.stats()
+        return {
+            "sessions": self.sessions,
+            "failed_sessions": self.errors,
+            "turns": len(self.turn_latencies),
+            "duration_seconds": round(duration, 3),
+            "turns_per_second": round(len(self.turn_latencies) / duration, 3) if duration else 0.0,
+            "turn_latency_p50": round(percentile(self.turn_latencies, 50), 3),
+            "turn_latency_p95": round(percentile(self.turn_latencies, 95), 3),
+            "turn_latency_p99": round(percentile(self.turn_latencies, 99), 3),
+            "turn_latency_mean": round(statistics.mean(self.turn_latencies), 3) if self.turn_latencies else 0.0,
+            "first_chunk_p50": round(percentile(self.first_chunk_latencies, 50), 3),
+            "first_chunk_p95": round(percentile(self.first_chunk_latencies, 95), 3),
+            "rate_limit_wait_total_seconds": round(limiter_stats["total_wait_seconds"], 3),
+            "rate_limit_wait_max_seconds": round(limiter_stats["max_wait_seconds"], 3),
+            "busy_rejections": self.busy_rejections,
+            "scheduler": self.scheduler.stats(),
+            "circuit": self.circuit_breaker.stats(),
+            "backend": self.backend.stats() if hasattr(self.backend, "stats") else {},
+            # Per-phase breakdown when run with METRICS_ENABLED=1
+            "metrics": get_metrics().snapshot() if get_metrics().enabled else {},
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Load-test the screening flow against a fake model backend")
+    parser.add_argument("--sessions", type=int, default=20, help="Concurrent candidate sessions")
+    parser.add_argument("--script", help="JSON file with a list of candidate messages ({n} = session number)")
+    parser.add_argument("--latency", default="lognormal:0.8,0.4",
+                        help="Fake latency distribution: constant:S, uniform:LOW,HIGH or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an injected 429 per request")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry hint on injected 429s, in seconds")
+    parser.add_argument("--rpm", type=int, default=RATE_LIMIT_REQUESTS_PER_MINUTE, help="Requests-per-minute quota")
+    parser.add_argument("--tpm", type=int, default=RATE_LIMIT_TOKENS_PER_MINUTE, help="Tokens-per-minute quota")
+    parser.add_argument("--workers", type=int, default=LLM_SCHEDULER_WORKERS, help="LLM scheduler workers")
+    parser.add_argument("--max-queue", type=int, default=LLM_SCHEDULER_MAX_QUEUE, help="LLM scheduler queue limit")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Seconds between a session's messages")
+    args = parser.parse_args(argv)
+
+    script = DEFAULT_SCRIPT
+    if args.script:
+        with open(args.script, 'r', encoding='utf-8') as f:
+            script = json.load(f)
+
+    backend = FakeBackend(latency=args.latency, error_rate=args.error_rate, retry_after=args.retry_after)
+    results = LoadTest(backend, args.sessions, script, args.rpm, args.tpm, args.think_time,
+                       args.workers, args.max_queue).run()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
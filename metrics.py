@@ -0,0 +1,298 @@
+# This file provides lightweight instrumentation for the screening flow
+# Timed spans, counters and histograms, exported as Prometheus text or logged as JSON lines
+
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config import METRICS_ENABLED, METRICS_LOG_PATH, METRICS_PORT
+
+# Histogram bucket upper bounds in seconds, from cache hits up to retried API calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class _Histogram:
+    """Cumulative bucket counts plus sum and count for one label set"""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+
+class _NullSpan:
+    """Span returned when metrics are disabled; entering and leaving it does nothing"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Metrics:
+    """Registry of counters, gauges and histograms shared by the whole process"""
+
+    def __init__(self, enabled: bool = METRICS_ENABLED, log_path: Optional[str] = METRICS_LOG_PATH,
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize an empty registry
+
+        Args:
+            enabled: Whether to record anything; when False every call returns immediately
+            log_path: JSON-lines file each finished span is appended to, or None
+            buckets: Histogram bucket upper bounds in seconds
+        """
+        self.enabled = enabled
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._log = open(log_path, 'a', encoding='utf-8') if enabled and log_path else None
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def describe(self, name: str, help_text: str) -> None:
+        """Attach a HELP line to a metric in the Prometheus export"""
+        self._help[name] = help_text
+
+    def increment(self, name: str, value: float = 1, **labels: Any) -> None:
+        """
+        Add to a counter
+
+        Args:
+            name: Counter name, conventionally ending in _total
+            value: Amount to add
+            **labels: Label values for this series
+        """
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        """
+        Set a gauge to its current value
+
+        Args:
+            name: Gauge name
+            value: Current value
+            **labels: Label values for this series
+        """
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """
+        Record a value in a histogram
+
+        Args:
+            name: Histogram name, conventionally ending in _seconds
+            value: Observed value
+            **labels: Label values for this series
+        """
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self.buckets)
+            histogram.counts[bisect.bisect_left(self.buckets, value)] += 1
+            histogram.total += value
+            histogram.count += 1
+
+    def span(self, name: str, **labels: Any):
+        """
+        Time a block of code into the histogram "<name>_seconds"
+
+        Usage:
+            with metrics.span("llm_request", mode="stream"):
+                ...
+
+        Args:
+            name: Phase name
+            **labels: Label values for this series
+
+        Returns:
+            A context manager; a shared no-op one when metrics are disabled
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._timed(name, labels)
+
+    @contextmanager
+    def _timed(self, name: str, labels: Dict[str, Any]) -> Iterator[None]:
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe(f"{name}_seconds", elapsed, **labels)
+            if self._log is not None:
+                self._write_log({"ts": time.time(), "span": name, "seconds": round(elapsed, 6),
+                                 "status": status, **labels})
+
+    def _write_log(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._log.write(line + "\n")
+            self._log.flush()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the current values as plain data
+
+        Returns:
+            Dict[str, Any]: Counters and histogram summaries keyed by metric name and label string
+        """
+        with self._lock:
+            counters = {
+                name: {_format_labels(key): value for key, value in series.items()}
+                for name, series in self._counters.items()
+            }
+            gauges = {
+                name: {_format_labels(key): value for key, value in series.items()}
+                for name, series in self._gauges.items()
+            }
+            histograms = {
+                name: {
+                    _format_labels(key): {"count": h.count, "sum": round(h.total, 6),
+                                          "mean": round(h.total / h.count, 6) if h.count else 0.0}
+                    for key, h in series.items()
+                }
+                for name, series in self._histograms.items()
+            }
+        return {"counters": counters, "gauges": gauges, "histograms": histograms}
+
+    def render_prometheus(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format
+
+        Returns:
+            str: The exposition text
+        """
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+            for name, series in sorted(self._gauges.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} gauge")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, h in series.items():
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, h.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key, ('le', repr(bound)))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {h.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {h.total}")
+                    lines.append(f"{name}_count{_format_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def start_exporter(self, port: int = METRICS_PORT, host: str = "0.0.0.0") -> bool:
+        """
+        Serve /metrics on a background thread, once per process
+
+        Args:
+            port: Port to listen on; 0 leaves the endpoint off
+            host: Interface to bind
+
+        Returns:
+            bool: True if the endpoint is running
+        """
+        if not self.enabled or not port:
+            return False
+        with self._lock:
+            if self._server is not None:
+                return True
+            registry = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?", 1)[0] != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = registry.render_prometheus().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass  # Keep scrapes out of the app's console output
+
+            try:
+                self._server = ThreadingHTTPServer((host, port), Handler)
+            except OSError as e:
+                print(f"Could not start the metrics endpoint on port {port}: {e}")
+                return False
+            threading.Thread(target=self._server.serve_forever, name="metrics-exporter", daemon=True).start()
+        return True
+
+
+_metrics: Optional[Metrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """
+    Get the process-wide metrics registry, creating it on first use
+
+    Returns:
+        Metrics: The shared registry
+    """
+    global _metrics
+    if _metrics is not None:
+        return _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+        return _metrics
@@ -0,0 +1,27 @@
+# This page shows how long this worker took to boot and which heavy modules it has loaded
+# Timings come from boot.py and cover the whole process, not one session
+
+import streamlit as st
+
+from boot import boot_report
+
+st.set_page_config(page_title="Diagnostics", page_icon="🩺", layout="centered")
+st.title("Diagnostics")
+
+report = boot_report()
+st.metric("Worker uptime", f"{report['uptime_seconds']:.1f} s")
+
+st.subheader("Boot steps")
+if report["steps"]:
+    st.table([{"step": name, "seconds since boot": round(elapsed, 3)} for name, elapsed in report["steps"]])
+else:
+    st.caption("The main page has not run in this worker yet.")
+
+st.subheader("Deferred imports")
+if report["deferred_imports"]:
+    st.table([{"module": name, "seconds": round(elapsed, 3)} for name, elapsed in report["deferred_imports"]])
+else:
+    st.caption("No heavy module has been imported yet.")
+
+st.subheader("Heavy modules")
+st.table([{"module": module, "loaded": loaded} for module, loaded in report["loaded_modules"].items()])
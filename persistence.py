@@ -0,0 +1,316 @@
+# This file moves candidate persistence off the request path
+# Writes are queued, coalesced per candidate and flushed in batches by a background thread
+
+import atexit
+import json
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from config import (
+    PERSISTENCE_BATCH_SIZE, PERSISTENCE_FLUSH_INTERVAL_SECONDS, PERSISTENCE_FSYNC, PERSISTENCE_MAX_PENDING,
+)
+from metrics import get_metrics
+
+# Durability policies for file writes
+FSYNC_ALWAYS = "always"  # Every file and its directory are synced before the write counts as done
+FSYNC_BATCH = "batch"  # Every file is synced; each directory once per batch
+FSYNC_NEVER = "never"  # Left to the OS; a crash can lose recent writes but never leaves a torn file
+
+WriteBatch = Callable[[List[Tuple[str, Any]]], None]
+
+
+class WriteBehindQueue:
+    """Queue of pending writes drained by one background thread
+
+    Pending writes are keyed, and a newer write for a key replaces the one
+    still waiting, so a burst of updates to one candidate costs one write.
+    The writer flushes whenever a batch fills up or the flush interval
+    passes. When max_pending writes are waiting, put blocks until the writer
+    catches up, so memory stays bounded if the disk is slow.
+    """
+
+    def __init__(self, write_batch: WriteBatch, name: str,
+                 flush_interval: float = PERSISTENCE_FLUSH_INTERVAL_SECONDS,
+                 batch_size: int = PERSISTENCE_BATCH_SIZE, max_pending: int = PERSISTENCE_MAX_PENDING):
+        """
+        Start the writer thread
+
+        Args:
+            write_batch: Writes a list of (key, value) pairs; called on the writer thread only
+            name: Sink name used in thread names and metrics
+            flush_interval: Longest time a write waits before being flushed
+            batch_size: Number of pending writes that triggers an immediate flush
+            max_pending: Pending writes at which put blocks
+        """
+        self.write_batch = write_batch
+        self.name = name
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.metrics = get_metrics()
+
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._pending: "OrderedDict[str, Tuple[int, Any]]" = OrderedDict()  # key -> (sequence, value)
+        self._in_progress = 0  # Writes taken by the writer but not finished yet
+        self._sequence = 0  # Sequence number of the latest put
+        self._last_failed_sequence = 0  # Sequence number of the latest write that could not be persisted
+        self._flush_requested = False
+        self._closed = False
+        self._written = 0
+        self._coalesced = 0
+        self._failed = 0
+        self._thread = threading.Thread(target=self._run, name=f"write-behind-{name}", daemon=True)
+        self._thread.start()
+
+    def put(self, key: str, value: Any) -> int:
+        """
+        Queue a write, replacing any write for the same key that is still pending
+
+        Args:
+            key: What is being written (a file path or a candidate's email)
+            value: The data to write; it must not be modified afterwards
+
+        Returns:
+            int: The write's sequence number, for flush(since=...)
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"Write-behind queue {self.name} is closed")
+            if key in self._pending:
+                self._coalesced += 1
+                self.metrics.increment("persistence_coalesced_total", sink=self.name)
+            else:
+                while len(self._pending) >= self.max_pending and not self._closed:
+                    self._changed.wait()
+            self._sequence += 1
+            self._pending[key] = (self._sequence, value)
+            self.metrics.set_gauge("persistence_pending", len(self._pending), sink=self.name)
+            # Wake the writer for the first write (to start its flush timer) and for a full batch
+            if len(self._pending) == 1 or len(self._pending) >= self.batch_size:
+                self._changed.notify_all()
+            return self._sequence
+
+    def flush(self, timeout: Optional[float] = None, since: int = 1) -> bool:
+        """
+        Wait until every write queued so far has been written
+
+        Args:
+            timeout: Seconds to wait, or None to wait as long as it takes
+            since: Sequence number (from put) of the first write the caller cares about;
+                a failed write from this one on makes the flush report failure
+
+        Returns:
+            bool: True if the queue drained and no such write failed, False on timeout or failure
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            self._flush_requested = True
+            self._changed.notify_all()
+            while self._pending or self._in_progress:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._changed.wait(remaining)
+            return self._last_failed_sequence < since
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write everything still pending and stop the writer thread
+
+        Args:
+            timeout: Seconds to wait for the drain
+
+        Returns:
+            bool: True if every pending write was written
+        """
+        with self._lock:
+            if self._closed:
+                return not self._pending
+            self._closed = True
+            self._changed.notify_all()
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _take_batch(self) -> Optional[List[Tuple[str, Any]]]:
+        """Wait for a batch to be due and take it; None once closed and drained"""
+        with self._lock:
+            while not self._pending and not self._closed:
+                self._changed.wait()
+            # Give the first pending write up to the flush interval to grow into a batch
+            deadline = time.monotonic() + self.flush_interval
+            while len(self._pending) < self.batch_size and not (self._closed or self._flush_requested):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+            if not self._pending:
+                self._flush_requested = False
+                return None
+            batch = []
+            while self._pending and len(batch) < self.batch_size:
+                key, (sequence, value) = self._pending.popitem(last=False)
+                batch.append((sequence, key, value))
+            self._in_progress = len(batch)
+            self._flush_requested = bool(self._flush_requested and self._pending)
+            self.metrics.set_gauge("persistence_pending", len(self._pending), sink=self.name)
+            self._changed.notify_all()
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            failed_sequences = []
+            with self.metrics.span("persistence_flush", sink=self.name):
+                try:
+                    self.write_batch([(key, value) for _, key, value in batch])
+                except Exception as e:
+                    # Fall back to one write per item so one bad record does not lose the batch
+                    print(f"Batch write to {self.name} failed, retrying items one by one: {e}")
+                    for sequence, key, value in batch:
+                        try:
+                            self.write_batch([(key, value)])
+                        except Exception as item_error:
+                            failed_sequences.append(sequence)
+                            print(f"Could not persist {key} to {self.name}: {item_error}")
+            failed = len(failed_sequences)
+            self.metrics.increment("persistence_writes_total", len(batch) - failed, sink=self.name)
+            with self._lock:
+                self._written += len(batch) - failed
+                self._failed += failed
+                if failed_sequences:
+                    self._last_failed_sequence = max(self._last_failed_sequence, *failed_sequences)
+                self._in_progress = 0
+                self._changed.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get queue statistics
+
+        Returns:
+            Dict[str, int]: Pending, written, coalesced and failed write counts
+        """
+        with self._lock:
+            return {
+                "pending": len(self._pending) + self._in_progress,
+                "written": self._written,
+                "coalesced": self._coalesced,
+                "failed": self._failed,
+            }
+
+
+class JsonFileWriter:
+    """Writes JSON documents to files that are replaced atomically
+
+    Each document goes to a temporary file in the target directory that is
+    renamed over the target, so readers see either the old or the new file.
+    """
+
+    def __init__(self, fsync: str = PERSISTENCE_FSYNC):
+        """
+        Args:
+            fsync: One of FSYNC_ALWAYS, FSYNC_BATCH or FSYNC_NEVER
+        """
+        if fsync not in (FSYNC_ALWAYS, FSYNC_BATCH, FSYNC_NEVER):
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        self.fsync = fsync
+        self._directories: Set[str] = set()  # Directories already created
+
+    def write_batch(self, batch: List[Tuple[str, Any]]) -> None:
+        """Write (path, document) pairs"""
+        touched = set()
+        for path, document in batch:
+            directory = os.path.dirname(path) or "."
+            if directory not in self._directories:
+                os.makedirs(directory, exist_ok=True)
+                self._directories.add(directory)
+            self._replace(path, json.dumps(document, indent=2, ensure_ascii=False).encode("utf-8"))
+            if self.fsync == FSYNC_ALWAYS:
+                self._sync_directory(directory)
+            touched.add(directory)
+        if self.fsync == FSYNC_BATCH:
+            for directory in touched:
+                self._sync_directory(directory)
+
+    def _replace(self, path: str, payload: bytes) -> None:
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(payload)
+                if self.fsync != FSYNC_NEVER:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    @staticmethod
+    def _sync_directory(directory: str) -> None:
+        """Make renames in a directory durable (not supported on every platform)"""
+        try:
+            descriptor = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(descriptor)
+        except OSError:
+            pass
+        finally:
+            os.close(descriptor)
+
+
+_file_queue: Optional[WriteBehindQueue] = None
+_open_queues: "weakref.WeakSet[WriteBehindQueue]" = weakref.WeakSet()  # Store queues drained at exit
+_queues_lock = threading.Lock()
+
+
+@atexit.register
+def _close_open_queues() -> None:
+    for queue in list(_open_queues):
+        queue.close()
+
+
+def get_file_queue() -> WriteBehindQueue:
+    """
+    Get the process-wide queue for candidate JSON files, keyed by file path
+
+    Returns:
+        WriteBehindQueue: The shared queue, drained when the process exits
+    """
+    global _file_queue
+    with _queues_lock:
+        if _file_queue is None:
+            _file_queue = WriteBehindQueue(JsonFileWriter().write_batch, "files")
+            atexit.register(_file_queue.close)
+        return _file_queue
+
+
+def get_store_queue(store) -> WriteBehindQueue:
+    """
+    Get the queue for a candidate store, keyed by candidate email
+
+    Each batch is stored with one upsert_many call, i.e. one transaction. The
+    queue is kept on the store itself, so it lives exactly as long as the store
+    and is drained by store.close().
+
+    Args:
+        store: The CandidateStore the queue writes to
+
+    Returns:
+        WriteBehindQueue: The store's queue, drained when the process exits
+    """
+    with _queues_lock:
+        queue = store.write_queue
+        if queue is None:
+            queue = WriteBehindQueue(lambda batch: store.upsert_many(record for _, record in batch), "store")
+            store.write_queue = queue
+            _open_queues.add(queue)
+        return queue
@@ -77,6 +77,24 @@ Structure your response as follows:
 The questions should be tailored specifically to the technologies they mentioned, not generic.
 """
 
+# Prompt used by the offline job that pre-generates the question bank for one technology
+BANK_QUESTIONS_PROMPT = """
+Generate technical interview questions to assess a candidate's proficiency in {tech}.
+Write {per_level} basic, {per_level} intermediate and {per_level} advanced questions.
+Each question must be self-contained, specific to {tech}, and answerable in a few sentences.
+Cover both conceptual understanding and practical application.
+
+Output one question per line in the form "difficulty: question", where difficulty is basic, intermediate or advanced.
+Do not number the questions or add any other text.
+"""
+
+# Message shown to the candidate when the technical questions come from the question bank
+QUESTION_SET_MESSAGE = """Thank you for sharing your tech stack! Based on it, I'd like to ask you a few technical questions:
+
+{questions}
+
+Please take your time and answer each question in as much detail as you like."""
+
 # Prompt for handling the end of the conversation
 END_CONVERSATION_PROMPT = """
 The conversation with {name} is coming to an end. Provide a professional and courteous closing message.
@@ -0,0 +1,300 @@
+# This file manages the precomputed bank of technical questions
+# Questions are stored per canonical technology and difficulty and assembled per candidate
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import re
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+    import fcntl  # Serializes saves across worker processes; not available on Windows
+except ImportError:
+    fcntl = None
+
+from config import MAX_TECHNICAL_QUESTIONS, QUESTION_BANK_PATH
+import prompts
+from utils import normalize_tech_terms
+
+DIFFICULTIES = ("basic", "intermediate", "advanced")
+
+# Common spellings mapped to one canonical technology name
+TECH_ALIASES = {
+    "py": "python", "python3": "python",
+    "js": "javascript", "es6": "javascript", "ecmascript": "javascript",
+    "ts": "typescript",
+    "reactjs": "react", "react.js": "react",
+    "node": "node.js", "nodejs": "node.js", "node js": "node.js",
+    "vue": "vue.js", "vuejs": "vue.js",
+    "angularjs": "angular",
+    "golang": "go",
+    "postgres": "postgresql", "psql": "postgresql",
+    "mongo": "mongodb",
+    "k8s": "kubernetes",
+    "amazon web services": "aws",
+    "gcp": "google cloud", "google cloud platform": "google cloud",
+    "c sharp": "c#", "csharp": "c#",
+    "cpp": "c++",
+    "sklearn": "scikit-learn",
+    "tf": "tensorflow",
+    "springboot": "spring boot", "spring": "spring boot",
+}
+
+# Technologies pre-generated by the offline job when none are given
+COMMON_TECHNOLOGIES = [
+    "python", "javascript", "typescript", "java", "c#", "c++", "go", "rust", "ruby", "php",
+    "react", "angular", "vue.js", "node.js", "django", "flask", "fastapi", "spring boot",
+    "sql", "postgresql", "mysql", "mongodb", "redis",
+    "aws", "azure", "google cloud", "docker", "kubernetes", "terraform", "git",
+    "pandas", "tensorflow", "pytorch", "scikit-learn",
+]
+
+# Technologies questions may be generated for at run time, besides the common ones and alias targets.
+# Anything else a candidate writes (e.g. "i love it" from "python and I love it") is not a technology
+# worth a paid generation call and a permanent place in the bank.
+KNOWN_TECHNOLOGIES = frozenset(COMMON_TECHNOLOGIES) | frozenset(TECH_ALIASES.values()) | frozenset([
+    "c", "kotlin", "swift", "scala", "elixir", "erlang", "haskell", "dart", "r", "perl", "lua", "bash",
+    "objective-c", "matlab", "html", "css", "sass", "tailwind", "jquery", "next.js", "nuxt", "svelte",
+    "express", "nestjs", "laravel", "ruby on rails", "rails", ".net", "asp.net", "flutter", "react native",
+    "graphql", "rest", "grpc", "sqlite", "oracle", "sql server", "cassandra", "dynamodb", "elasticsearch",
+    "firebase", "kafka", "rabbitmq", "spark", "hadoop", "airflow", "dbt", "snowflake", "numpy", "keras",
+    "linux", "nginx", "ansible", "jenkins", "github actions", "helm", "prometheus", "grafana",
+    "selenium", "cypress", "jest", "pytest", "webpack", "unity",
+])
+
+_QUESTION_LINE_RE = re.compile(r'^\s*(basic|intermediate|advanced)\s*[:\-]\s*(.+?)\s*$', re.IGNORECASE)
+
+
+def canonical_tech(term: str) -> str:
+    """Map a technology name to its canonical form"""
+    term = term.strip().lower()
+    return TECH_ALIASES.get(term, term)
+
+
+def is_known_tech(tech: str) -> bool:
+    """Check whether a canonical name is a technology questions may be generated for"""
+    return tech in KNOWN_TECHNOLOGIES
+
+
+@contextlib.contextmanager
+def _interprocess_lock(path: str) -> Iterator[None]:
+    """Hold an exclusive lock next to a file, so processes sharing it take turns"""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def canonical_tech_stack(tech_stack: Union[str, List[str], None]) -> List[str]:
+    """Normalize a candidate's tech stack into de-duplicated canonical technology names"""
+    techs = []
+    for term in normalize_tech_terms(tech_stack):
+        tech = canonical_tech(term)
+        if tech not in techs:
+            techs.append(tech)
+    return techs
+
+
+def parse_generated_questions(text: str) -> Dict[str, List[str]]:
+    """
+    Parse model output in the BANK_QUESTIONS_PROMPT format ("difficulty: question" per line)
+
+    Args:
+        text: The model's response
+
+    Returns:
+        Dict[str, List[str]]: Questions grouped by difficulty
+    """
+    questions: Dict[str, List[str]] = {difficulty: [] for difficulty in DIFFICULTIES}
+    for line in text.splitlines():
+        match = _QUESTION_LINE_RE.match(line.strip("*- "))
+        if match:
+            questions[match.group(1).lower()].append(match.group(2))
+    return questions
+
+
+class QuestionBank:
+    """Technical questions indexed by canonical technology and difficulty"""
+
+    def __init__(self, path: Optional[str] = QUESTION_BANK_PATH, rng: Optional[random.Random] = None):
+        """
+        Load the bank from disk if it exists
+
+        Args:
+            path: Path of the JSON bank file, or None to keep the bank in memory only
+            rng: Random source for picking questions, seeded for reproducible question sets
+        """
+        self.path = path
+        self.rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._index: Dict[str, Dict[str, List[str]]] = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self._index = json.load(f)
+
+    def covers(self, tech: str) -> bool:
+        """Check whether the bank has questions for a technology"""
+        with self._lock:
+            return self._covers(canonical_tech(tech))
+
+    def _covers(self, tech: str) -> bool:
+        """covers() for a canonical name (lock must be held, since add() may run on a prefetch thread)"""
+        return any(self._index.get(tech, {}).values())
+
+    def technologies(self) -> List[str]:
+        """List the technologies the bank covers"""
+        with self._lock:
+            return sorted(tech for tech in self._index if self._covers(tech))
+
+    def add(self, tech: str, questions: Dict[str, List[str]]) -> None:
+        """
+        Add questions for a technology, skipping duplicates
+
+        Args:
+            tech: Technology name
+            questions: Questions grouped by difficulty
+        """
+        with self._lock:
+            self._add(canonical_tech(tech), questions)
+
+    def _add(self, tech: str, questions: Dict[str, List[str]]) -> None:
+        """add() for a canonical name (lock must be held)"""
+        levels = self._index.setdefault(tech, {})
+        for difficulty, items in questions.items():
+            existing = levels.setdefault(difficulty, [])
+            existing.extend(question for question in items if question not in existing)
+
+    def save(self) -> None:
+        """Write the bank to disk, replacing the previous file atomically
+
+        Questions other workers saved since this bank was loaded are merged in
+        first, so concurrent saves add up instead of the last writer winning.
+        """
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, _interprocess_lock(self.path):
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    for tech, questions in json.load(f).items():
+                        self._add(tech, questions)
+            # Per-process temporary name, so workers saving at the same time do not share a file
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+
+    def build_question_set(self, tech_stack: Union[str, List[str], None],
+                           num_questions: int = MAX_TECHNICAL_QUESTIONS) -> Tuple[List[str], List[str]]:
+        """
+        Assemble a candidate's question set from the bank
+
+        Questions are taken round-robin across the candidate's technologies,
+        from basic to advanced, so the set covers the stack and ramps up in difficulty.
+
+        Args:
+            tech_stack: The candidate's extracted tech stack
+            num_questions: Number of questions wanted
+
+        Returns:
+            Tuple[List[str], List[str]]: The questions, and the known technologies the bank does not
+            cover (terms that are not technologies are left out, see is_known_tech)
+        """
+        techs = canonical_tech_stack(tech_stack)
+        with self._lock:
+            covered = [tech for tech in techs if self._covers(tech)]
+            # Shuffled copies of each level, so candidates with the same stack get different questions
+            # and later additions cannot change the pools while they are used
+            pools = {
+                tech: {difficulty: self.rng.sample(items, len(items))
+                       for difficulty, items in self._index[tech].items()}
+                for tech in covered
+            }
+        uncovered = [tech for tech in techs if tech not in covered and is_known_tech(tech)]
+
+        questions: List[str] = []
+        for difficulty in DIFFICULTIES:
+            for tech in covered:
+                if len(questions) >= num_questions:
+                    return questions, uncovered
+                level = pools[tech].get(difficulty)
+                if level:
+                    questions.append(level.pop())
+
+        # Top up from whatever is left if the stack is small
+        for tech in covered:
+            for difficulty in DIFFICULTIES:
+                for question in pools[tech].get(difficulty, []):
+                    if len(questions) >= num_questions:
+                        return questions, uncovered
+                    questions.append(question)
+
+        return questions, uncovered
+
+
+def generate_questions(tech: str, generate: Callable[[str], Optional[str]],
+                       per_level: int = 3) -> Dict[str, List[str]]:
+    """
+    Generate questions for one technology with the LLM
+
+    Args:
+        tech: Technology name
+        generate: Function sending a one-shot prompt to the model and returning its text
+        per_level: Questions wanted per difficulty
+
+    Returns:
+        Dict[str, List[str]]: Questions grouped by difficulty (empty on failure)
+    """
+    text = generate(prompts.BANK_QUESTIONS_PROMPT.format(tech=tech, per_level=per_level))
+    return parse_generated_questions(text) if text else {}
+
+
+_bank: Optional[QuestionBank] = None
+_bank_lock = threading.Lock()
+
+
+def get_question_bank() -> QuestionBank:
+    """
+    Get the process-wide question bank
+
+    Returns:
+        QuestionBank: The shared bank instance
+    """
+    global _bank
+    with _bank_lock:
+        if _bank is None:
+            _bank = QuestionBank()
+        return _bank
+
+
+if __name__ == "__main__":
+    from llm_service import LLMService
+
+    parser = argparse.ArgumentParser(description="Pre-generate the technical question bank")
+    parser.add_argument("techs", nargs="*", help="Technologies to generate (default: common technologies)")
+    parser.add_argument("--per-level", type=int, default=3, help="Questions per difficulty level")
+    parser.add_argument("--refresh", action="store_true", help="Regenerate technologies already in the bank")
+    args = parser.parse_args()
+
+    bank = get_question_bank()
+    service = LLMService()
+    for tech in canonical_tech_stack(args.techs or COMMON_TECHNOLOGIES):
+        if bank.covers(tech) and not args.refresh:
+            continue
+        questions = generate_questions(tech, service.generate_text, args.per_level)
+        if any(questions.values()):
+            bank.add(tech, questions)
+            bank.save()  # Save as we go so an interrupted run keeps its progress
+            print(f"{tech}: {sum(len(items) for items in questions.values())} questions")
+        else:
+            print(f"{tech}: generation failed")
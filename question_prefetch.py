@@ -0,0 +1,143 @@
+# This file prepares technical question sets in the background before a screening asks for them
+# Generation starts as soon as a tech stack is extracted, so the question turn rarely waits on the model
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import List, Optional, Tuple
+
+from config import QUESTION_PREFETCH_MIN_HEADROOM, QUESTION_PREFETCH_WORKERS
+from llm_scheduler import PRIORITY_PREFETCH, SchedulerBusyError
+from metrics import get_metrics
+from question_bank import canonical_tech_stack
+
+
+def stack_key(tech_stack) -> Tuple[str, ...]:
+    """Identify a tech stack by its canonical technologies, so rewording it does not restart a prefetch"""
+    return tuple(canonical_tech_stack(tech_stack))
+
+
+class PrefetchTask:
+    """A question set being prepared for one session and tech stack"""
+
+    def __init__(self, key: Tuple[str, ...]):
+        self.key = key
+        self.future: Future = Future()
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """Stop before the next model call and discard the result"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout: Optional[float] = None) -> Optional[List[str]]:
+        """
+        Wait for the prepared questions
+
+        Args:
+            timeout: Seconds to wait, or None to wait until the task finishes
+
+        Returns:
+            Optional[List[str]]: The question set, or None if the task was cancelled,
+                timed out or could not cover the whole stack
+        """
+        if self.cancelled:
+            return None
+        try:
+            questions = self.future.result(timeout)
+        except FutureTimeoutError:
+            return None
+        return None if self.cancelled else questions
+
+
+class QuestionPrefetcher:
+    """Background workers that prepare question sets at the lowest scheduler priority
+
+    Prefetching is speculative, so it never competes with candidates' turns:
+    a task only calls the model while the shared rate limiter has spare
+    requests and the scheduler has an idle worker, and it stops early once
+    cancelled. Questions it generates are added to the question bank either way.
+    """
+
+    def __init__(self, workers: int = QUESTION_PREFETCH_WORKERS,
+                 min_headroom: float = QUESTION_PREFETCH_MIN_HEADROOM):
+        """
+        Args:
+            workers: Number of background threads
+            min_headroom: Requests that must remain in the rate limiter for a prefetch call to be made
+        """
+        self.min_headroom = min_headroom
+        self.metrics = get_metrics()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="question-prefetch")
+
+    def start(self, llm_service, tech_stack) -> Optional[PrefetchTask]:
+        """
+        Start preparing the question set for a tech stack
+
+        Args:
+            llm_service: The session's LLMService
+            tech_stack: The extracted tech stack
+
+        Returns:
+            Optional[PrefetchTask]: The running task, or None if there is nothing to prefetch
+        """
+        key = stack_key(tech_stack)
+        if not key:
+            return None
+        task = PrefetchTask(key)
+        self._executor.submit(self._run, task, llm_service, tech_stack)
+        self.metrics.increment("question_prefetch_total", outcome="started")
+        return task
+
+    def _should_stop(self, task: PrefetchTask, llm_service) -> bool:
+        """Check before each model call whether the prefetch should give up"""
+        if task.cancelled:
+            return True
+        if llm_service.rate_limiter.headroom() < self.min_headroom:
+            self.metrics.increment("question_prefetch_total", outcome="quota")
+            return True
+        return False
+
+    def _run(self, task: PrefetchTask, llm_service, tech_stack) -> None:
+        questions = None
+        if task.cancelled:
+            task.future.set_result(None)
+            return
+        try:
+            with self.metrics.span("question_prefetch"):
+                prepared, uncovered = llm_service.prepare_question_set(
+                    tech_stack, priority=PRIORITY_PREFETCH,
+                    should_stop=lambda: self._should_stop(task, llm_service)
+                )
+            # A partial set is not used; the question turn completes it from the (now warmer) bank
+            if not uncovered:
+                questions = prepared
+        except SchedulerBusyError:
+            self.metrics.increment("question_prefetch_total", outcome="busy")
+        except Exception as e:
+            print(f"Error prefetching technical questions: {e}")
+        task.future.set_result(questions)
+
+
+_prefetcher: Optional[QuestionPrefetcher] = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_question_prefetcher() -> QuestionPrefetcher:
+    """
+    Get the process-wide question prefetcher
+
+    Returns:
+        QuestionPrefetcher: The shared prefetcher
+    """
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = QuestionPrefetcher()
+        return _prefetcher
@@ -0,0 +1,306 @@
+# This file provides the process-wide rate limiter for Gemini API calls
+# All sessions using the same API key and model share one token bucket, held in the
+# shared quota ledger when several workers run against the same state backend
+
+import asyncio
+import hashlib
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from config import RATE_LIMIT_REQUESTS_PER_MINUTE, RATE_LIMIT_TOKENS_PER_MINUTE
+from state_backend import QuotaState, StateBackend, get_state_backend
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of tokens in a piece of text (~4 chars per token)"""
+    return max(1, len(text or "") // 4)
+
+
+def full_bucket(now: float, requests_per_minute: int, tokens_per_minute: Optional[int]) -> QuotaState:
+    """Bucket state with the whole per-minute budget available"""
+    return (float(requests_per_minute), float(tokens_per_minute or 0), now, 0.0)
+
+
+def apply_reservation(state: QuotaState, now: float, tokens: int, requests_per_minute: int,
+                      tokens_per_minute: Optional[int]) -> Tuple[QuotaState, float]:
+    """
+    Refill a bucket for the elapsed time and reserve one request from it
+
+    Levels may go negative: the debt is the queue of callers already scheduled
+    ahead, and the returned wait is how long until it is paid back.
+
+    Args:
+        state: (request_level, token_level, last_refill, blocked_until)
+        now: Current time on the same clock as last_refill
+        tokens: Estimated prompt tokens for the request
+        requests_per_minute: Request budget
+        tokens_per_minute: Token budget, or None for no token budget
+
+    Returns:
+        Tuple[QuotaState, float]: The new state and the seconds to wait before sending
+    """
+    request_level, token_level, last_refill, blocked_until = state
+    elapsed = max(0.0, now - last_refill)
+    request_level = min(float(requests_per_minute), request_level + elapsed * requests_per_minute / 60.0)
+    request_level -= 1
+    wait = 0.0
+    if request_level < 0:
+        wait = -request_level * 60.0 / requests_per_minute
+
+    if tokens_per_minute:
+        token_level = min(float(tokens_per_minute), token_level + elapsed * tokens_per_minute / 60.0)
+        token_level -= min(tokens, tokens_per_minute)
+        if token_level < 0:
+            wait = max(wait, -token_level * 60.0 / tokens_per_minute)
+
+    wait = max(wait, blocked_until - now)
+    return (request_level, token_level, now, blocked_until), wait
+
+
+class TokenBucketLimiter:
+    """Thread-safe token bucket with a requests-per-minute and tokens-per-minute budget
+
+    Callers reserve capacity up front and are given a scheduled start time.
+    Reservations can drive the bucket into debt, so concurrent callers are
+    spaced out in arrival order and total throughput tracks the quota ceiling.
+    """
+
+    def __init__(self, requests_per_minute: int = RATE_LIMIT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: Optional[int] = RATE_LIMIT_TOKENS_PER_MINUTE,
+                 clock=time.monotonic):
+        """
+        Initialize the bucket full
+
+        Args:
+            requests_per_minute: Maximum number of requests per minute
+            tokens_per_minute: Maximum number of prompt tokens per minute, or None for no token budget
+            clock: Monotonic clock function, overridable for testing
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._bucket = full_bucket(clock(), requests_per_minute, tokens_per_minute)
+
+        # Statistics
+        self._queue_depth = 0
+        self._total_acquired = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._last_wait = 0.0
+
+    def _reserve_capacity(self, tokens: int) -> float:
+        """Take one reservation from the bucket (lock must be held) and return the wait"""
+        self._bucket, wait = apply_reservation(
+            self._bucket, self._clock(), tokens, self.requests_per_minute, self.tokens_per_minute
+        )
+        return wait
+
+    def _defer_capacity(self, seconds: float) -> None:
+        """Block the bucket for the given time (lock must be held)"""
+        request_level, token_level, last_refill, blocked_until = self._bucket
+        self._bucket = (request_level, token_level, last_refill, max(blocked_until, self._clock() + seconds))
+
+    def _peek_capacity(self) -> QuotaState:
+        """Get the bucket state without changing it (lock must be held)"""
+        return self._bucket
+
+    def headroom(self) -> float:
+        """
+        Get how many requests could start right now without waiting
+
+        Used by optional work (such as prefetching) to stay out of the way of candidates' turns.
+
+        Returns:
+            float: Requests available immediately (0 while the bucket is in debt or deferred)
+        """
+        with self._lock:
+            request_level, _, last_refill, blocked_until = self._peek_capacity()
+        now = self._clock()
+        if blocked_until > now:
+            return 0.0
+        refilled = request_level + max(0.0, now - last_refill) * self.requests_per_minute / 60.0
+        return max(0.0, min(float(self.requests_per_minute), refilled))
+
+    def reserve(self, tokens: int = 1) -> float:
+        """
+        Reserve capacity for one request and return how long the caller must wait
+
+        Args:
+            tokens: Estimated prompt tokens for the request
+
+        Returns:
+            float: Seconds until the reservation may be used (0 if immediately)
+        """
+        with self._lock:
+            wait = self._reserve_capacity(tokens)
+
+            self._total_acquired += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            self._last_wait = wait
+            return wait
+
+    def acquire(self, tokens: int = 1) -> float:
+        """
+        Block the calling thread until it is its turn to make a request
+
+        Args:
+            tokens: Estimated prompt tokens for the request
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        wait = self.reserve(tokens)
+        if wait <= 0:
+            return 0.0
+
+        with self._lock:
+            self._queue_depth += 1
+        try:
+            # The slot is already reserved, so a plain sleep until it starts is all that is needed;
+            # a later defer() pushes back new reservations, not this one
+            time.sleep(wait)
+        finally:
+            with self._lock:
+                self._queue_depth -= 1
+        return wait
+
+    async def acquire_async(self, tokens: int = 1) -> float:
+        """
+        Wait without blocking the event loop until it is the caller's turn
+
+        Args:
+            tokens: Estimated prompt tokens for the request
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        wait = self.reserve(tokens)
+        if wait <= 0:
+            return 0.0
+
+        with self._lock:
+            self._queue_depth += 1
+        try:
+            await asyncio.sleep(wait)
+        finally:
+            with self._lock:
+                self._queue_depth -= 1
+        return wait
+
+    def defer(self, seconds: float) -> None:
+        """
+        Push back every future reservation, e.g. after the API reported a quota error
+
+        Args:
+            seconds: Minimum delay before the next request may start
+        """
+        with self._lock:
+            self._defer_capacity(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get queue depth and wait time statistics
+
+        Returns:
+            Dict[str, Any]: Current limiter statistics
+        """
+        with self._lock:
+            return {
+                "queue_depth": self._queue_depth,
+                "total_acquired": self._total_acquired,
+                "total_wait_seconds": self._total_wait,
+                "average_wait_seconds": self._total_wait / self._total_acquired if self._total_acquired else 0.0,
+                "max_wait_seconds": self._max_wait,
+                "last_wait_seconds": self._last_wait,
+            }
+
+
+class LedgerRateLimiter(TokenBucketLimiter):
+    """Token bucket whose levels live in the shared state backend's quota ledger
+
+    Every worker process reserves from the same ledger entry, so the quota is
+    respected cluster-wide. Waiting still happens locally in each worker.
+    """
+
+    def __init__(self, backend: StateBackend, ledger_key: str,
+                 requests_per_minute: int = RATE_LIMIT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: Optional[int] = RATE_LIMIT_TOKENS_PER_MINUTE):
+        """
+        Args:
+            backend: Shared state backend holding the ledger
+            ledger_key: Ledger entry for this API key and model
+            requests_per_minute: Maximum number of requests per minute across all workers
+            tokens_per_minute: Maximum number of prompt tokens per minute across all workers
+        """
+        # Wall-clock time, since monotonic clocks are not comparable between processes
+        super().__init__(requests_per_minute, tokens_per_minute, clock=time.time)
+        self.backend = backend
+        self.ledger_key = ledger_key
+
+    def _reserve_capacity(self, tokens: int) -> float:
+        def update(state):
+            now = self._clock()
+            state = state or full_bucket(now, self.requests_per_minute, self.tokens_per_minute)
+            return apply_reservation(state, now, tokens, self.requests_per_minute, self.tokens_per_minute)
+        return self.backend.update_quota(self.ledger_key, update)
+
+    def _defer_capacity(self, seconds: float) -> None:
+        def update(state):
+            now = self._clock()
+            request_level, token_level, last_refill, blocked_until = (
+                state or full_bucket(now, self.requests_per_minute, self.tokens_per_minute)
+            )
+            return (request_level, token_level, last_refill, max(blocked_until, now + seconds)), None
+        self.backend.update_quota(self.ledger_key, update)
+
+    def _peek_capacity(self) -> QuotaState:
+        state = self.backend.read_quota(self.ledger_key)
+        return state or full_bucket(self._clock(), self.requests_per_minute, self.tokens_per_minute)
+
+
+class UnlimitedRateLimiter(TokenBucketLimiter):
+    """Limiter that never waits, for backends that do not call a quota-limited API (such as replay)"""
+
+    def __init__(self):
+        super().__init__(requests_per_minute=RATE_LIMIT_REQUESTS_PER_MINUTE, tokens_per_minute=None)
+
+    def _reserve_capacity(self, tokens: int) -> float:
+        return 0.0
+
+    def _defer_capacity(self, seconds: float) -> None:
+        pass
+
+    def headroom(self) -> float:
+        return float("inf")
+
+
+_limiters: Dict[Tuple[str, str], TokenBucketLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(api_key: Optional[str], model_name: str) -> TokenBucketLimiter:
+    """
+    Get the process-wide limiter for an API key and model, creating it if needed
+
+    Args:
+        api_key: The API key the requests are billed to
+        model_name: The model being called
+
+    Returns:
+        TokenBucketLimiter: The shared limiter
+    """
+    # Key on a digest so the raw API key is not kept around as a dict key
+    key_digest = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+    key = (key_digest, model_name)
+    with _limiters_lock:
+        if key not in _limiters:
+            backend = get_state_backend()
+            if backend.shared:
+                # Other workers draw on the same quota, so reserve from the shared ledger
+                _limiters[key] = LedgerRateLimiter(backend, f"{key_digest}:{model_name}")
+            else:
+                _limiters[key] = TokenBucketLimiter()
+        return _limiters[key]
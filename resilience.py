@@ -0,0 +1,294 @@
+# This file decides how failed Gemini API calls are retried
+# Errors are classified, retries back off with jitter, and a per-key circuit breaker fails fast during outages
+
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, NamedTuple, Optional, Tuple
+
+from config import (
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS,
+    RETRY_BASE_DELAY_SECONDS, RETRY_BUDGET_MIN_RETRIES, RETRY_BUDGET_RATIO,
+    RETRY_BUDGET_WINDOW_SECONDS, RETRY_MAX_ATTEMPTS, RETRY_MAX_DELAY_SECONDS,
+)
+
+# Error kinds
+RATE_LIMITED = "rate_limited"  # Quota exhausted; retry after the server's hint
+TRANSIENT = "transient"  # Upstream or network hiccup; retry with backoff
+PERMANENT = "permanent"  # Bad request, auth or safety block; retrying cannot help
+
+# google.api_core exception class names, matched by name so the SDK stays an optional import here
+_RATE_LIMITED_ERRORS = {"ResourceExhausted", "TooManyRequests"}
+_TRANSIENT_ERRORS = {
+    "ServiceUnavailable", "DeadlineExceeded", "InternalServerError", "GatewayTimeout", "BadGateway",
+    "Aborted", "Unknown", "RetryError",
+}
+_TRANSIENT_STATUS = {408, 500, 502, 503, 504}
+
+# Retry hints as they appear in quota error messages, e.g. "Please retry in 21.5s" or "retry_delay { seconds: 21 }"
+_RETRY_HINT_RE = re.compile(
+    r'retry in (?P<value>\d+(?:\.\d+)?)\s*(?P<unit>ms|s)\b|retry_delay\s*\{\s*seconds:\s*(?P<seconds>\d+)',
+    re.IGNORECASE
+)
+
+
+class ErrorClass(NamedTuple):
+    """How a failed call should be treated"""
+    kind: str
+    retry_after: Optional[float] = None  # Server-provided delay before retrying, in seconds
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """Get the HTTP status of an SDK error, if it carries one"""
+    code = getattr(error, "code", None)
+    if code is None:
+        return None
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_retry_after(error: BaseException) -> Optional[float]:
+    """
+    Find the server's retry hint on an error
+
+    Args:
+        error: The exception raised by the API call
+
+    Returns:
+        Optional[float]: Seconds to wait before retrying, or None if the error carries no hint
+    """
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is not None:
+        return float(retry_after)
+
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers and headers.get("Retry-After"):
+        try:
+            return float(headers["Retry-After"])
+        except ValueError:
+            pass
+
+    match = _RETRY_HINT_RE.search(str(error))
+    if not match:
+        return None
+    if match.group("seconds"):
+        return float(match.group("seconds"))
+    value = float(match.group("value"))
+    return value / 1000.0 if match.group("unit").lower() == "ms" else value
+
+
+def classify_error(error: BaseException) -> ErrorClass:
+    """
+    Classify an API error as rate limited, transient or permanent
+
+    Args:
+        error: The exception raised by the API call
+
+    Returns:
+        ErrorClass: The error kind and any retry hint
+    """
+    name = type(error).__name__
+    status = _status_code(error)
+    # Some transports only surface the status in the message text, e.g. "429 Resource has been exhausted"
+    if status == 429 or name in _RATE_LIMITED_ERRORS or str(error).startswith("429"):
+        return ErrorClass(RATE_LIMITED, parse_retry_after(error))
+    if status in _TRANSIENT_STATUS or name in _TRANSIENT_ERRORS or isinstance(error, (ConnectionError, TimeoutError)):
+        return ErrorClass(TRANSIENT, parse_retry_after(error))
+    return ErrorClass(PERMANENT)
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter"""
+
+    def __init__(self, max_attempts: int = RETRY_MAX_ATTEMPTS, base_delay: float = RETRY_BASE_DELAY_SECONDS,
+                 max_delay: float = RETRY_MAX_DELAY_SECONDS):
+        """
+        Args:
+            max_attempts: Attempts per request, including the first
+            base_delay: Backoff ceiling for the first retry, in seconds
+            max_delay: Upper limit for any single backoff, in seconds
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Get the delay before the next attempt
+
+        Full jitter spreads sessions that failed together over the whole backoff
+        window, so they do not come back in one synchronized burst. A server hint
+        is a floor: the jittered delay is used only when it is longer.
+
+        Args:
+            attempt: Zero-based number of the attempt that just failed
+            retry_after: Server-provided delay, if any
+
+        Returns:
+            float: Seconds to wait
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        delay = random.uniform(0, ceiling)
+        return max(delay, retry_after or 0.0)
+
+
+class RetryBudget:
+    """Caps retries at a share of recent requests so retries cannot multiply load during an outage"""
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, min_retries: int = RETRY_BUDGET_MIN_RETRIES,
+                 window_seconds: float = RETRY_BUDGET_WINDOW_SECONDS, clock=time.monotonic):
+        """
+        Args:
+            ratio: Retries allowed per request made in the window
+            min_retries: Retries always allowed in the window
+            window_seconds: Length of the sliding window
+            clock: Monotonic clock function, overridable for testing
+        """
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._requests: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+
+    def _trim(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        for events in (self._requests, self._retries):
+            while events and events[0] < cutoff:
+                events.popleft()
+
+    def record_request(self) -> None:
+        """Count a first attempt"""
+        with self._lock:
+            now = self._clock()
+            self._trim(now)
+            self._requests.append(now)
+
+    def try_spend(self) -> bool:
+        """
+        Take one retry from the budget
+
+        Returns:
+            bool: True if the retry may go ahead
+        """
+        with self._lock:
+            now = self._clock()
+            self._trim(now)
+            if len(self._retries) >= max(self.min_retries, self.ratio * len(self._requests)):
+                return False
+            self._retries.append(now)
+            return True
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over consecutive retryable failures"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_seconds: float = CIRCUIT_RESET_SECONDS, clock=time.monotonic):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_seconds: Time the circuit stays open before letting a trial request through
+            clock: Monotonic clock function, overridable for testing
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """
+        Check whether a request may be sent now
+
+        While open every request is refused. Once the reset time has passed a
+        single trial request is let through; its outcome closes or reopens the circuit.
+
+        Returns:
+            bool: True if the request may go ahead
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self.reset_seconds:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Give up a half-open trial slot without an outcome, e.g. when the request never reached the API"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self, open_for: Optional[float] = None) -> None:
+        """
+        Count a retryable failure
+
+        Args:
+            open_for: Keep the circuit open at least this long if it opens (e.g. a quota retry hint)
+        """
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                # Shift the open time forward so the circuit stays open for max(reset_seconds, open_for)
+                self._opened_at = self._clock() + max(0.0, (open_for or 0.0) - self.reset_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self._failures}
+
+
+_guards: Dict[Tuple[str, str], Tuple[CircuitBreaker, RetryBudget]] = {}
+_guards_lock = threading.Lock()
+
+
+def get_circuit_guards(api_key: Optional[str], model_name: str) -> Tuple[CircuitBreaker, RetryBudget]:
+    """
+    Get the process-wide circuit breaker and retry budget for an API key and model
+
+    Args:
+        api_key: The API key the requests are billed to
+        model_name: The model being called
+
+    Returns:
+        Tuple[CircuitBreaker, RetryBudget]: The shared breaker and budget
+    """
+    key_digest = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+    key = (key_digest, model_name)
+    with _guards_lock:
+        if key not in _guards:
+            _guards[key] = (CircuitBreaker(), RetryBudget())
+        return _guards[key]
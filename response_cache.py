@@ -0,0 +1,206 @@
+# This file provides the response cache for deterministic prompts
+# An in-memory LRU sits in front of an on-disk SQLite store shared by every session
+
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config import (RESPONSE_CACHE_EVICT_INTERVAL_SECONDS, RESPONSE_CACHE_MEMORY_ENTRIES,
+                    RESPONSE_CACHE_PATH, RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_VARIANTS)
+
+
+class ResponseCache:
+    """Cache of model responses keyed by model, prompt and preceding history
+
+    Each key holds a pool of up to `variants` responses. Lookups miss until the
+    pool is full, so the first sessions generate the variants and later sessions
+    are served a random one, keeping some variety without using quota.
+    Expired rows are purged from disk on open and then at most once per
+    eviction interval from put(), so the file does not grow without bound.
+    """
+
+    def __init__(self, path: Optional[str] = RESPONSE_CACHE_PATH,
+                 max_memory_entries: int = RESPONSE_CACHE_MEMORY_ENTRIES,
+                 ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS,
+                 variants: int = RESPONSE_CACHE_VARIANTS,
+                 evict_interval_seconds: float = RESPONSE_CACHE_EVICT_INTERVAL_SECONDS):
+        """
+        Initialize the cache
+
+        Args:
+            path: Path of the SQLite file, or None to keep the cache in memory only
+            max_memory_entries: Number of keys held in the in-memory LRU
+            ttl_seconds: Age after which a cached response is discarded
+            variants: Number of distinct responses kept per key
+            evict_interval_seconds: Minimum time between purges of expired rows triggered by put()
+        """
+        self.max_memory_entries = max_memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.variants = max(1, variants)
+        self.evict_interval_seconds = evict_interval_seconds
+        self._last_eviction = time.monotonic()
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, List[Tuple[float, str]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT NOT NULL, response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_key ON response_cache (key)")
+            self._conn.commit()
+            self.evict_expired()
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str, history: Sequence[Tuple[str, str]],
+                 system_instruction: Optional[str] = None) -> str:
+        """
+        Build a cache key from the model, system instruction, prompt and preceding (role, text) history
+
+        The system instruction is part of the key, so replies written under an
+        older system prompt are not served after it changes.
+
+        Returns:
+            str: Hex digest identifying the request
+        """
+        payload = json.dumps([model_name, system_instruction, prompt, list(history)],
+                             ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _fresh(self, entries: List[Tuple[float, str]]) -> List[Tuple[float, str]]:
+        """Drop entries older than the TTL"""
+        cutoff = time.time() - self.ttl_seconds
+        return [entry for entry in entries if entry[0] >= cutoff]
+
+    def _remember(self, key: str, entries: List[Tuple[float, str]]) -> None:
+        """Store entries in the LRU, evicting the least recently used key (lock must be held)"""
+        self._memory[key] = entries
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _load(self, key: str, variants: int) -> List[Tuple[float, str]]:
+        """Get the fresh entries for a key, reading from disk unless memory holds a full pool (lock must be held)"""
+        entries = self._memory.get(key)
+        if (entries is None or len(entries) < variants) and self._conn is not None:
+            rows = self._conn.execute(
+                "SELECT created_at, response FROM response_cache WHERE key = ?", (key,)
+            ).fetchall()
+            entries = [(row[0], row[1]) for row in rows]
+        entries = self._fresh(entries or [])
+        self._remember(key, entries)
+        return entries
+
+    def get(self, key: str, variants: Optional[int] = None) -> Optional[str]:
+        """
+        Look up a cached response
+
+        Args:
+            key: Key from make_key
+            variants: Pool size for this key, overriding the cache default
+
+        Returns:
+            Optional[str]: A random cached variant, or None on a miss or while the pool is filling
+        """
+        variants = variants or self.variants
+        with self._lock:
+            entries = self._load(key, variants)
+            if len(entries) < variants:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return random.choice(entries)[1]
+
+    def put(self, key: str, response: str, variants: Optional[int] = None) -> None:
+        """
+        Add a response to the pool for a key
+
+        Args:
+            key: Key from make_key
+            response: The model's response text
+            variants: Pool size for this key, overriding the cache default
+        """
+        variants = variants or self.variants
+        with self._lock:
+            entries = self._load(key, variants)
+            if len(entries) >= variants or any(text == response for _, text in entries):
+                return
+            entry = (time.time(), response)
+            self._remember(key, entries + [entry])
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT INTO response_cache (key, response, created_at) VALUES (?, ?, ?)",
+                        (key, response, entry[0])
+                    )
+            if time.monotonic() - self._last_eviction >= self.evict_interval_seconds:
+                self._evict_expired()
+
+    def evict_expired(self) -> int:
+        """
+        Remove expired responses from memory and disk
+
+        Returns:
+            int: Number of responses removed from disk
+        """
+        with self._lock:
+            return self._evict_expired()
+
+    def _evict_expired(self) -> int:
+        """Remove expired responses from memory and disk (lock must be held)"""
+        cutoff = time.time() - self.ttl_seconds
+        self._last_eviction = time.monotonic()
+        for key in list(self._memory):
+            self._memory[key] = self._fresh(self._memory[key])
+        if self._conn is None:
+            return 0
+        with self._conn:
+            return self._conn.execute("DELETE FROM response_cache WHERE created_at < ?", (cutoff,)).rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters
+
+        Returns:
+            Dict[str, Any]: Cache statistics
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Get the process-wide response cache
+
+    Returns:
+        ResponseCache: The shared cache instance
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
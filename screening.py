@@ -0,0 +1,238 @@
+# This file contains the per-candidate screening flow shared by app.py and the load-test harness
+# A ScreeningSession owns the conversation history, the LLM service and the extracted candidate info
+
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from candidate_store import CandidateStore
+from config import QUESTION_PREFETCH_ENABLED, QUESTION_PREFETCH_WAIT_SECONDS
+from data_handler import CandidateInfo
+from llm_scheduler import SchedulerBusyError
+from llm_service import LLMService
+from metrics import get_metrics
+from question_prefetch import PrefetchTask, QuestionPrefetcher, get_question_prefetcher, stack_key
+from screening_state import TECH_STACK, ScreeningState
+
+RATE_LIMIT_MESSAGE = "⚠️ API rate limit exceeded. Try again later."
+
+# Bumped whenever the checkpoint layout changes, so old checkpoints are not misread
+CHECKPOINT_VERSION = 1
+
+
+class ScreeningSession:
+    """One candidate's screening conversation"""
+
+    def __init__(self, llm_service: Optional[LLMService] = None, store: Optional[CandidateStore] = None,
+                 prefetcher: Optional[QuestionPrefetcher] = None):
+        """
+        Initialize a new session
+
+        Args:
+            llm_service: The LLM service to use, a new default one if not given
+            store: Candidate store to save to when the screening ends (the configured store if None)
+            prefetcher: Background question prefetcher (the shared one if None and prefetch is enabled)
+        """
+        self.llm_service = llm_service or LLMService()
+        self.store = store
+        self.prefetcher = prefetcher or (get_question_prefetcher() if QUESTION_PREFETCH_ENABLED else None)
+        self.prefetch: Optional[PrefetchTask] = None  # Question set being prepared for the current tech stack
+        self.candidate_info = CandidateInfo()
+        self.conversation_history: List[Dict[str, str]] = []
+        self.state = ScreeningState()  # Stage and progress, updated once per message
+        self.conversation_started = False
+        self.questions_asked = False
+
+    def start(self) -> str:
+        """
+        Open the conversation with the assistant's greeting
+
+        Returns:
+            str: The greeting
+        """
+        greeting = self.llm_service.start_conversation()
+        self._append("assistant", greeting)
+        self.conversation_started = True
+        return greeting
+
+    def respond_stream(self, user_input: str) -> Iterator[str]:
+        """
+        Handle one candidate message, yielding the assistant's reply as it is generated
+
+        Args:
+            user_input: The candidate's message
+
+        Returns:
+            Iterator[str]: Chunks of the reply text
+
+        Raises:
+            SchedulerBusyError: If the LLM scheduler is at capacity; the message is not recorded
+        """
+        metrics = get_metrics()
+        started = time.perf_counter()
+        state_before = self.state.to_checkpoint()
+        candidate_before = self.candidate_info.to_checkpoint()
+        self._append("user", user_input)
+
+        # Update candidate info from conversation
+        extracted_info = self.candidate_info.extract_info_from_conversation(self.conversation_history)
+        for field, value in extracted_info.items():
+            self.candidate_info.update_field(field, value)
+        self.llm_service.update_candidate_context(self.candidate_info.to_dict())
+        self.state.update_candidate(self.candidate_info)
+
+        tech_stack = self.candidate_info.get_field("tech_stack")
+        asking_questions = tech_stack and self.state.stage == TECH_STACK and not self.questions_asked
+        if not asking_questions:
+            self._update_prefetch(tech_stack)
+        try:
+            if asking_questions:
+                # The candidate just answered the tech stack question: serve questions from the bank
+                route = "questions"
+                response = self.llm_service.get_technical_questions(
+                    user_input, tech_stack, self._take_prefetched(tech_stack)
+                )
+                self.questions_asked = True
+                metrics.observe("turn_first_chunk_seconds", time.perf_counter() - started, route=route)
+                yield response
+            else:
+                route = "chat"
+                response = ""
+                for chunk in self.llm_service.get_response_stream(user_input):
+                    if not response:
+                        metrics.observe("turn_first_chunk_seconds", time.perf_counter() - started, route=route)
+                    response += chunk
+                    yield chunk
+        except SchedulerBusyError:
+            # The request was refused before reaching the model: forget the message so it can be sent again
+            self.conversation_history.pop()
+            self.state.restore_checkpoint(state_before)
+            self._restore_candidate(candidate_before)
+            raise
+
+        # Handle NoneType response
+        if not response or response == "Error: No response from API.":
+            metrics.increment("turn_fallbacks_total")
+            response = RATE_LIMIT_MESSAGE
+            yield response
+
+        self._append("assistant", response)
+
+        # Persist the candidate once, when the screening ends
+        if self.llm_service.conversation_ended and not self.candidate_info.get_field("conversation_complete"):
+            self._cancel_prefetch()
+            self.candidate_info.mark_complete()
+            with metrics.span("candidate_save"):
+                print(self.candidate_info.save_to_store(self.store))
+
+        metrics.observe("turn_seconds", time.perf_counter() - started, route=route)
+        metrics.increment("turns_total", route=route)
+
+    def _restore_candidate(self, checkpoint: Dict[str, Any]) -> None:
+        """Undo what a refused message changed in the candidate info, the LLM context and the prefetch"""
+        self.candidate_info.restore_checkpoint(checkpoint)
+        self.llm_service.update_candidate_context(self.candidate_info.to_dict())
+        self.state.update_candidate(self.candidate_info)
+        if self.prefetch and self.prefetch.key != stack_key(self.candidate_info.get_field("tech_stack")):
+            self._cancel_prefetch()
+
+    def _update_prefetch(self, tech_stack) -> None:
+        """Start preparing questions once a tech stack is known, restarting if the stack changes"""
+        if not self.prefetcher or self.questions_asked or self.llm_service.conversation_ended:
+            return
+        key = stack_key(tech_stack)
+        if self.prefetch and self.prefetch.key == key:
+            # Same stack: keep the running task, or retry one that ended without a full set
+            if not self.prefetch.done() or self.prefetch.result() is not None:
+                return
+        self._cancel_prefetch()
+        self.prefetch = self.prefetcher.start(self.llm_service, tech_stack)
+
+    def _take_prefetched(self, tech_stack) -> Optional[List[str]]:
+        """Get the prefetched question set if it was prepared for this stack, waiting briefly if it is running"""
+        task, self.prefetch = self.prefetch, None
+        if task is None:
+            return None
+        questions = task.result(QUESTION_PREFETCH_WAIT_SECONDS) if task.key == stack_key(tech_stack) else None
+        task.cancel()
+        get_metrics().increment("question_prefetch_total", outcome="used" if questions else "discarded")
+        return questions
+
+    def _cancel_prefetch(self) -> None:
+        """Stop and discard any running prefetch"""
+        if self.prefetch:
+            self.prefetch.cancel()
+            self.prefetch = None
+
+    def _append(self, role: str, content: str) -> None:
+        """Add a message to the history and advance the screening state"""
+        self.conversation_history.append({"role": role, "content": content})
+        self.state.observe(role, content)
+
+    def respond(self, user_input: str) -> str:
+        """
+        Handle one candidate message and return the complete reply
+
+        Args:
+            user_input: The candidate's message
+
+        Returns:
+            str: The assistant's reply
+        """
+        return "".join(self.respond_stream(user_input))
+
+    def to_checkpoint(self) -> Dict[str, Any]:
+        """
+        Capture everything needed to resume this session in another process
+
+        Returns:
+            Dict[str, Any]: JSON-serializable session state
+        """
+        return {
+            "version": CHECKPOINT_VERSION,
+            "conversation_history": self.conversation_history,
+            "conversation_started": self.conversation_started,
+            "questions_asked": self.questions_asked,
+            "state": self.state.to_checkpoint(),
+            "candidate": self.candidate_info.to_checkpoint(),
+            "llm": self.llm_service.to_checkpoint(),
+        }
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint: Dict[str, Any], llm_service: Optional[LLMService] = None,
+                        store: Optional[CandidateStore] = None,
+                        prefetcher: Optional[QuestionPrefetcher] = None) -> "ScreeningSession":
+        """
+        Resume a session from a checkpoint without calling the model
+
+        Args:
+            checkpoint: State returned by to_checkpoint
+            llm_service: The LLM service to restore into, a new default one if not given
+            store: Candidate store to save to when the screening ends
+            prefetcher: Background question prefetcher
+
+        Returns:
+            ScreeningSession: The resumed session
+
+        A prefetch in progress is not part of the checkpoint; it restarts on the next turn.
+        """
+        if checkpoint.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version: {checkpoint.get('version')}")
+        session = cls(llm_service, store, prefetcher)
+        session.conversation_history = list(checkpoint["conversation_history"])
+        session.conversation_started = checkpoint["conversation_started"]
+        session.questions_asked = checkpoint["questions_asked"]
+        session.candidate_info.restore_checkpoint(checkpoint["candidate"])
+        session.state.restore_checkpoint(checkpoint["state"])
+        session.state.update_candidate(session.candidate_info)
+        session.llm_service.restore_checkpoint(checkpoint["llm"])
+        return session
+
+    def reset(self) -> None:
+        """Start over with a fresh conversation and candidate record"""
+        self._cancel_prefetch()
+        self.conversation_history = []
+        self.state = ScreeningState()
+        self.llm_service.reset_conversation()
+        self.candidate_info = CandidateInfo()
+        self.conversation_started = False
+        self.questions_asked = False
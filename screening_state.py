@@ -0,0 +1,170 @@
+# This file tracks where a screening conversation is, one message at a time
+# Stage cues are matched with precompiled word-boundary patterns, exit intents with anchored ones
+
+import re
+from typing import Any, Dict, List
+
+from config import EXIT_KEYWORDS, EXIT_TARGETS
+
+# Stages, in the order a screening normally moves through them
+GREETING = "greeting"
+INFO_COLLECTION = "info_collection"
+TECH_STACK = "tech_stack"
+TECHNICAL_QUESTIONS = "technical_questions"
+CLOSING = "closing"
+
+REQUIRED_FIELDS = [
+    "full_name", "email", "phone", "years_experience",
+    "desired_positions", "current_location", "tech_stack"
+]
+
+# Assistant messages up to this count are still part of the greeting
+GREETING_ASSISTANT_MESSAGES = 2
+
+
+def _keyword_pattern(keywords: List[str]) -> str:
+    """Alternation of whole-word keywords, longest first so "goodbye" wins over "bye" """
+    return "|".join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True))
+
+
+# Courtesy words allowed around an exit, as in "Thanks, bye" or "ok quit"
+_COURTESY = r'(?:ok(?:ay)?|thanks(?:\s+a\s+lot)?|thank\s+you|cheers|alright)'
+
+# Exit intent: the whole message is an exit keyword or "end (the) chat/interview/...", so
+# "bye!" and "End the interview." match but "I'm a front end developer" and "how do I quit vim?" do not
+EXIT_INTENT_RE = re.compile(
+    rf'\s*(?:{_COURTESY}\W+)?'
+    rf'(?:{_keyword_pattern(EXIT_KEYWORDS)}|end\s+(?:the\s+|this\s+)?(?:{_keyword_pattern(EXIT_TARGETS)}))'
+    rf'(?:\W+{_COURTESY})?\W*',
+    re.IGNORECASE
+)
+
+# Stage cues in an assistant message, one named group per cue so a single pass finds them all
+_STAGE_CUES_RE = re.compile(
+    r'\b(?:(?P<technical_question>technical questions?)'
+    r'|(?P<tech_stack>tech stack|programming languages)'
+    r'|(?P<closing>thank you|goodbye|good luck))\b',
+    re.IGNORECASE
+)
+
+
+def is_exit_intent(text: str) -> bool:
+    """
+    Check whether a candidate message asks to end the conversation
+
+    Args:
+        text: The candidate's message
+
+    Returns:
+        bool: True if the whole message is an exit keyword or asks to end the chat
+    """
+    return EXIT_INTENT_RE.fullmatch(text) is not None
+
+
+def stage_for_message(content: str, assistant_messages: int) -> str:
+    """
+    Determine the stage an assistant message puts the conversation in
+
+    Args:
+        content: The assistant's message
+        assistant_messages: Number of assistant messages so far, including this one
+
+    Returns:
+        str: The stage name
+    """
+    cues = {match.lastgroup for match in _STAGE_CUES_RE.finditer(content)}
+    if "technical_question" in cues and "?" in content:
+        return TECHNICAL_QUESTIONS
+    if "tech_stack" in cues:
+        return TECH_STACK
+    if assistant_messages <= GREETING_ASSISTANT_MESSAGES:
+        return GREETING
+    if "closing" in cues:
+        return CLOSING
+    return INFO_COLLECTION
+
+
+class ScreeningState:
+    """Screening stage and progress, updated incrementally as messages arrive"""
+
+    def __init__(self):
+        self.stage = GREETING
+        self.assistant_messages = 0
+        self.user_messages = 0
+        self.exit_requested = False  # Whether the latest candidate message asked to leave
+        self.collected_info: Dict[str, Any] = {}
+        self.missing_fields: List[str] = list(REQUIRED_FIELDS)
+        self._cursor = 0
+
+    def observe(self, role: str, content: str) -> None:
+        """
+        Update the state with one new message
+
+        Args:
+            role: "user" or "assistant"
+            content: The message text
+        """
+        if role == "assistant":
+            self.assistant_messages += 1
+            self.stage = stage_for_message(content, self.assistant_messages)
+        elif role == "user":
+            self.user_messages += 1
+            self.exit_requested = is_exit_intent(content)
+        self._cursor += 1
+
+    def observe_history(self, conversation_history: List[Dict[str, str]]) -> None:
+        """
+        Catch up with a conversation history, observing only messages not seen yet
+
+        Args:
+            conversation_history: List of conversation messages
+        """
+        # A shorter history means it was reset or replaced, so start over
+        if len(conversation_history) < self._cursor:
+            self.__init__()
+        for message in conversation_history[self._cursor:]:
+            self.observe(message.get("role", ""), message.get("content") or "")
+
+    def update_candidate(self, candidate_info) -> None:
+        """
+        Refresh collected and missing fields from the candidate record
+
+        Args:
+            candidate_info: The session's CandidateInfo
+        """
+        self.missing_fields = candidate_info.get_missing_fields()
+        self.collected_info = {
+            field: candidate_info.get_field(field)
+            for field in REQUIRED_FIELDS if field not in self.missing_fields
+        }
+
+    def to_checkpoint(self) -> Dict[str, Any]:
+        """Capture the state for a session checkpoint"""
+        return {
+            "stage": self.stage,
+            "assistant_messages": self.assistant_messages,
+            "user_messages": self.user_messages,
+            "exit_requested": self.exit_requested,
+            "cursor": self._cursor,
+        }
+
+    def restore_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        """Restore state captured by to_checkpoint"""
+        self.stage = checkpoint["stage"]
+        self.assistant_messages = checkpoint["assistant_messages"]
+        self.user_messages = checkpoint["user_messages"]
+        self.exit_requested = checkpoint["exit_requested"]
+        self._cursor = checkpoint["cursor"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the state in the shape returned by utils.analyze_conversation_state
+
+        Returns:
+            Dict[str, Any]: current_stage, collected_info and missing_info
+        """
+        return {
+            "current_stage": self.stage,
+            "collected_info": dict(self.collected_info),
+            "missing_info": list(self.missing_fields),
+        }
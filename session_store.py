@@ -0,0 +1,94 @@
+# This file stores per-session checkpoints so screenings survive restarts and reloads
+# A checkpoint is written after every turn and keyed by the session token in the page URL
+
+import json
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+from config import SESSION_STORE_BACKEND, SESSION_TTL_SECONDS, STATE_BACKEND
+from state_backend import STATE_BACKENDS, StateBackend, get_state_backend
+
+
+def encode_checkpoint(checkpoint: Dict[str, Any]) -> bytes:
+    """Serialize a checkpoint to compact, compressed JSON"""
+    return zlib.compress(json.dumps(checkpoint, ensure_ascii=False, separators=(',', ':')).encode("utf-8"))
+
+
+def decode_checkpoint(payload: bytes) -> Dict[str, Any]:
+    """Deserialize a checkpoint written by encode_checkpoint"""
+    return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+
+class SessionStore:
+    """Session checkpoints kept in the shared state backend, so any worker can resume any session"""
+
+    def __init__(self, backend: StateBackend):
+        """
+        Args:
+            backend: Where the encoded checkpoints are stored
+        """
+        self.backend = backend
+
+    def save(self, token: str, checkpoint: Dict[str, Any]) -> None:
+        """
+        Store the latest checkpoint for a session, replacing the previous one
+
+        Args:
+            token: The session token
+            checkpoint: Session state as returned by ScreeningSession.to_checkpoint
+        """
+        self.backend.put_session(token, encode_checkpoint(checkpoint))
+
+    def load(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the latest checkpoint for a session
+
+        Args:
+            token: The session token
+
+        Returns:
+            Optional[Dict[str, Any]]: The checkpoint, or None if there is none
+        """
+        payload = self.backend.get_session(token)
+        return decode_checkpoint(payload) if payload else None
+
+    def delete(self, token: str) -> None:
+        """Remove a session's checkpoint"""
+        self.backend.delete_session(token)
+
+    def purge_expired(self, ttl_seconds: float = SESSION_TTL_SECONDS) -> int:
+        """
+        Remove checkpoints that have not been updated within the TTL
+
+        Returns:
+            int: Number of checkpoints removed
+        """
+        return self.backend.purge_sessions(time.time() - ttl_seconds)
+
+
+_session_store: Optional[SessionStore] = None
+_session_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """
+    Get the process-wide session store, purging expired checkpoints on first use
+
+    Checkpoints use SESSION_STORE_BACKEND, sharing the state backend instance
+    when both settings name the same backend.
+
+    Returns:
+        SessionStore: The shared store instance
+    """
+    global _session_store
+    with _session_store_lock:
+        if _session_store is None:
+            if SESSION_STORE_BACKEND == STATE_BACKEND:
+                backend = get_state_backend()
+            else:
+                backend = STATE_BACKENDS[SESSION_STORE_BACKEND]()
+            _session_store = SessionStore(backend)
+            _session_store.purge_expired()
+        return _session_store
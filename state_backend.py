@@ -0,0 +1,286 @@
+# This file holds state that must be shared by every app worker
+# Session checkpoints, per-session cooldowns and the cluster-wide API quota ledger live behind one interface
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config import STATE_BACKEND, STATE_BACKEND_PATH
+
+# Quota ledger entry: (request_level, token_level, last_refill, blocked_until), see rate_limiter.apply_reservation
+QuotaState = Tuple[float, float, float, float]
+QuotaUpdate = Callable[[Optional[QuotaState]], Tuple[QuotaState, Any]]
+
+
+class StateBackend:
+    """Interface for shared state storage
+
+    shared is True when the state is visible to other processes, so
+    several workers behind a load balancer see the same sessions and quota.
+    """
+
+    shared = False
+
+    def get_session(self, token: str) -> Optional[bytes]:
+        """Get the stored checkpoint payload for a session token, or None"""
+        raise NotImplementedError
+
+    def put_session(self, token: str, payload: bytes) -> None:
+        """Store the checkpoint payload for a session token, replacing any previous one"""
+        raise NotImplementedError
+
+    def delete_session(self, token: str) -> None:
+        """Remove a session's checkpoint"""
+        raise NotImplementedError
+
+    def purge_sessions(self, older_than: float) -> int:
+        """
+        Remove checkpoints last written before a wall-clock time
+
+        Args:
+            older_than: Unix timestamp
+
+        Returns:
+            int: Number of checkpoints removed
+        """
+        raise NotImplementedError
+
+    def claim_cooldown(self, key: str, seconds: float) -> float:
+        """
+        Start a cooldown for a key unless one is already running
+
+        Args:
+            key: What the cooldown applies to, e.g. a session token
+            seconds: Length of the cooldown
+
+        Returns:
+            float: 0 if the cooldown was claimed, otherwise the seconds left on the running one
+        """
+        raise NotImplementedError
+
+    def update_quota(self, key: str, update: QuotaUpdate) -> Any:
+        """
+        Atomically read, update and write a quota ledger entry
+
+        Args:
+            key: Ledger key (API key digest and model)
+            update: Called with the current entry (None if new); returns the new entry and a result
+
+        Returns:
+            Any: The result returned by update
+        """
+        raise NotImplementedError
+
+    def read_quota(self, key: str) -> Optional[QuotaState]:
+        """
+        Read a quota ledger entry without locking it for update
+
+        Args:
+            key: Ledger key (API key digest and model)
+
+        Returns:
+            Optional[QuotaState]: The entry, or None if there is none yet
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class InMemoryStateBackend(StateBackend):
+    """State kept in this process only; enough for a single worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Tuple[bytes, float]] = {}
+        self._cooldowns: Dict[str, float] = {}
+        self._quota: Dict[str, QuotaState] = {}
+
+    def get_session(self, token: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._sessions.get(token)
+        return entry[0] if entry else None
+
+    def put_session(self, token: str, payload: bytes) -> None:
+        with self._lock:
+            self._sessions[token] = (payload, time.time())
+
+    def delete_session(self, token: str) -> None:
+        with self._lock:
+            self._sessions.pop(token, None)
+
+    def purge_sessions(self, older_than: float) -> int:
+        with self._lock:
+            expired = [token for token, (_, updated_at) in self._sessions.items() if updated_at < older_than]
+            for token in expired:
+                del self._sessions[token]
+        return len(expired)
+
+    def claim_cooldown(self, key: str, seconds: float) -> float:
+        now = time.time()
+        with self._lock:
+            remaining = self._cooldowns.get(key, 0.0) - now
+            if remaining > 0:
+                return remaining
+            self._cooldowns[key] = now + seconds
+            return 0.0
+
+    def update_quota(self, key: str, update: QuotaUpdate) -> Any:
+        with self._lock:
+            state, result = update(self._quota.get(key))
+            self._quota[key] = state
+            return result
+
+    def read_quota(self, key: str) -> Optional[QuotaState]:
+        with self._lock:
+            return self._quota.get(key)
+
+
+class SQLiteStateBackend(StateBackend):
+    """State in a SQLite database that every worker on the node opens
+
+    Read-modify-write operations run in BEGIN IMMEDIATE transactions, so the
+    database lock serializes them across processes, not just threads.
+    """
+
+    shared = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            token TEXT PRIMARY KEY,
+            payload BLOB NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions (updated_at);
+        CREATE TABLE IF NOT EXISTS cooldowns (
+            key TEXT PRIMARY KEY,
+            until REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS quota (
+            key TEXT PRIMARY KEY,
+            request_level REAL NOT NULL,
+            token_level REAL NOT NULL,
+            last_refill REAL NOT NULL,
+            blocked_until REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str = STATE_BACKEND_PATH, busy_timeout: float = 30.0):
+        """
+        Open (and create if needed) the database
+
+        Args:
+            path: Path of the SQLite database file shared by the workers
+            busy_timeout: Seconds to wait for another process's write lock
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        # Autocommit mode, so transactions are started explicitly with the lock level we need
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def _transaction(self, work: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run work inside an immediate (write-locked) transaction"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def get_session(self, token: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM sessions WHERE token = ?", (token,)).fetchone()
+        return row[0] if row else None
+
+    def put_session(self, token: str, payload: bytes) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions (token, payload, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(token) DO UPDATE SET payload = excluded.payload, updated_at = excluded.updated_at",
+                (token, payload, time.time())
+            )
+
+    def delete_session(self, token: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE token = ?", (token,))
+
+    def purge_sessions(self, older_than: float) -> int:
+        with self._lock:
+            return self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (older_than,)).rowcount
+
+    def claim_cooldown(self, key: str, seconds: float) -> float:
+        def work(conn):
+            now = time.time()
+            row = conn.execute("SELECT until FROM cooldowns WHERE key = ?", (key,)).fetchone()
+            if row and row[0] > now:
+                return row[0] - now
+            conn.execute(
+                "INSERT INTO cooldowns (key, until) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET until = excluded.until",
+                (key, now + seconds)
+            )
+            return 0.0
+        return self._transaction(work)
+
+    def update_quota(self, key: str, update: QuotaUpdate) -> Any:
+        def work(conn):
+            row = conn.execute(
+                "SELECT request_level, token_level, last_refill, blocked_until FROM quota WHERE key = ?", (key,)
+            ).fetchone()
+            state, result = update(tuple(row) if row else None)
+            conn.execute(
+                "INSERT INTO quota (key, request_level, token_level, last_refill, blocked_until) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET request_level = excluded.request_level, "
+                "token_level = excluded.token_level, last_refill = excluded.last_refill, "
+                "blocked_until = excluded.blocked_until",
+                (key, *state)
+            )
+            return result
+        return self._transaction(work)
+
+    def read_quota(self, key: str) -> Optional[QuotaState]:
+        # A plain read: WAL readers do not take the write lock other workers reserve through
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT request_level, token_level, last_refill, blocked_until FROM quota WHERE key = ?", (key,)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# Available state backends, selected with STATE_BACKEND
+STATE_BACKENDS = {
+    "memory": lambda: InMemoryStateBackend(),
+    "sqlite": lambda: SQLiteStateBackend(STATE_BACKEND_PATH),
+}
+
+_backend: Optional[StateBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_state_backend() -> StateBackend:
+    """
+    Get the process-wide state backend configured in config.py
+
+    Returns:
+        StateBackend: The shared backend instance
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = STATE_BACKENDS[STATE_BACKEND]()
+        return _backend
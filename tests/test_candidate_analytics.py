@@ -0,0 +1,48 @@
+# Tests for the columnar candidate index
+# Tech aliases must find the same candidates whichever spelling was stored or queried
+
+import os
+import tempfile
+import unittest
+
+from candidate_analytics import CandidateIndex
+
+RECORDS = [
+    {"email": "ann@example.com", "tech_stack": ["kubernetes", "python"], "years_experience": 5,
+     "current_location": "Berlin"},
+    {"email": "bo@example.com", "tech_stack": "k8s, py, golang", "years_experience": 2,
+     "current_location": "berlin"},
+    {"email": "cy@example.com", "tech_stack": ["java"], "years_experience": None, "current_location": "Paris"},
+]
+
+
+class CandidateIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = CandidateIndex.build(RECORDS)
+
+    def test_aliases_match_canonical_names(self):
+        both = ["ann@example.com", "bo@example.com"]
+        self.assertEqual(self.index.emails_for(self.index.query(tech="k8s")), both)
+        self.assertEqual(self.index.emails_for(self.index.query(tech="kubernetes")), both)
+        self.assertEqual(self.index.emails_for(self.index.query(tech=["py"])), both)
+        self.assertEqual(self.index.emails_for(self.index.query(any_tech=["go", "java"])),
+                         ["bo@example.com", "cy@example.com"])
+
+    def test_filters_combine(self):
+        rows = self.index.query(tech="python", location="BERLIN", min_years=3)
+        self.assertEqual(self.index.emails_for(rows), ["ann@example.com"])
+        self.assertEqual(len(self.index.query(tech="rust")), 0)
+
+    def test_frequency_counts_canonical_terms(self):
+        self.assertEqual(self.index.tech_frequency(top=2), [("kubernetes", 2), ("python", 2)])
+
+    def test_save_and_load_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "index.npz")
+            self.index.save(path)
+            loaded = CandidateIndex.load(path)
+        self.assertEqual(loaded.emails_for(loaded.query(tech="k8s")), ["ann@example.com", "bo@example.com"])
+
+
+if __name__ == "__main__":
+    unittest.main()
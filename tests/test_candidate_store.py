@@ -0,0 +1,47 @@
+# Tests for the SQLite candidate store
+# Lookups use the secondary indexes, and a full pass pages by key rather than by offset
+
+import unittest
+
+from candidate_store import SQLiteCandidateStore
+
+
+def candidate(number: int, **fields):
+    return {"email": f"c{number:03d}@example.com", "full_name": f"Candidate {number}", **fields}
+
+
+class SQLiteCandidateStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.store = SQLiteCandidateStore(":memory:")
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_iter_all_visits_every_record_once_in_email_order(self):
+        self.store.upsert_many(candidate(number) for number in range(25, 0, -1))
+        emails = [record["email"] for record in self.store.iter_all(batch_size=4)]
+        self.assertEqual(emails, [f"c{number:03d}@example.com" for number in range(1, 26)])
+
+    def test_iter_all_is_not_shifted_by_deletes_ahead_of_the_cursor(self):
+        self.store.upsert_many(candidate(number) for number in range(1, 11))
+        records = self.store.iter_all(batch_size=3)
+        seen = [next(records)["email"] for _ in range(3)]
+        # Removing an already-visited row would make an OFFSET cursor skip an unseen one
+        with self.store._conn:
+            self.store._conn.execute("DELETE FROM candidates WHERE email = ?", ("c001@example.com",))
+        seen += [record["email"] for record in records]
+        self.assertEqual(seen, [f"c{number:03d}@example.com" for number in range(1, 11)])
+
+    def test_find_and_count_use_the_filters(self):
+        self.store.upsert(candidate(1, tech_stack=["python", "docker"], current_location="Berlin",
+                                    years_experience=5))
+        self.store.upsert(candidate(2, tech_stack="python", current_location="Paris", years_experience=1))
+        self.assertEqual(self.store.count(tech="python"), 2)
+        self.assertEqual([record["email"] for record in self.store.find(tech="python", location="berlin")],
+                         ["c001@example.com"])
+        self.assertEqual(self.store.count(min_years=2), 1)
+        self.assertEqual(self.store.get_by_email("C002@example.com")["current_location"], "Paris")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+# Tests for candidate record validation and incremental extraction
+# Every assignment is validated, and only messages added since the last extraction are scanned
+
+import contextlib
+import io
+import unittest
+
+from data_handler import CandidateInfo, CandidateRecord
+
+
+class CandidateRecordValidationTest(unittest.TestCase):
+    def test_values_are_normalized(self):
+        record = CandidateRecord(email=" Ann@Example.COM ", years_experience="5", tech_stack="Python and Go")
+        self.assertEqual(record.email, "ann@example.com")
+        self.assertEqual(record.years_experience, 5)
+        self.assertEqual(record.tech_stack, ["python", "go"])
+
+    def test_direct_assignment_is_validated(self):
+        record = CandidateRecord()
+        with self.assertRaises(ValueError):
+            record.email = "not an email"
+        with self.assertRaises(ValueError):
+            record.years_experience = 75
+        self.assertIsNone(record.email)
+        self.assertIsNone(record.years_experience)
+
+    def test_wrong_types_are_rejected_not_coerced(self):
+        record = CandidateRecord()
+        for field, value in [("technical_responses", "abc"), ("conversation_timestamp", None),
+                             ("conversation_complete", "yes"), ("years_experience", 5.7),
+                             ("years_experience", True), ("full_name", 42), ("tech_stack", 7)]:
+            with self.subTest(field=field, value=value):
+                with self.assertRaises(TypeError):
+                    setattr(record, field, value)
+
+    def test_unknown_fields_are_rejected(self):
+        record = CandidateRecord()
+        with self.assertRaises(AttributeError):
+            record.nickname = "Ann"
+        with self.assertRaises(KeyError):
+            record.set("nickname", "Ann")
+
+    def test_checkpoint_round_trip(self):
+        info = CandidateInfo()
+        info.update_field("full_name", "Ann Lee")
+        info.add_technical_response("What is a decorator?", "A function wrapper")
+        info.mark_complete()
+        restored = CandidateRecord.from_dict(info.to_dict())
+        self.assertTrue(restored.conversation_complete)
+        self.assertEqual(restored.technical_responses[0]["answer"], "A function wrapper")
+
+
+class ExtractionAgreesWithValidationTest(unittest.TestCase):
+    def extract(self, message: str):
+        info = CandidateInfo()
+        info.update_from_conversation([{"role": "user", "content": message}])
+        return info.to_dict()
+
+    def test_extracted_phone_numbers_are_stored(self):
+        self.assertEqual(self.extract("my phone is 0049 151 1234 5678")["phone"], "0049 151 1234")
+        self.assertEqual(self.extract("call me on 12 345 678 9012")["phone"], "12 345 678 9012")
+        self.assertEqual(self.extract("+1 555 123 4567")["phone"], "+1 555 123 4567")
+
+    def test_typed_phone_numbers_are_still_accepted(self):
+        info = CandidateInfo()
+        self.assertTrue(info.update_field("phone", "555-123-4567"))
+
+    def test_rejections_go_to_stderr(self):
+        info = CandidateInfo()
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            self.assertFalse(info.update_field("years_experience", 75))
+        self.assertEqual(stdout.getvalue(), "")
+        self.assertIn("Rejected value for years_experience", stderr.getvalue())
+
+
+class IncrementalExtractionTest(unittest.TestCase):
+    def setUp(self):
+        self.info = CandidateInfo()
+        self.scanned = []
+        extract = self.info._extract_info_from_message
+
+        def recording_extract(content):
+            self.scanned.append(content)
+            return extract(content)
+
+        self.info._extract_info_from_message = recording_extract
+
+    def test_only_new_messages_are_scanned(self):
+        history = [{"role": "assistant", "content": "Hello"}, {"role": "user", "content": "my name is Ann Lee"}]
+        self.info.update_from_conversation(history)
+        history += [{"role": "assistant", "content": "Thanks"}, {"role": "user", "content": "ann@example.com"}]
+        extracted = self.info.extract_info_from_conversation(history)
+        self.assertEqual(self.scanned, ["my name is Ann Lee", "ann@example.com"])
+        self.assertEqual(extracted, {"full_name": "Ann Lee", "email": "ann@example.com"})
+
+    def test_later_messages_win_as_in_a_full_scan(self):
+        history = [{"role": "user", "content": "I live in Berlin"}]
+        self.info.extract_info_from_conversation(history)
+        history.append({"role": "user", "content": "Sorry, I am based in Paris"})
+        incremental = self.info.extract_info_from_conversation(history)
+        self.assertEqual(incremental, CandidateInfo().extract_info_from_conversation(history))
+        self.assertEqual(incremental["current_location"], "Paris")
+
+    def test_a_shorter_history_starts_over(self):
+        self.info.extract_info_from_conversation([{"role": "user", "content": "my name is Ann Lee"},
+                                                  {"role": "user", "content": "I live in Berlin"}])
+        extracted = self.info.extract_info_from_conversation([{"role": "user", "content": "my name is Bo Chen"}])
+        self.assertEqual(extracted, {"full_name": "Bo Chen"})
+
+    def test_full_rescan_discards_previous_results(self):
+        history = [{"role": "user", "content": "my name is Ann Lee"}]
+        self.info.extract_info_from_conversation(history)
+        self.info.extract_info_from_conversation(history, full_rescan=True)
+        self.assertEqual(self.scanned, ["my name is Ann Lee", "my name is Ann Lee"])
+
+    def test_checkpoint_keeps_the_cursor(self):
+        history = [{"role": "user", "content": "my name is Ann Lee"}]
+        self.info.update_from_conversation(history)
+        restored = CandidateInfo()
+        restored.restore_checkpoint(self.info.to_checkpoint())
+        history.append({"role": "user", "content": "ann@example.com"})
+        self.assertEqual(restored.extract_info_from_conversation(history),
+                         {"full_name": "Ann Lee", "email": "ann@example.com"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+# Tests for the single-pass extraction engine
+# It must find the same fields as the separate searches CandidateInfo used to run
+
+import re
+import unittest
+
+import utils
+from extraction import extract_fields, scan
+
+
+def baseline_extract(content: str):
+    """The original per-field searches from CandidateInfo, kept here as the reference"""
+    content = content.lower()
+    extracted_info = {}
+
+    name_match = re.search(r'my name is\s+([a-zA-Z\s]+)', content)
+    if name_match:
+        extracted_info["full_name"] = ' '.join(part.capitalize() for part in name_match.group(1).strip().split())
+    email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', content)
+    if email_match:
+        extracted_info["email"] = email_match.group(0)
+    phone_match = re.search(r'(\+\d{1,3}|\d{1,3})[\s.-]?\d{3}[\s.-]?\d{3,4}[\s.-]?\d{3,4}', content)
+    if phone_match:
+        extracted_info["phone"] = phone_match.group(0)
+    exp_match = re.search(r'(\d+)\s+years?\s+(of\s+)?experience', content)
+    if exp_match:
+        extracted_info["years_experience"] = int(exp_match.group(1))
+    location_match = re.search(r'(live|based|located)\s+in\s+([a-zA-Z\s,]+)', content)
+    if location_match:
+        extracted_info["current_location"] = location_match.group(2).strip().title()
+
+    for pattern in [r'work with\s+([a-zA-Z0-9\s,\.+#]+)', r'experience (?:with|in)\s+([a-zA-Z0-9\s,\.+#]+)',
+                    r'tech stack\s*(?:includes|is|:)?\s*([a-zA-Z0-9\s,\.+#]+)']:
+        tech_match = re.search(pattern, content)
+        if tech_match:
+            tech_stack = tech_match.group(1).strip()
+            if ',' in tech_stack:
+                extracted_info["tech_stack"] = [tech.strip() for tech in tech_stack.split(',')]
+            else:
+                extracted_info["tech_stack"] = tech_stack
+            break
+
+    return extracted_info
+
+
+MESSAGES = [
+    "Hi, my name is Ann Lee and my email is Ann.Lee@Example.com",
+    "MY NAME IS JOHN SMITH",
+    "You can reach me at +44 20 7946 0958 or 555-123-4567",
+    "my phone is 0049 151 1234 5678, email bo_x@mail.co.uk",
+    "I have 7 years of experience with Python, Django and PostgreSQL",
+    "10 years ago I moved; now 3 years experience",
+    "I am 30 years old with 5 yrs experience",
+    "I live in San Francisco, California",
+    "I'm located in Paris. I have 12 years experience in java",
+    "I'm based in Berlin and I work with Go, Kubernetes, and Terraform",
+    "I want to work with data. My experience with spark is limited",
+    "My tech stack includes React, TypeScript, Node.js",
+    "tech stack: C++, C#, Rust",
+    "Nothing to see here",
+]
+
+
+class BaselineParityTest(unittest.TestCase):
+    def test_fields_match_the_separate_searches(self):
+        for message in MESSAGES:
+            with self.subTest(message=message):
+                self.assertEqual(extract_fields(message), baseline_extract(message))
+
+    def test_spans_point_at_the_original_text(self):
+        text = "Email ANN@Example.com, phone +1 555 123 4567"
+        found = scan(text)
+        for field in ("email", "phone"):
+            start, end = found[field].span
+            self.assertEqual(text[start:end], found[field].text)
+
+    def test_utils_helpers_share_the_engine(self):
+        text = "Reach me at ann@example.com or 555-123-4567, 4 years in total"
+        self.assertEqual(utils.extract_email(text), "ann@example.com")
+        self.assertEqual(utils.extract_phone(text), "555-123-4567")
+        self.assertEqual(utils.extract_years_experience(text), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
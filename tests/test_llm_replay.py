@@ -0,0 +1,76 @@
+# Tests for recording model exchanges and replaying them offline
+# A recorded screening must replay with every request found and the same results each time
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from llm_backends import FakeBackend
+from llm_replay import ReplayBackend, ReplayFixture, ReplayMissError, exchange_key, record, replay
+
+TRANSCRIPTS = [
+    {"name": "full", "messages": ["Hi, my name is Ann Lee", "ann@example.com, +1 555 123 4567",
+                                  "I have 4 years of experience and I live in Berlin",
+                                  "Backend engineer", "My tech stack is python, docker", "Thanks, bye"]},
+    {"name": "short", "messages": ["my name is Bo Chen", "bye"]},
+]
+
+
+class ExchangeKeyTest(unittest.TestCase):
+    def test_whitespace_does_not_change_the_key(self):
+        history = [{"role": "user", "parts": ["hello  there"]}]
+        self.assertEqual(exchange_key("system", history, "Hi\n"),
+                         exchange_key("system ", [{"role": "user", "parts": ["hello there"]}], "Hi"))
+
+    def test_everything_the_model_sees_is_part_of_the_key(self):
+        key = exchange_key("system", [], "Hi")
+        self.assertNotEqual(key, exchange_key("other system", [], "Hi"))
+        self.assertNotEqual(key, exchange_key("system", [{"role": "user", "parts": ["earlier"]}], "Hi"))
+        self.assertNotEqual(key, exchange_key("system", [], "Hello"))
+
+
+class RecordReplayTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "fixture.json.gz")
+        backend = FakeBackend(latency="constant:0")
+        backend.rate_limited = False  # Keep the recording out of the shared quota
+        with contextlib.redirect_stderr(io.StringIO()), contextlib.redirect_stdout(io.StringIO()):
+            record(TRANSCRIPTS, backend, ReplayFixture(self.path))
+
+    def replay(self, fixture: ReplayFixture):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return replay(fixture)
+
+    def test_replay_matches_the_recording_without_misses(self):
+        result = self.replay(ReplayFixture(self.path))
+        self.assertEqual(result["conversations"], 2)
+        self.assertEqual(result["failed"], 0, result["failures"])
+        self.assertEqual(result["requests"]["misses"], 0)
+        self.assertGreater(result["requests"]["hits"], 0)
+
+    def test_replay_is_deterministic(self):
+        first, second = self.replay(ReplayFixture(self.path)), self.replay(ReplayFixture(self.path))
+        self.assertEqual(first["requests"], second["requests"])
+        self.assertEqual(first["failures"], second["failures"])
+
+    def test_a_changed_reply_is_reported(self):
+        fixture = ReplayFixture(self.path)
+        fixture.conversations[1]["replies"][1] = "Something else entirely"
+        result = self.replay(fixture)
+        self.assertEqual(result["failed"], 1)
+        self.assertEqual(result["failures"][0]["name"], "short")
+        self.assertEqual(result["failures"][0]["problems"][0]["turn"], 1)
+
+    def test_an_unrecorded_request_is_a_miss(self):
+        backend = ReplayBackend(ReplayFixture(self.path))
+        with self.assertRaises(ReplayMissError):
+            backend.complete("never recorded", [])
+        self.assertEqual(backend.stats(), {"requests": 1, "hits": 0, "misses": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
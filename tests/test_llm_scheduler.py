@@ -0,0 +1,107 @@
+# Tests for the LLM scheduler's ordering and admission, and for refused turns in a screening
+# Closings go first, sessions take turns, and a refused message leaves the session as it was
+
+import threading
+import unittest
+
+from llm_backends import FakeBackend
+from llm_scheduler import (
+    PRIORITY_CLOSING, PRIORITY_GREETING, PRIORITY_INFO, PRIORITY_PREFETCH, LLMScheduler, SchedulerBusyError,
+)
+from llm_service import LLMService
+from question_bank import QuestionBank
+from rate_limiter import UnlimitedRateLimiter
+from resilience import CircuitBreaker, RetryBudget
+from response_cache import ResponseCache
+from screening import ScreeningSession
+
+
+class SchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = LLMScheduler(workers=1, max_queue=4, max_per_session=2, greeting_share=0.25)
+        self.gate = threading.Event()
+        self.started = threading.Event()
+        self.order = []
+
+        def hold_the_worker():
+            self.started.set()
+            self.gate.wait()
+
+        self.blocker = self.scheduler.submit("blocker", PRIORITY_INFO, hold_the_worker)
+        self.started.wait(timeout=2)
+
+    def tearDown(self):
+        self.gate.set()
+
+    def submit(self, session_id, priority, name):
+        return self.scheduler.submit(session_id, priority, lambda: self.order.append(name))
+
+    def drain(self, futures):
+        self.gate.set()
+        for future in futures:
+            future.result(timeout=2)
+
+    def test_priority_classes_run_in_order(self):
+        futures = [self.submit("a", PRIORITY_GREETING, "greeting"), self.submit("b", PRIORITY_INFO, "info"),
+                   self.submit("c", PRIORITY_CLOSING, "closing")]
+        self.drain(futures)
+        self.assertEqual(self.order, ["closing", "info", "greeting"])
+
+    def test_sessions_take_turns_within_a_class(self):
+        futures = [self.submit("a", PRIORITY_INFO, "a1"), self.submit("a", PRIORITY_INFO, "a2"),
+                   self.submit("b", PRIORITY_INFO, "b1")]
+        self.drain(futures)
+        self.assertEqual(self.order, ["a1", "b1", "a2"])
+
+    def test_admission_limits(self):
+        self.submit("a", PRIORITY_INFO, "a1")
+        self.submit("a", PRIORITY_INFO, "a2")
+        with self.assertRaises(SchedulerBusyError):
+            self.submit("a", PRIORITY_INFO, "a3")  # Per-session limit
+        self.submit("b", PRIORITY_GREETING, "b1")
+        with self.assertRaises(SchedulerBusyError):
+            self.submit("c", PRIORITY_GREETING, "c1")  # Greetings may fill a quarter of the queue
+        self.submit("d", PRIORITY_CLOSING, "d1")
+        with self.assertRaises(SchedulerBusyError):
+            self.submit("e", PRIORITY_CLOSING, "e1")  # Queue full
+        self.assertEqual(self.scheduler.stats()["rejected"], 3)
+
+    def test_prefetch_needs_an_idle_worker(self):
+        with self.assertRaises(SchedulerBusyError):
+            self.submit("a", PRIORITY_PREFETCH, "prefetch")
+        self.drain([self.blocker])
+        self.submit("a", PRIORITY_PREFETCH, "prefetch").result(timeout=2)
+
+
+class BusyScheduler:
+    """Scheduler stand-in that refuses every request"""
+
+    def run(self, session_id, priority, fn, reserve=None):
+        raise SchedulerBusyError("busy")
+
+
+class RefusedTurnTest(unittest.TestCase):
+    def test_refused_message_is_rolled_back(self):
+        service = LLMService(backend=FakeBackend(latency="constant:0"), response_cache=ResponseCache(None),
+                             question_bank=QuestionBank(None), rate_limiter=UnlimitedRateLimiter(),
+                             circuit_guards=(CircuitBreaker(), RetryBudget()))
+        session = ScreeningSession(service, prefetcher=None)
+        session.prefetcher = None
+        session.start()
+        history = list(session.conversation_history)
+
+        service.scheduler = BusyScheduler()
+        with self.assertRaises(SchedulerBusyError):
+            list(session.respond_stream("My name is Ann Lee, email ann@example.com"))
+        self.assertEqual(session.conversation_history, history)
+        self.assertIsNone(session.candidate_info.get_field("email"))
+        self.assertIsNone(session.candidate_info.get_field("full_name"))
+
+        # Once the scheduler accepts it again, the same message is extracted normally
+        service.scheduler = LLMScheduler(workers=1)
+        list(session.respond_stream("My name is Ann Lee, email ann@example.com"))
+        self.assertEqual(session.candidate_info.get_field("email"), "ann@example.com")
+
+
+if __name__ == "__main__":
+    unittest.main()
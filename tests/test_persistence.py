@@ -0,0 +1,85 @@
+# Tests for write-behind persistence
+# A flush must only report success for writes that were really persisted
+
+import threading
+import unittest
+
+from candidate_store import SQLiteCandidateStore
+from persistence import WriteBehindQueue, get_store_queue
+
+
+class RecordingSink:
+    """write_batch stand-in that records batches and fails for chosen keys"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def write_batch(self, batch):
+        self.release.wait()
+        if any(key in self.failing for key, _ in batch):
+            raise OSError("disk full")
+        self.batches.append(list(batch))
+
+
+class WriteBehindQueueTest(unittest.TestCase):
+    def make_queue(self, sink, **kwargs):
+        queue = WriteBehindQueue(sink.write_batch, "test", flush_interval=0.01, **kwargs)
+        self.addCleanup(queue.close)
+        return queue
+
+    def test_writes_for_one_key_are_coalesced(self):
+        sink = RecordingSink()
+        sink.release.clear()
+        queue = self.make_queue(sink, batch_size=10)
+        queue.put("first", 0)  # Taken by the writer, which blocks until released
+        queue.put("ann", 1)
+        queue.put("ann", 2)
+        sink.release.set()
+        self.assertTrue(queue.flush(timeout=5))
+        written = [item for batch in sink.batches for item in batch]
+        self.assertEqual(written, [("first", 0), ("ann", 2)])
+        self.assertEqual(queue.stats()["coalesced"], 1)
+
+    def test_flush_reports_a_failed_write(self):
+        queue = self.make_queue(RecordingSink(failing={"bad"}))
+        sequence = queue.put("bad", {})
+        queue.put("good", {})
+        self.assertFalse(queue.flush(timeout=5, since=sequence))
+        self.assertEqual(queue.stats()["failed"], 1)
+        self.assertEqual(queue.stats()["written"], 1)
+
+    def test_earlier_failures_do_not_fail_later_flushes(self):
+        queue = self.make_queue(RecordingSink(failing={"bad"}))
+        queue.put("bad", {})
+        self.assertFalse(queue.flush(timeout=5))
+        sequence = queue.put("good", {})
+        self.assertTrue(queue.flush(timeout=5, since=sequence))
+
+    def test_close_drains_pending_writes(self):
+        sink = RecordingSink()
+        queue = WriteBehindQueue(sink.write_batch, "test", flush_interval=60)
+        queue.put("ann", 1)
+        self.assertTrue(queue.close(timeout=5))
+        self.assertEqual(sink.batches, [[("ann", 1)]])
+        with self.assertRaises(RuntimeError):
+            queue.put("bo", 2)
+
+
+class StoreQueueTest(unittest.TestCase):
+    def test_each_store_has_its_own_queue_closed_with_it(self):
+        first, second = SQLiteCandidateStore(":memory:"), SQLiteCandidateStore(":memory:")
+        queue = get_store_queue(first)
+        self.assertIs(get_store_queue(first), queue)
+        self.assertIsNot(get_store_queue(second), queue)
+
+        queue.put("ann@example.com", {"email": "ann@example.com"})
+        second.close()
+        first.close()  # Drains the queue into the store before the connection closes
+        self.assertEqual(queue.stats(), {"pending": 0, "written": 1, "coalesced": 0, "failed": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+# Tests for the technical question bank
+# Only real technologies are reported as uncovered, and concurrent saves never drop questions
+
+import os
+import random
+import tempfile
+import unittest
+
+from question_bank import QuestionBank, is_known_tech
+
+PYTHON_QUESTIONS = {"basic": ["What is a list?"], "intermediate": ["What is a decorator?"],
+                    "advanced": ["How does the GIL work?"]}
+GO_QUESTIONS = {"basic": ["What is a goroutine?"], "intermediate": [], "advanced": []}
+
+
+class QuestionBankTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "bank.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_free_text_fragments_are_not_uncovered_technologies(self):
+        bank = QuestionBank(None, rng=random.Random(0))
+        bank.add("python", PYTHON_QUESTIONS)
+        questions, uncovered = bank.build_question_set(["python", "i love it", "k8s"], 3)
+        self.assertEqual(len(questions), 3)
+        self.assertEqual(uncovered, ["kubernetes"])
+        self.assertFalse(is_known_tech("i love it"))
+        self.assertTrue(is_known_tech("kubernetes"))
+
+    def test_saves_from_two_workers_are_merged(self):
+        first, second = QuestionBank(self.path), QuestionBank(self.path)
+        first.add("python", PYTHON_QUESTIONS)
+        second.add("go", GO_QUESTIONS)
+        first.save()
+        second.save()
+
+        reloaded = QuestionBank(self.path)
+        self.assertEqual(reloaded.technologies(), ["go", "python"])
+        self.assertEqual(reloaded.build_question_set("python", 1)[1], [])
+
+    def test_save_skips_duplicate_questions(self):
+        first, second = QuestionBank(self.path), QuestionBank(self.path)
+        first.add("python", PYTHON_QUESTIONS)
+        second.add("python", PYTHON_QUESTIONS)
+        first.save()
+        second.save()
+        self.assertEqual(len(QuestionBank(self.path).build_question_set("python", 10)[0]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
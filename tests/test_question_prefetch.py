@@ -0,0 +1,42 @@
+# Tests for background question prefetching
+# Free-text fragments in a tech stack must not cost generation calls or block the prepared set
+
+import random
+import unittest
+
+from llm_backends import FakeBackend
+from llm_service import LLMService
+from question_bank import QuestionBank
+from question_prefetch import QuestionPrefetcher
+from rate_limiter import UnlimitedRateLimiter
+from resilience import CircuitBreaker, RetryBudget
+from response_cache import ResponseCache
+
+
+class PrefetchTest(unittest.TestCase):
+    def setUp(self):
+        self.service = LLMService(backend=FakeBackend(latency="constant:0"), response_cache=ResponseCache(None),
+                                  question_bank=QuestionBank(None, rng=random.Random(0)),
+                                  rate_limiter=UnlimitedRateLimiter(),
+                                  circuit_guards=(CircuitBreaker(), RetryBudget()))
+        self.prompts = []
+        self.service.generate_text = self.generate_text
+        self.prefetcher = QuestionPrefetcher(workers=1, min_headroom=0)
+
+    def generate_text(self, prompt, priority=None):
+        self.prompts.append(prompt)
+        return "basic: What is it?\nintermediate: How is it used?\nadvanced: What are its limits?"
+
+    def test_only_technologies_are_generated(self):
+        task = self.prefetcher.start(self.service, "python and I love it")
+        questions = task.result(timeout=10)
+        self.assertEqual(len(self.prompts), 1)
+        self.assertIn("python", self.prompts[0])
+        self.assertNotIn("i love it", self.prompts[0])
+        # The fragment does not leave the stack "uncovered", so the prepared set is used
+        self.assertEqual(len(questions), 3)
+        self.assertEqual(self.service.question_bank.technologies(), ["python"])
+
+
+if __name__ == "__main__":
+    unittest.main()
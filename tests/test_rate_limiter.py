@@ -0,0 +1,87 @@
+# Tests for the shared token bucket and for scheduling rate-limited requests
+# Reservations go into debt in arrival order, and waiting for a slot never occupies a worker
+
+import threading
+import time
+import unittest
+
+from llm_scheduler import PRIORITY_INFO, LLMScheduler
+from rate_limiter import LedgerRateLimiter, TokenBucketLimiter
+from state_backend import InMemoryStateBackend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TokenBucketTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = TokenBucketLimiter(requests_per_minute=60, tokens_per_minute=600, clock=self.clock)
+
+    def test_reservations_queue_up_as_debt(self):
+        waits = [self.limiter.reserve() for _ in range(62)]
+        self.assertEqual(waits[:60], [0.0] * 60)
+        # One request per second refills, so callers past the burst are spaced a second apart
+        self.assertAlmostEqual(waits[60], 1.0)
+        self.assertAlmostEqual(waits[61], 2.0)
+        self.assertEqual(self.limiter.headroom(), 0.0)
+
+    def test_debt_is_paid_back_over_time(self):
+        for _ in range(61):
+            self.limiter.reserve()
+        self.clock.now += 3
+        self.assertAlmostEqual(self.limiter.headroom(), 2.0)
+        self.assertEqual(self.limiter.reserve(), 0.0)
+
+    def test_token_budget_limits_large_prompts(self):
+        self.assertEqual(self.limiter.reserve(tokens=600), 0.0)
+        # 10 tokens per second refill the 300-token deficit in 30 seconds
+        self.assertAlmostEqual(self.limiter.reserve(tokens=300), 30.0)
+
+    def test_defer_pushes_back_new_reservations(self):
+        self.limiter.defer(12)
+        self.assertAlmostEqual(self.limiter.reserve(), 12.0)
+        self.clock.now += 12
+        self.assertEqual(self.limiter.reserve(), 0.0)
+
+    def test_ledger_limiter_shares_one_bucket(self):
+        backend = InMemoryStateBackend()
+        first = LedgerRateLimiter(backend, "key", requests_per_minute=2, tokens_per_minute=None)
+        second = LedgerRateLimiter(backend, "key", requests_per_minute=2, tokens_per_minute=None)
+        self.assertEqual(first.reserve(), 0.0)
+        self.assertEqual(second.reserve(), 0.0)
+        self.assertGreater(first.reserve(), 0.0)
+        self.assertEqual(second.headroom(), 0.0)
+
+
+class ScheduledWaitTest(unittest.TestCase):
+    def test_waiting_for_a_slot_does_not_hold_the_worker(self):
+        scheduler = LLMScheduler(workers=1, max_queue=10, max_per_session=5)
+        order = []
+        delayed = scheduler.submit("a", PRIORITY_INFO, lambda: order.append("delayed"), reserve=lambda: 0.3)
+        time.sleep(0.05)  # Let the only worker dispatch and park the delayed job
+        immediate = scheduler.submit("b", PRIORITY_INFO, lambda: order.append("immediate"))
+        immediate.result(timeout=0.2)
+        self.assertEqual(scheduler.stats()["delayed"], 1)
+        delayed.result(timeout=2)
+        self.assertEqual(order, ["immediate", "delayed"])
+
+    def test_reserve_errors_reach_the_caller(self):
+        scheduler = LLMScheduler(workers=1)
+
+        def reserve():
+            raise RuntimeError("ledger unavailable")
+
+        ran = threading.Event()
+        with self.assertRaises(RuntimeError):
+            scheduler.run("a", PRIORITY_INFO, ran.set, reserve=reserve)
+        self.assertFalse(ran.is_set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+# Tests for error classification, backoff and the circuit breaker in LLMService._send_with_retry
+# A trial that ends without a retryable failure must not leave the breaker wedged half-open
+
+import unittest
+from unittest import mock
+
+from llm_backends import FakeBackend, FakeQuotaError
+from llm_scheduler import SchedulerBusyError
+from llm_service import LLMService
+from question_bank import QuestionBank
+from rate_limiter import UnlimitedRateLimiter
+from resilience import (
+    PERMANENT, RATE_LIMITED, TRANSIENT, CircuitBreaker, RetryBudget, RetryPolicy, classify_error,
+)
+from response_cache import ResponseCache
+
+
+class PermanentError(Exception):
+    """An error classify_error treats as permanent (e.g. a rejected request)"""
+
+
+class FailingScheduler:
+    """Scheduler stand-in that fails every request with a given error"""
+
+    def __init__(self, error: Exception):
+        self.error = error
+        self.calls = 0
+
+    def run(self, session_id, priority, fn, reserve=None):
+        self.calls += 1
+        raise self.error
+
+
+class FlakyScheduler:
+    """Scheduler stand-in that fails the first requests with given errors, then runs them"""
+
+    def __init__(self, *errors: Exception):
+        self.errors = list(errors)
+
+    def run(self, session_id, priority, fn, reserve=None):
+        if self.errors:
+            raise self.errors.pop(0)
+        return "response"
+
+
+class ClassificationTest(unittest.TestCase):
+    def test_errors_are_classified_with_their_hints(self):
+        self.assertEqual(classify_error(FakeQuotaError(retry_after=7)), (RATE_LIMITED, 7.0))
+        self.assertEqual(classify_error(ConnectionError("reset")).kind, TRANSIENT)
+        self.assertEqual(classify_error(PermanentError("400 invalid argument")).kind, PERMANENT)
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def test_backoff_is_jittered_below_the_ceiling(self):
+        policy = RetryPolicy(base_delay=1.0, max_delay=4.0)
+        for attempt in range(6):
+            delay = policy.backoff(attempt)
+            self.assertGreaterEqual(delay, 0.0)
+            self.assertLessEqual(delay, min(4.0, 2 ** attempt))
+
+    def test_server_hint_is_a_floor(self):
+        policy = RetryPolicy(base_delay=1.0, max_delay=4.0)
+        with mock.patch("resilience.random.uniform", return_value=0.5):
+            self.assertEqual(policy.backoff(0, retry_after=3.0), 3.0)
+            self.assertEqual(policy.backoff(0, retry_after=0.1), 0.5)
+
+    def test_service_waits_for_the_server_hint(self):
+        service = LLMService(backend=FakeBackend(latency="constant:0"), response_cache=ResponseCache(None),
+                             question_bank=QuestionBank(None), scheduler=FlakyScheduler(ConnectionError("reset")),
+                             rate_limiter=UnlimitedRateLimiter(), circuit_guards=(CircuitBreaker(), RetryBudget()))
+        with mock.patch("resilience.random.uniform", return_value=0.0), \
+                mock.patch("resilience.parse_retry_after", return_value=2.5), \
+                mock.patch("llm_service.time.sleep") as sleep:
+            self.assertEqual(service._send_with_retry("hello", one_shot=True), "response")
+        sleep.assert_called_once_with(2.5)
+
+
+class HalfOpenTrialTest(unittest.TestCase):
+    def setUp(self):
+        self.now = [0.0]
+        self.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30, clock=lambda: self.now[0])
+        # Open the circuit, then let the reset time pass so the next request is the half-open trial
+        self.breaker.record_failure()
+        self.now[0] += 31
+
+    def make_service(self, error: Exception) -> LLMService:
+        return LLMService(backend=FakeBackend(latency="constant:0"), response_cache=ResponseCache(None),
+                          question_bank=QuestionBank(None), scheduler=FailingScheduler(error),
+                          rate_limiter=UnlimitedRateLimiter(), circuit_guards=(self.breaker, RetryBudget()))
+
+    def test_permanent_error_closes_the_circuit(self):
+        service = self.make_service(PermanentError("400 invalid argument"))
+        self.assertIsNone(service._send_with_retry("hello", one_shot=True))
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_busy_scheduler_releases_the_trial(self):
+        service = self.make_service(SchedulerBusyError("busy"))
+        with self.assertRaises(SchedulerBusyError):
+            service._send_with_retry("hello", one_shot=True)
+        # No outcome was recorded, so the breaker stays half-open with the trial slot free again
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+
+
+if __name__ == "__main__":
+    unittest.main()
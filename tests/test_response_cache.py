@@ -0,0 +1,88 @@
+# Tests for the response cache: variant pools, TTL expiry, eviction and key composition
+# Expired rows must not build up on disk, and a changed system prompt must not hit old replies
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import prompts
+from llm_backends import FakeBackend
+from llm_service import LLMService
+from question_bank import QuestionBank
+from rate_limiter import UnlimitedRateLimiter
+from resilience import CircuitBreaker, RetryBudget
+from response_cache import ResponseCache
+
+
+def row_count(cache: ResponseCache) -> int:
+    return cache._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+
+def age_all_rows(cache: ResponseCache) -> None:
+    """Backdate every stored response past any TTL"""
+    with cache._conn:
+        cache._conn.execute("UPDATE response_cache SET created_at = 0")
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_pool_misses_until_full(self):
+        cache = ResponseCache(None, variants=2)
+        cache.put("key", "first")
+        self.assertIsNone(cache.get("key"))
+        cache.put("key", "first")  # Duplicates do not count towards the pool
+        self.assertIsNone(cache.get("key"))
+        cache.put("key", "second")
+        self.assertIn(cache.get("key"), ("first", "second"))
+
+    def test_expired_responses_are_not_served(self):
+        cache = ResponseCache(self.path, variants=1, ttl_seconds=60)
+        cache.put("key", "reply")
+        age_all_rows(cache)
+        self.assertIsNone(ResponseCache(self.path, variants=1, ttl_seconds=60).get("key"))
+
+    def test_expired_rows_are_evicted_on_open(self):
+        cache = ResponseCache(self.path, variants=1, ttl_seconds=60)
+        cache.put("key", "reply")
+        age_all_rows(cache)
+        self.assertEqual(row_count(ResponseCache(self.path, ttl_seconds=60)), 0)
+
+    def test_put_evicts_periodically(self):
+        cache = ResponseCache(self.path, variants=1, ttl_seconds=60, evict_interval_seconds=0)
+        cache.put("old", "reply")
+        age_all_rows(cache)
+        cache.put("new", "reply")
+        self.assertEqual(row_count(cache), 1)
+
+    def test_key_includes_the_system_instruction(self):
+        history = [("user", "hi"), ("model", "hello")]
+        self.assertNotEqual(ResponseCache.make_key("model", "prompt", history, "old instructions"),
+                            ResponseCache.make_key("model", "prompt", history, "new instructions"))
+
+
+class SystemPromptChangeTest(unittest.TestCase):
+    def make_service(self, cache: ResponseCache) -> LLMService:
+        return LLMService(backend=FakeBackend(latency="constant:0"), response_cache=cache,
+                          question_bank=QuestionBank(None), rate_limiter=UnlimitedRateLimiter(),
+                          circuit_guards=(CircuitBreaker(), RetryBudget()))
+
+    def test_changed_system_prompt_misses_the_cache(self):
+        cache = ResponseCache(None, variants=1)
+        self.make_service(cache)._send_cached("Start the screening")
+        self.make_service(cache)._send_cached("Start the screening")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        with mock.patch.object(prompts, "SYSTEM_PROMPT", prompts.SYSTEM_PROMPT + "\nBe brief."):
+            self.make_service(cache)._send_cached("Start the screening")
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+# Tests for checkpointing and resuming screening sessions
+# A resumed session must match the original without sending anything to the model
+
+import unittest
+
+from llm_backends import FakeBackend
+from llm_scheduler import LLMScheduler
+from llm_service import LLMService
+from question_bank import QuestionBank
+from rate_limiter import UnlimitedRateLimiter
+from resilience import CircuitBreaker, RetryBudget
+from response_cache import ResponseCache
+from screening import ScreeningSession
+from session_store import SessionStore
+from state_backend import InMemoryStateBackend
+
+TURNS = [
+    "Hi, my name is Ann Lee",
+    "My email is ann@example.com and my phone is +1 555 123 4567",
+    "I have 6 years of experience and I live in Berlin",
+]
+
+
+def make_service(backend: FakeBackend) -> LLMService:
+    return LLMService(backend=backend, response_cache=ResponseCache(None), question_bank=QuestionBank(None),
+                      scheduler=LLMScheduler(workers=1), rate_limiter=UnlimitedRateLimiter(),
+                      circuit_guards=(CircuitBreaker(), RetryBudget()))
+
+
+def make_session(backend: FakeBackend) -> ScreeningSession:
+    session = ScreeningSession(make_service(backend))
+    session.prefetcher = None
+    return session
+
+
+class CheckpointResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.session = make_session(FakeBackend(latency="constant:0"))
+        self.session.start()
+        for turn in TURNS:
+            self.session.respond(turn)
+        self.store = SessionStore(InMemoryStateBackend())
+        self.store.save("token", self.session.to_checkpoint())
+
+    def resume(self, backend: FakeBackend) -> ScreeningSession:
+        return ScreeningSession.from_checkpoint(self.store.load("token"), make_service(backend), prefetcher=None)
+
+    def test_resume_makes_no_model_calls(self):
+        backend = FakeBackend(latency="constant:0")
+        resumed = self.resume(backend)
+        self.assertEqual(backend.requests, 0)
+        self.assertEqual(resumed.conversation_history, self.session.conversation_history)
+        self.assertEqual(resumed.candidate_info.to_dict(), self.session.candidate_info.to_dict())
+        self.assertEqual(resumed.state.to_checkpoint(), self.session.state.to_checkpoint())
+        self.assertEqual(resumed.llm_service.to_checkpoint(), self.session.llm_service.to_checkpoint())
+
+    def test_resumed_session_continues_like_the_original(self):
+        resumed = self.resume(FakeBackend(latency="constant:0"))
+        next_turn = "I am looking for backend engineer roles"
+        self.assertEqual(resumed.respond(next_turn), self.session.respond(next_turn))
+        self.assertEqual(resumed.to_checkpoint()["llm"], self.session.to_checkpoint()["llm"])
+
+    def test_unknown_checkpoint_version_is_rejected(self):
+        checkpoint = self.store.load("token")
+        checkpoint["version"] = -1
+        with self.assertRaises(ValueError):
+            ScreeningSession.from_checkpoint(checkpoint, make_service(FakeBackend(latency="constant:0")))
+
+    def test_expired_checkpoints_are_purged(self):
+        self.assertEqual(self.store.purge_expired(ttl_seconds=3600), 0)
+        self.assertEqual(self.store.purge_expired(ttl_seconds=-1), 1)
+        self.assertIsNone(self.store.load("token"))
+
+
+if __name__ == "__main__":
+    unittest.main()
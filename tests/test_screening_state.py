@@ -0,0 +1,32 @@
+# Tests for exit-intent detection in candidate messages
+# Ending a screening cannot be undone, so only a message that is plainly an exit may trigger it
+
+import unittest
+
+from screening_state import ScreeningState, is_exit_intent
+
+
+class ExitIntentTest(unittest.TestCase):
+    def test_plain_exits_match(self):
+        for message in ["bye", "Goodbye!", "  quit ", "EXIT.", "end the interview", "End chat", "end this screening!",
+                        "Thanks, bye", "ok, goodbye", "Bye, thank you!"]:
+            with self.subTest(message=message):
+                self.assertTrue(is_exit_intent(message))
+
+    def test_exit_words_inside_answers_do_not_match(self):
+        for message in ["I'm a front end developer", "I do end-to-end testing",
+                        "I want to exit my current job", "How do I quit vim?", "end", "goodbyes",
+                        "I said bye to PHP years ago", "I'd recommend Go", "Thanks, I quit my last job in May"]:
+            with self.subTest(message=message):
+                self.assertFalse(is_exit_intent(message))
+
+    def test_state_only_flags_real_exits(self):
+        state = ScreeningState()
+        state.observe("user", "I'm a front end developer")
+        self.assertFalse(state.exit_requested)
+        state.observe("user", "bye")
+        self.assertTrue(state.exit_requested)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+# Tests for session checkpoint storage
+# Checkpoints must survive a process restart even when the quota ledger is kept in memory
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import session_store
+from state_backend import InMemoryStateBackend, SQLiteStateBackend
+
+
+class SessionStoreBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "state.db")
+        self.backends = {
+            "memory": InMemoryStateBackend,
+            "sqlite": lambda: SQLiteStateBackend(self.path),
+        }
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def open_store(self, state_backend: str, session_backend: str) -> session_store.SessionStore:
+        """Build the process-wide store as a fresh process would, with the given settings"""
+        with mock.patch.object(session_store, "_session_store", None), \
+                mock.patch.object(session_store, "STATE_BACKEND", state_backend), \
+                mock.patch.object(session_store, "SESSION_STORE_BACKEND", session_backend), \
+                mock.patch.object(session_store, "STATE_BACKENDS", self.backends), \
+                mock.patch.object(session_store, "get_state_backend", self.backends[state_backend]):
+            return session_store.get_session_store()
+
+    def test_checkpoints_survive_a_restart_with_an_in_memory_ledger(self):
+        store = self.open_store("memory", "sqlite")
+        self.assertIsInstance(store.backend, SQLiteStateBackend)
+        store.save("token", {"stage": "tech_stack", "history": [["user", "hi"]]})
+        store.backend.close()
+
+        restarted = self.open_store("memory", "sqlite")
+        self.assertEqual(restarted.load("token"), {"stage": "tech_stack", "history": [["user", "hi"]]})
+        restarted.backend.close()
+
+    def test_matching_settings_share_the_state_backend(self):
+        shared = InMemoryStateBackend()
+        with mock.patch.object(session_store, "_session_store", None), \
+                mock.patch.object(session_store, "STATE_BACKEND", "memory"), \
+                mock.patch.object(session_store, "SESSION_STORE_BACKEND", "memory"), \
+                mock.patch.object(session_store, "get_state_backend", lambda: shared):
+            self.assertIs(session_store.get_session_store().backend, shared)
+
+
+if __name__ == "__main__":
+    unittest.main()
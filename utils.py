@@ -2,55 +2,72 @@
 # It provides helper functions for various tasks
 
 import re
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
+
+import extraction
+from screening_state import ScreeningState
+
+_NUMBER_RE = re.compile(r'\d+')
+_TECH_SEPARATOR_RE = re.compile(r'[,;/]|\sand\s|\s+')
+# Separators that may absorb surrounding whitespace only start at the beginning of a whitespace run,
+# otherwise every position inside a long run would be retried against the whole run
+_TECH_TERM_SEPARATOR_RE = re.compile(r'[,;/]|(?<!\s)\s+and\s+|(?<!\s)\s*&\s*')
 
 def extract_email(text: str) -> Optional[str]:
-    """Extract email address from text using regex"""
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,7}\b'
-    match = re.search(email_pattern, text)
-    return match.group(0) if match else None
+    """Extract email address from text using the shared extraction engine"""
+    match = extraction.scan(text).get("email")
+    return match.text if match else None
 
 def extract_phone(text: str) -> Optional[str]:
-    """Extract phone number from text using regex"""
-    # Pattern matches various phone formats
-    phone_pattern = r'(\+\d{1,3}[-.\s]?)?(\d{3}[-.\s]?)?\d{3}[-.\s]?\d{4}'
-    match = re.search(phone_pattern, text)
+    """Extract phone number from text"""
+    match = extraction.PHONE_SEARCH_RE.search(text)
     return match.group(0) if match else None
 
 def extract_years_experience(text: str) -> Optional[int]:
     """Extract years of experience from text"""
     # Look for patterns like "5 years", "5 yrs", etc.
-    pattern = r'(\d+)\s*(years?|yrs?)'
-    match = re.search(pattern, text, re.IGNORECASE)
+    match = extraction.YEARS_RE.search(text)
     if match:
-        return int(match.group(1))
+        return int(match.group("years_value"))
     
     # If no match with "years", try to find any number
-    numbers = re.findall(r'\d+', text)
-    if numbers:
+    number_match = _NUMBER_RE.search(text)
+    if number_match:
         # Assume first number could be years of experience if reasonable
-        year = int(numbers[0])
-        if 0 <= year <= 50:  # Reasonable range for years of experience
-            return year
+        digits = number_match.group(0).lstrip("0") or "0"
+        # Anything longer than two digits is out of range; converting it could be slow or raise
+        if len(digits) <= 2 and int(digits) <= 50:  # Reasonable range for years of experience
+            return int(digits)
     
     return None
 
 def format_tech_stack(tech_stack: str) -> List[str]:
     """Format tech stack string into a list of technologies"""
     # Split by common separators and clean up
-    technologies = re.split(r'[,;/]|\sand\s|\s+', tech_stack)
+    technologies = _TECH_SEPARATOR_RE.split(tech_stack)
     return [tech.strip() for tech in technologies if tech.strip()]
 
+def normalize_tech_terms(tech_stack: Union[str, List[str], None]) -> List[str]:
+    """Normalize a tech stack (string or list) into lowercase, de-duplicated technology names"""
+    if not tech_stack:
+        return []
+    items = tech_stack if isinstance(tech_stack, list) else [tech_stack]
+    terms = []
+    for item in items:
+        for term in _TECH_TERM_SEPARATOR_RE.split(str(item).lower()):
+            term = term.strip(" .")
+            if term and term not in terms:
+                terms.append(term)
+    return terms
+
 def is_valid_email(email: str) -> bool:
     """Validate email format"""
-    pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,7}\b'
-    return bool(re.fullmatch(pattern, email))
+    return bool(extraction.EMAIL_RE.fullmatch(email))
 
 def is_valid_phone(phone: str) -> bool:
     """Validate phone number format"""
     # Simplified validation - would need to be enhanced for international numbers
-    pattern = r'(\+\d{1,3}[-.\s]?)?(\d{3}[-.\s]?)?\d{3}[-.\s]?\d{4}'
-    return bool(re.fullmatch(pattern, phone))
+    return bool(extraction.PHONE_RE.fullmatch(phone))
 
 def analyze_conversation_state(conversation_history: List[Dict[str, str]]) -> Dict[str, Any]:
     """Analyze the conversation to determine current state
@@ -59,39 +76,9 @@ def analyze_conversation_state(conversation_history: List[Dict[str, str]]) -> Di
     - current_stage: greeting, info_collection, tech_stack, technical_questions, or closing
     - collected_info: dict of information collected so far
     - missing_info: list of fields still needed
-    """
-    # Default values
-    state = {
-        "current_stage": "greeting",
-        "collected_info": {},
-        "missing_info": [
-            "full_name", "email", "phone", "years_experience", 
-            "desired_positions", "current_location", "tech_stack"
-        ]
-    }
     
-    # Basic logic to identify stage
-    assistant_messages = [msg["content"] for msg in conversation_history if msg["role"] == "assistant"]
-    user_messages = [msg["content"] for msg in conversation_history if msg["role"] == "user"]
-    
-    if not assistant_messages:
-        return state
-        
-    # Simple stage determination logic
-    # This would be much more sophisticated in a real implementation
-    last_assistant_msg = assistant_messages[-1].lower()
-    
-    if "technical question" in last_assistant_msg and "?" in last_assistant_msg:
-        state["current_stage"] = "technical_questions"
-    elif "tech stack" in last_assistant_msg or "programming languages" in last_assistant_msg:
-        state["current_stage"] = "tech_stack"
-    elif len(assistant_messages) <= 2:
-        state["current_stage"] = "greeting"
-    elif any(keyword in last_assistant_msg for keyword in ["thank you", "goodbye", "good luck"]):
-        state["current_stage"] = "closing"
-    else:
-        state["current_stage"] = "info_collection"
-    
-    # This is a very basic implementation
-    # In a real system, you would use NLP to extract information
-    return state
\ No newline at end of file
+    This replays the whole history; live sessions keep a ScreeningState and update it per message instead.
+    """
+    state = ScreeningState()
+    state.observe_history(conversation_history)
+    return state.to_dict()
\ No newline at end of file